@@ -0,0 +1,335 @@
+import argparse
+import contextlib
+import hashlib
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+import traceback
+import tracemalloc
+from datetime import datetime
+from multiprocessing.connection import wait
+
+from lancer_simulation import MOTEURS
+
+"""Balayage de paramètres : exécute des simulations (configuration, moteur, graine) en parallèle.
+
+Usage : python -m balayage SOURCE [SOURCE ...] [--moteurs recursif iteratif] [--repetitions 10]
+        [--workers N] [--delai SECONDES] [--base balayage.sqlite]
+
+Une source est un fichier de configuration, un dossier de configurations (*.txt) ou
+une grille JSON (voir generer_grille). Les tâches sont réparties sur `workers`
+processus qui chargent les deux moteurs une fois ; un processus dont la tâche dépasse
+le délai est arrêté et remplacé.
+Les résultats (expression, fitness, générations, durée, pic mémoire) sont écrits dans
+une base SQLite ; une tâche dont le résultat y figure déjà n'est pas relancée."""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultats (
+    empreinte TEXT NOT NULL,
+    moteur TEXT NOT NULL,
+    graine INTEGER NOT NULL,
+    config TEXT NOT NULL,
+    statut TEXT NOT NULL,
+    expression TEXT,
+    fitness REAL,
+    generations INTEGER,
+    duree REAL,
+    memoire_max INTEGER,
+    erreur TEXT,
+    date TEXT NOT NULL,
+    PRIMARY KEY (empreinte, moteur, graine)
+)"""
+
+COLONNES = ("empreinte", "moteur", "graine", "config", "statut", "expression", "fitness",
+            "generations", "duree", "memoire_max", "erreur", "date")
+
+
+def empreinte_config(chemin):
+    """
+    Empreinte du contenu d'un fichier de configuration : une configuration modifiée est relancée,
+    une configuration déplacée ou renommée ne l'est pas.
+    :param chemin: Chemin du fichier.
+    """
+    with open(chemin, "rb") as fichier:
+        return hashlib.sha256(fichier.read()).hexdigest()
+
+
+def generer_grille(spec, dossier=None):
+    """
+    Écrit une configuration par combinaison d'une grille de paramètres.
+    La grille est un fichier JSON de la forme
+    {"base": "config_simulation.txt", "grille": {"taille_population": [50, 100], "+": ["True", "False"]}} :
+    chaque configuration reprend les lignes du fichier de base (chemin relatif au fichier JSON)
+    en remplaçant les valeurs des paramètres de la grille.
+    :param spec: Chemin du fichier JSON.
+    :param dossier: Dossier où écrire les configurations (par défaut, un dossier portant le nom de la grille).
+    :return: Liste des chemins des configurations, dans l'ordre de la grille.
+    """
+    with open(spec) as fichier:
+        grille = json.load(fichier)
+    base = os.path.join(os.path.dirname(os.path.abspath(spec)), grille["base"])
+    with open(base) as fichier:
+        lignes = [ligne.split("=", 1) for ligne in fichier.read().splitlines() if ligne.strip()]
+    cles = [cle.strip() for cle, _ in lignes]
+    inconnues = set(grille["grille"]) - set(cles)
+    if inconnues:
+        raise ValueError(f"Paramètres absents de la configuration de base : {', '.join(sorted(inconnues))}")
+    if dossier is None:
+        dossier = os.path.splitext(spec)[0]
+    os.makedirs(dossier, exist_ok=True)
+    noms = list(grille["grille"])
+    chemins = []
+    for valeurs in itertools.product(*(grille["grille"][nom] for nom in noms)):
+        remplacements = dict(zip(noms, valeurs))
+        contenu = "\n".join(f"{cle} = {remplacements.get(cle, valeur.strip())}"
+                            for cle, (_, valeur) in zip(cles, lignes))
+        chemin = os.path.join(dossier, f"config_{hashlib.sha256(contenu.encode()).hexdigest()[:12]}.txt")
+        with open(chemin, "w") as fichier:
+            fichier.write(contenu)
+        chemins.append(chemin)
+    return chemins
+
+
+def lister_configs(sources):
+    """
+    Développe les sources en liste de fichiers de configuration.
+    :param sources: Fichiers de configuration, dossiers (leurs *.txt, triés) ou grilles JSON.
+    """
+    configs = []
+    for source in sources:
+        if os.path.isdir(source):
+            configs.extend(sorted(os.path.join(source, nom) for nom in os.listdir(source) if nom.endswith(".txt")))
+        elif source.endswith(".json"):
+            configs.extend(generer_grille(source))
+        else:
+            configs.append(source)
+    return configs
+
+
+def creer_taches(configs, moteurs=tuple(MOTEURS), graines=range(10)):
+    """
+    Produit les tâches (config, moteur, graine) d'un balayage.
+    :param configs: Chemins des fichiers de configuration.
+    :param moteurs: Moteurs à utiliser ("recursif", "iteratif").
+    :param graines: Graines des répétitions de chaque couple (config, moteur).
+    :return: Liste de tuples (chemin, moteur, graine).
+    """
+    for moteur in moteurs:
+        if moteur not in MOTEURS:
+            raise ValueError(f"Moteur inconnu : {moteur} (attendu : {', '.join(MOTEURS)}).")
+    return [(config, moteur, graine) for config in configs for moteur in moteurs for graine in graines]
+
+
+def ouvrir_base(chemin):
+    """
+    Ouvre (et crée si besoin) la base des résultats.
+    :param chemin: Chemin du fichier SQLite.
+    """
+    connexion = sqlite3.connect(chemin)
+    connexion.execute(SCHEMA)
+    return connexion
+
+
+def lire_resultats(chemin, statut="ok"):
+    """
+    Relit les résultats d'un balayage.
+    :param chemin: Chemin du fichier SQLite.
+    :param statut: Statut des lignes à lire ("ok", "timeout", "erreur"), ou None pour toutes.
+    :return: Liste de dictionnaires (une entrée par tâche).
+    """
+    connexion = ouvrir_base(chemin)
+    try:
+        requete = f"SELECT {', '.join(COLONNES)} FROM resultats"
+        lignes = connexion.execute(requete, ()) if statut is None else \
+            connexion.execute(requete + " WHERE statut = ?", (statut,))
+        return [dict(zip(COLONNES, ligne)) for ligne in lignes]
+    finally:
+        connexion.close()
+
+
+def _charger_moteurs():
+    # Comme stats.py : les modules des deux moteurs s'importent à plat sans conflit de noms,
+    # seuls leurs modules simulation sont importés par paquet
+    racine = os.path.dirname(os.path.abspath(__file__))
+    for dossier in MOTEURS.values():
+        if os.path.join(racine, dossier) not in sys.path:
+            sys.path.append(os.path.join(racine, dossier))
+    return {moteur: importlib.import_module(f"{dossier}.simulation") for moteur, dossier in MOTEURS.items()}
+
+
+def _worker(connexion, mesurer_memoire):
+    """Boucle d'un processus du pool : exécute les tâches reçues et renvoie leurs mesures."""
+    simulations = _charger_moteurs()
+    with open(os.devnull, "w") as muet:
+        while True:
+            tache = connexion.recv()
+            if tache is None:
+                break
+            config, moteur, graine = tache
+            try:
+                # Les moteurs affichent leur progression : seule la mesure est gardée
+                with contextlib.redirect_stdout(muet):
+                    if mesurer_memoire:
+                        tracemalloc.start()
+                    try:
+                        debut = time.perf_counter()
+                        # Sans le cache disque des moteurs : la durée mesurée doit être celle du calcul
+                        resultat = simulations[moteur].executer(config, graine=graine, cache_resultats=False)
+                        duree = time.perf_counter() - debut
+                        memoire = tracemalloc.get_traced_memory()[1] if mesurer_memoire else None
+                    finally:
+                        tracemalloc.stop()
+                connexion.send(("ok", {
+                    "expression": repr(resultat["meilleur"]),
+                    "fitness": float(resultat["fitness"]),
+                    "generations": resultat.get("generations"),
+                    "duree": duree,
+                    "memoire_max": memoire,
+                }))
+            except Exception:
+                connexion.send(("erreur", traceback.format_exc()))
+    connexion.close()
+
+
+def _demarrer_worker(mesurer_memoire):
+    parent, enfant = multiprocessing.Pipe()
+    # Pas de daemon : une configuration peut lancer son propre pool de processus
+    processus = multiprocessing.Process(target=_worker, args=(enfant, mesurer_memoire))
+    processus.start()
+    enfant.close()
+    return parent, processus
+
+
+def executer_balayage(taches, base="balayage.sqlite", nb_workers=None, delai=None,
+                      relancer_echecs=False, mesurer_memoire=True, afficher=True):
+    """
+    Exécute les tâches d'un balayage sur un pool de processus et enregistre leurs résultats
+    au fil de l'eau. Un processus dont la tâche dépasse le délai est arrêté puis remplacé.
+    :param taches: Tuples (chemin de configuration, moteur, graine), voir creer_taches.
+    :param base: Chemin de la base SQLite des résultats.
+    :param nb_workers: Nombre maximal de tâches simultanées (par défaut, le nombre de processeurs).
+    :param delai: Durée maximale d'une tâche en secondes (None : illimitée).
+    :param relancer_echecs: Si True, les tâches en erreur ou arrêtées sont relancées ; sinon
+                            toute tâche présente dans la base est sautée.
+    :param mesurer_memoire: Si True, mesure le pic d'allocations de chaque tâche (tracemalloc, plus lent).
+    :param afficher: Si True, affiche l'avancement.
+    :return: Dictionnaire {statut: nombre de tâches} des tâches exécutées.
+    """
+    nb_workers = nb_workers or os.cpu_count() or 1
+    connexion = ouvrir_base(base)
+    bilan = {"ok": 0, "timeout": 0, "erreur": 0}
+    libres, en_cours = [], {}
+    try:
+        requete = "SELECT empreinte, moteur, graine FROM resultats" + (" WHERE statut = 'ok'" if relancer_echecs else "")
+        faits = set(connexion.execute(requete))
+        empreintes = {}
+        a_faire = []
+        for config, moteur, graine in taches:
+            if config not in empreintes:
+                empreintes[config] = empreinte_config(config)
+            # Deux configurations de même contenu ne forment qu'une tâche
+            if (empreintes[config], moteur, graine) not in faits:
+                faits.add((empreintes[config], moteur, graine))
+                a_faire.append((config, moteur, graine))
+        if afficher:
+            print(f"{len(a_faire)} tâches à exécuter ({len(taches) - len(a_faire)} déjà dans {base}).")
+
+        def enregistrer(tache, statut, mesures=None, erreur=None):
+            config, moteur, graine = tache
+            ligne = {"empreinte": empreintes[config], "moteur": moteur, "graine": graine, "config": config,
+                     "statut": statut, "erreur": erreur, "date": datetime.now().isoformat(timespec="seconds"),
+                     **(mesures or {})}
+            connexion.execute(f"INSERT OR REPLACE INTO resultats ({', '.join(COLONNES)}) "
+                              f"VALUES ({', '.join('?' * len(COLONNES))})", [ligne.get(nom) for nom in COLONNES])
+            connexion.commit()
+            bilan[statut] += 1
+            if afficher:
+                termine = sum(bilan.values())
+                print(f"[{termine}/{len(a_faire)}] {moteur} {config} graine={graine} : {statut}"
+                      + (f" (fitness {mesures['fitness']:.6g}, {mesures['duree']:.2f} s)" if mesures else ""))
+
+        file = list(reversed(a_faire))
+        libres = [_demarrer_worker(mesurer_memoire) for _ in range(min(nb_workers, len(a_faire)))]
+        while file or en_cours:
+            while file and libres:
+                connexion_worker, processus = libres.pop()
+                tache = file.pop()
+                connexion_worker.send(tache)
+                echeance = time.monotonic() + delai if delai is not None else None
+                en_cours[connexion_worker] = (processus, tache, echeance)
+
+            echeances = [echeance for _, _, echeance in en_cours.values() if echeance is not None]
+            attente = max(0.0, min(echeances) - time.monotonic()) if echeances else None
+            for connexion_worker in wait(list(en_cours), attente):
+                processus, tache, _ = en_cours.pop(connexion_worker)
+                try:
+                    statut, contenu = connexion_worker.recv()
+                except (EOFError, OSError):
+                    # Processus mort (mémoire épuisée, signal) : il est remplacé
+                    connexion_worker.close()
+                    processus.join()
+                    enregistrer(tache, "erreur", erreur=f"Processus terminé sans résultat (code {processus.exitcode}).")
+                    libres.append(_demarrer_worker(mesurer_memoire))
+                    continue
+                libres.append((connexion_worker, processus))
+                if statut == "ok":
+                    enregistrer(tache, "ok", contenu)
+                else:
+                    enregistrer(tache, "erreur", erreur=contenu)
+
+            maintenant = time.monotonic()
+            for connexion_worker, (processus, tache, echeance) in list(en_cours.items()):
+                if echeance is not None and maintenant >= echeance:
+                    processus.terminate()
+                    processus.join()
+                    connexion_worker.close()
+                    del en_cours[connexion_worker]
+                    enregistrer(tache, "timeout", erreur=f"Délai de {delai} s dépassé.")
+                    if file:
+                        libres.append(_demarrer_worker(mesurer_memoire))
+    finally:
+        for connexion_worker, processus in libres:
+            try:
+                connexion_worker.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for connexion_worker, (processus, _, _) in en_cours.items():
+            processus.terminate()
+        for connexion_worker, processus in libres + [(c, p) for c, (p, _, _) in en_cours.items()]:
+            processus.join()
+            connexion_worker.close()
+        connexion.close()
+    return bilan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m balayage",
+                                     description="Exécute un balayage de configurations sur un pool de processus.")
+    parser.add_argument("sources", nargs="+", help="Fichiers de configuration, dossiers ou grilles JSON.")
+    parser.add_argument("--moteurs", nargs="+", choices=sorted(MOTEURS), default=sorted(MOTEURS),
+                        help="Moteurs à utiliser.")
+    parser.add_argument("--repetitions", type=int, default=10, help="Nombre de graines (0 à N-1) par configuration.")
+    parser.add_argument("--graines", type=int, nargs="+", default=None, help="Graines explicites (remplace --repetitions).")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de tâches simultanées.")
+    parser.add_argument("--delai", type=float, default=None, help="Durée maximale d'une tâche (secondes).")
+    parser.add_argument("--base", default="balayage.sqlite", help="Base SQLite des résultats.")
+    parser.add_argument("--relancer-echecs", action="store_true", help="Relance les tâches en erreur ou arrêtées.")
+    parser.add_argument("--sans-memoire", action="store_true", help="Ne mesure pas le pic mémoire (plus rapide).")
+    args = parser.parse_args(argv)
+
+    graines = args.graines if args.graines is not None else range(args.repetitions)
+    taches = creer_taches(lister_configs(args.sources), args.moteurs, graines)
+    debut = time.perf_counter()
+    bilan = executer_balayage(taches, args.base, args.workers, args.delai, args.relancer_echecs,
+                              not args.sans_memoire)
+    print(f"Bilan : {bilan} en {time.perf_counter() - debut:.1f} s")
+    return bilan
+
+
+if __name__ == "__main__":
+    main()
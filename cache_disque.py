@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from functools import lru_cache
+import numpy as np
+
+"""Stockage disque commun aux deux moteurs : fichiers .npz et cache des résultats.
+
+Un run est entièrement déterminé par ses paramètres, sa graine et le code du
+moteur : chaque moteur calcule la clé de ses runs (cle_resultat pour le moteur
+récursif, result_key pour le moteur itératif) et range son résultat dans un
+fichier .npz par run (tableaux NumPy et métadonnées JSON, sans pickle). Le cache
+est borné en octets ; les entrées les moins récemment utilisées sont supprimées
+en premier. Les mêmes fichiers .npz servent aux points de reprise."""
+
+RACINE = os.path.dirname(os.path.abspath(__file__))
+# Modules de la racine utilisés par les moteurs : ils font partie du code de chacun
+MODULES_COMMUNS = ("cible.py", "cache_disque.py")
+
+
+def ecrire_npz(chemin, meta, **tableaux):
+    """
+    Écrit un fichier .npz (métadonnées JSON et tableaux NumPy) de façon atomique : un arrêt
+    brutal laisse l'ancien fichier ou le nouveau, jamais un fichier tronqué.
+    :param chemin: Chemin du fichier.
+    :param meta: Métadonnées sérialisables en JSON.
+    :param tableaux: Tableaux NumPy à enregistrer.
+    """
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    os.makedirs(dossier, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix=".tmp")
+    try:
+        with os.fdopen(descripteur, "wb") as fichier:
+            np.savez(fichier, meta=np.array(json.dumps(meta)), **tableaux)
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        os.replace(temporaire, chemin)
+    except BaseException:
+        os.remove(temporaire)
+        raise
+
+
+def lire_npz(chemin):
+    """
+    Relit un fichier écrit par ecrire_npz (sans pickle).
+    :param chemin: Chemin du fichier.
+    :return: Dictionnaire des tableaux, les métadonnées décodées sous "meta".
+    """
+    with np.load(chemin, allow_pickle=False) as fichier:
+        entree = {nom: fichier[nom] for nom in fichier.files}
+    entree["meta"] = json.loads(str(entree["meta"]))
+    return entree
+
+
+@lru_cache(maxsize=None)
+def version_code(dossier_moteur):
+    """
+    Empreinte des sources d'un moteur et des modules communs : toute modification du code
+    invalide les résultats en cache.
+    :param dossier_moteur: Dossier du moteur (ses fichiers .py sont parcourus récursivement).
+    """
+    empreinte = hashlib.sha256()
+    chemins = []
+    for dossier, sous_dossiers, fichiers in os.walk(dossier_moteur):
+        sous_dossiers[:] = sorted(d for d in sous_dossiers if d != "__pycache__")
+        chemins.extend(os.path.join(dossier, nom) for nom in sorted(fichiers) if nom.endswith(".py"))
+    chemins.extend(os.path.join(RACINE, nom) for nom in MODULES_COMMUNS)
+    for chemin in chemins:
+        empreinte.update(os.path.relpath(chemin, RACINE).replace(os.sep, "/").encode())
+        with open(chemin, "rb") as fichier:
+            empreinte.update(fichier.read())
+    return empreinte.hexdigest()
+
+
+class CacheResultats:
+    """Cache disque des résultats de simulation, borné en octets avec éviction LRU."""
+
+    def __init__(self, dossier, taille_max=256 * 2**20):
+        """
+        :param dossier: Dossier des entrées (créé au premier enregistrement).
+        :param taille_max: Taille totale maximale des entrées en octets.
+        """
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f"{cle}.npz")
+
+    def obtenir(self, cle):
+        """
+        Relit un résultat et le marque comme récemment utilisé.
+        :param cle: Clé du run (voir cle_resultat et result_key).
+        :return: Dictionnaire des tableaux enregistrés (métadonnées décodées sous "meta"),
+                 ou None si l'entrée est absente ou illisible.
+        """
+        chemin = self._chemin(cle)
+        try:
+            entree = lire_npz(chemin)
+            os.utime(chemin)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            self.echecs += 1
+            return None
+        self.succes += 1
+        return entree
+
+    def enregistrer(self, cle, meta, **tableaux):
+        """
+        Écrit un résultat (écriture atomique) puis évince les entrées les plus anciennes si besoin.
+        :param cle: Clé du run (voir cle_resultat et result_key).
+        :param meta: Métadonnées sérialisables en JSON.
+        :param tableaux: Tableaux NumPy à enregistrer.
+        """
+        ecrire_npz(self._chemin(cle), meta, **tableaux)
+        self._evincer()
+
+    def _evincer(self):
+        entrees = []
+        for nom in os.listdir(self.dossier):
+            if nom.endswith(".npz"):
+                try:
+                    etat = os.stat(os.path.join(self.dossier, nom))
+                except FileNotFoundError:
+                    continue
+                entrees.append((etat.st_mtime, etat.st_size, nom))
+        total = sum(taille for _, taille, _ in entrees)
+        for _, taille, nom in sorted(entrees):
+            if total <= self.taille_max:
+                break
+            try:
+                os.remove(os.path.join(self.dossier, nom))
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= taille
+
+    def statistiques(self):
+        """Renvoie les compteurs du cache sous forme de dictionnaire."""
+        total = self.succes + self.echecs
+        return {
+            "Succès": self.succes,
+            "Échecs": self.echecs,
+            "Évictions": self.evictions,
+            "Taux de succès": self.succes / total if total else 0.0,
+        }
@@ -0,0 +1,160 @@
+import ast
+import hashlib
+from functools import lru_cache
+import numpy as np
+
+"""Compilation de l'expression de la fonction cible, commune aux deux moteurs.
+
+L'expression (par exemple "np.cos(x+4)" ou "x**3+4") est analysée une seule fois :
+son arbre syntaxique est validé contre une liste blanche (nombres, variable x,
+opérateurs arithmétiques et fonctions mathématiques de NumPy ou math), puis
+compilée en une fonction vectorielle. Aucun autre code ne peut être exécuté et
+les valeurs du dernier jeu de points sont mémorisées. Les nombres littéraux sont
+évalués en np.float64 : une sous-expression constante comme 9**9**9**9 donne inf
+au lieu d'un calcul d'entiers Python en précision arbitraire."""
+
+# Fonctions autorisées, accessibles sous leur nom seul ou préfixées par np., numpy. ou math.
+FONCTIONS_AUTORISEES = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "arcsin": np.arcsin, "arccos": np.arccos, "arctan": np.arctan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "sqrt": np.sqrt, "abs": np.abs, "fabs": np.abs,
+    "floor": np.floor, "ceil": np.ceil, "power": np.power, "pow": np.power,
+}
+CONSTANTES_AUTORISEES = {"pi": np.pi, "e": np.e}
+MODULES_AUTORISES = ("np", "numpy", "math")
+OPERATEURS_AUTORISES = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv, ast.USub, ast.UAdd)
+
+
+class _Validation(ast.NodeTransformer):
+    """Vérifie chaque nœud et remplace np.f / math.f par le nom f."""
+
+    def __init__(self, variables):
+        self.variables = variables
+
+    def generic_visit(self, noeud):
+        if not isinstance(noeud, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Load) + OPERATEURS_AUTORISES):
+            raise ValueError(f"Élément non autorisé dans la fonction cible : {type(noeud).__name__}")
+        return super().generic_visit(noeud)
+
+    def visit_Constant(self, noeud):
+        if isinstance(noeud.value, bool) or not isinstance(noeud.value, (int, float)):
+            raise ValueError(f"Constante non autorisée dans la fonction cible : {noeud.value!r}")
+        try:
+            valeur = float(noeud.value)
+        except OverflowError:
+            valeur = float("inf")
+        # np.float64 ne peut pas figurer tel quel dans un ast.Constant : le littéral est converti à l'évaluation
+        return ast.copy_location(ast.Call(func=ast.Name(id="_flottant", ctx=ast.Load()),
+                                          args=[ast.Constant(valeur)], keywords=[]), noeud)
+
+    def visit_Name(self, noeud):
+        if noeud.id not in self.variables and noeud.id not in CONSTANTES_AUTORISEES:
+            raise ValueError(f"Nom inconnu dans la fonction cible : {noeud.id}")
+        return noeud
+
+    def visit_Attribute(self, noeud):
+        # Hors d'un appel, seules les constantes (np.pi, math.e) sont autorisées
+        if not (isinstance(noeud.value, ast.Name) and noeud.value.id in MODULES_AUTORISES
+                and noeud.attr in CONSTANTES_AUTORISEES):
+            raise ValueError(f"Attribut non autorisé dans la fonction cible : {ast.unparse(noeud)}")
+        return ast.copy_location(ast.Name(id=noeud.attr, ctx=ast.Load()), noeud)
+
+    def visit_Call(self, noeud):
+        fonction = noeud.func
+        if isinstance(fonction, ast.Name):
+            nom = fonction.id
+        elif (isinstance(fonction, ast.Attribute) and isinstance(fonction.value, ast.Name)
+              and fonction.value.id in MODULES_AUTORISES):
+            nom = fonction.attr
+        else:
+            nom = None
+        if nom not in FONCTIONS_AUTORISEES or noeud.keywords:
+            raise ValueError(f"Appel non autorisé dans la fonction cible : {ast.unparse(noeud)}")
+        noeud.func = ast.copy_location(ast.Name(id=nom, ctx=ast.Load()), fonction)
+        noeud.args = [self.visit(argument) for argument in noeud.args]
+        return noeud
+
+
+class CibleCompilee:
+    """Fonction cible compilée, vectorielle, dont les valeurs sur le dernier jeu de points sont mémorisées."""
+
+    def __init__(self, expression, variables=("x",)):
+        """
+        :param expression: Expression Python de la fonction cible.
+        :param variables: Noms des variables autorisées dans l'expression.
+        :raises ValueError: Si l'expression n'est pas valide ou utilise un élément non autorisé.
+        """
+        self.expression = expression
+        self.variables = tuple(variables)
+        try:
+            arbre = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Fonction cible invalide : {expression!r} ({e.msg})")
+        arbre = ast.fix_missing_locations(_Validation(self.variables).visit(arbre))
+        self._code = compile(arbre, "<fonction cible>", "eval")
+        self._globaux = {"__builtins__": {}, "_flottant": np.float64, **FONCTIONS_AUTORISEES, **CONSTANTES_AUTORISEES}
+        # (empreinte du jeu de points, valeurs) du dernier appel vectoriel, remplacé d'un bloc
+        self._dernier = (None, None)
+
+    def __reduce__(self):
+        # Recompilée à la désérialisation (processus de travail)
+        return CibleCompilee, (self.expression, self.variables)
+
+    def __call__(self, *args, **variables):
+        """
+        Évalue la cible en un point ou, avec des tableaux NumPy, sur tout un jeu de points.
+        Le dernier appel vectoriel est mémorisé : relancer la cible sur le même jeu de points
+        (autre île, autre run de la même expression) ne la réévalue pas.
+        """
+        variables.update(zip(self.variables, args))
+        if not any(isinstance(valeur, np.ndarray) for valeur in variables.values()):
+            # Scalaires NumPy : même sémantique qu'en vectoriel (nan plutôt qu'un complexe ou une exception)
+            with np.errstate(all="ignore"):
+                return eval(self._code, self._globaux, {nom: np.float64(valeur) for nom, valeur in variables.items()})
+        variables = {nom: np.asarray(valeur, dtype=np.float64) for nom, valeur in variables.items()}
+        cle = self._empreinte(variables)
+        derniere_cle, valeurs = self._dernier
+        if cle != derniere_cle:
+            with np.errstate(all="ignore"):
+                resultat = eval(self._code, self._globaux, variables)
+            forme = np.broadcast_shapes(*[np.shape(valeur) for valeur in variables.values()])
+            valeurs = np.broadcast_to(np.asarray(resultat, dtype=np.float64), forme).copy()
+            valeurs.flags.writeable = False
+            self._dernier = (cle, valeurs)
+        return valeurs
+
+    def _empreinte(self, variables):
+        # Empreinte de 128 bits des noms, formes et valeurs des variables (sans copier les tableaux)
+        calcul = hashlib.blake2b(digest_size=16)
+        for nom in self.variables:
+            valeur = np.ascontiguousarray(variables[nom])
+            calcul.update(repr((nom, valeur.shape)).encode())
+            calcul.update(valeur)
+        return calcul.digest()
+
+    def __repr__(self):
+        return f"CibleCompilee({self.expression!r})"
+
+
+@lru_cache(maxsize=32)
+def compiler_cible(expression, variables=("x",)):
+    """
+    Compile l'expression de la fonction cible (voir CibleCompilee). La cible compilée est
+    partagée par tous les appelants utilisant la même expression : des appels successifs
+    sur le même jeu de points ne la réévaluent pas.
+    :param expression: Expression Python, par exemple "x**3+4".
+    :param variables: Noms des variables autorisées (tuple).
+    :return: CibleCompilee.
+
+    Vérification de non-régression (python -m doctest cible.py) : une puissance d'entiers
+    littéraux suit la sémantique inf/nan des tableaux au lieu de bloquer le processus.
+
+    >>> compiler_cible("x+9**9**9**9")(np.arange(3.))
+    array([inf, inf, inf])
+    >>> float(compiler_cible("x+9**9**9**9")(1.0))
+    inf
+    """
+    return CibleCompilee(expression, variables)
@@ -0,0 +1,67 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+
+"""Lance une simulation en ligne de commande, sans interface graphique.
+
+Usage : python -m lancer_simulation {recursif,iteratif} config_simulation.txt [--graine N] [--sans-cache]
+        [--reprise FICHIER [--intervalle-reprise N] [--delai-reprise SECONDES]] [--graphique]
+
+Ni PyQt5 ni matplotlib ne sont importés, sauf avec --graphique."""
+
+# Dossier de chaque moteur ; leurs modules s'importent à plat depuis ce dossier
+MOTEURS = {"recursif": "recursive_genetic", "iteratif": "not_recursive_genetic"}
+
+
+def charger_moteur(moteur):
+    """
+    Rend importables les modules d'un moteur et renvoie son module simulation.
+    :param moteur: "recursif" ou "iteratif".
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), MOTEURS[moteur]))
+    return importlib.import_module("simulation")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lancer_simulation", description="Lance une simulation sans interface graphique.")
+    parser.add_argument("moteur", choices=sorted(MOTEURS), help="Moteur à utiliser.")
+    parser.add_argument("config", help="Fichier de configuration de la simulation.")
+    parser.add_argument("--graine", type=int, default=None,
+                        help="Graine du run (reproductible ; son résultat est mis en cache sur disque).")
+    parser.add_argument("--sans-cache", action="store_true", help="Recalcule le run même s'il est en cache.")
+    parser.add_argument("--reprise", default=None,
+                        help="Point de reprise : sauvegardé périodiquement, repris s'il existe déjà.")
+    parser.add_argument("--intervalle-reprise", type=int, default=10, help="Générations entre deux sauvegardes.")
+    parser.add_argument("--delai-reprise", type=float, default=None, help="Secondes entre deux sauvegardes.")
+    parser.add_argument("--graphique", action="store_true",
+                        help="Affiche la fonction trouvée et la fonction cible (importe matplotlib).")
+    args = parser.parse_args(argv)
+
+    simulation = charger_moteur(args.moteur)
+    debut = time.perf_counter()
+    resultat = simulation.executer(args.config, graine=args.graine, cache_resultats=False if args.sans_cache else None,
+                                   reprise=args.reprise, intervalle_reprise=args.intervalle_reprise,
+                                   delai_reprise=args.delai_reprise)
+    duree = time.perf_counter() - debut
+
+    print("=== Résultat Final ===")
+    print(f"Meilleur individu : {resultat['meilleur']}")
+    print(f"Fitness : {resultat['fitness']}")
+    print(f"Cache fitness : {resultat['cache']}")
+    if resultat["historique"]:
+        # Part des points sur laquelle la dernière génération a été évaluée (1.0 : tous les points)
+        print(f"Fidélité : {resultat['historique'][-1][4]}")
+    print(f"Durée : {duree:.3f} s")
+
+    if args.graphique:
+        from graphique import afficher_graphique
+        parametres = resultat["parametres"]
+        afficher_graphique(resultat["meilleur"], resultat["fonction_cible"],
+                           parametres["intervalle_min"], parametres["intervalle_max"])
+    return resultat
+
+
+if __name__ == "__main__":
+    main()
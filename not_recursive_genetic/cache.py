@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+"""cache.py
+
+This module provides a bounded LRU cache of fitness values keyed by the structural
+hash of a tree and the fingerprint of the dataset it was evaluated on."""
+
+
+class FitnessCache(object):
+    """Represents a per-run fitness cache with LRU eviction.
+
+    Attributes:
+        max_size (int): The maximum number of entries (0 disables the cache).
+        hits (int): The number of successful lookups.
+        misses (int): The number of failed lookups.
+        evictions (int): The number of evicted entries."""
+
+    def __init__(self, max_size=100000):
+        """Initializes an empty cache.
+
+        Parameters:
+            max_size (int): The maximum number of entries. Defaults to 100000."""
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Looks a fitness up and marks it as recently used.
+
+        Parameters:
+            key (tuple): The (tree hash, dataset fingerprint) key.
+
+        Returns:
+            float: The cached fitness, or None if absent."""
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return fitness
+
+    def put(self, key, fitness):
+        """Stores a fitness, evicting the least recently used entries if needed.
+
+        Parameters:
+            key (tuple): The (tree hash, dataset fingerprint) key.
+            fitness (float): The fitness to store."""
+        if self.max_size <= 0:
+            return
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: Hits, misses, evictions, hit rate and current size."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0, "size": len(self.entries)}
@@ -0,0 +1,176 @@
+import os
+import time
+import numpy as np
+from popavecclasses import Tree
+from popmatrix import encode_node, decode_nodes
+from cache_disque import ecrire_npz, lire_npz
+
+"""checkpoint.py
+
+This module saves and restores the state of a running `genetic_algorithm`. Every
+`every` generations or `interval` seconds, the population (heap arrays of opcodes
+and constants, no pickle), the fitness of the trees, the current sample, the best
+rescored elite, the history, the states of the run generators and the generation
+counter are written to a .npz file. A run restarted with the same checkpoint
+resumes from the last save and ends exactly like an uninterrupted run."""
+
+FORMAT = 2
+
+
+def encode_trees(trees):
+    """Encodes trees into flat arrays. Unlike `serialization`, the whole heap arrays
+    are kept: the slots unreachable from the root are still drawn as crossover and
+    mutation points, so dropping them would change the resumed run.
+
+    Parameters:
+        trees (list): The trees to encode.
+
+    Returns:
+        dict: The concatenated opcodes and constants, and the length, depth, fitness
+            and fidelity (NaN when unknown) of every tree."""
+    codes = [encode_node(node) for tree in trees for node in tree.content]
+    return {
+        "opcodes": np.array([code for code, _ in codes], dtype=np.int8),
+        "constants": np.array([constant for _, constant in codes], dtype=np.float64),
+        "lengths": np.array([len(tree.content) for tree in trees], dtype=np.int32),
+        "depths": np.array([tree.depth for tree in trees], dtype=np.int32),
+        "fitness": np.array([tree.fitness for tree in trees], dtype=np.float64),
+        "fidelity": np.array([np.nan if tree.fidelity is None else tree.fidelity for tree in trees], dtype=np.float64),
+    }
+
+
+def decode_trees(arrays, context):
+    """Rebuilds the trees encoded by `encode_trees`.
+
+    Parameters:
+        arrays (dict): The arrays returned by `encode_trees`.
+        context (RunContext): The run of the trees.
+
+    Returns:
+        list: The decoded trees."""
+    trees = []
+    ends = np.cumsum(arrays["lengths"])
+    for i, (start, end) in enumerate(zip((ends - arrays["lengths"]).tolist(), ends.tolist())):
+        tree = Tree(f"Tree number {i+1}", context)
+        tree.set_content(decode_nodes(arrays["opcodes"][start:end], arrays["constants"][start:end], context))
+        tree.depth = int(arrays["depths"][i])
+        tree.fitness = float(arrays["fitness"][i])
+        fidelity = float(arrays["fidelity"][i])
+        tree.fidelity = None if np.isnan(fidelity) else fidelity
+        tree.gen = 1
+        trees.append(tree)
+    return trees
+
+
+class Checkpoint(object):
+    """Represents the periodic save of a run and its restoration.
+
+    Attributes:
+        path (str): The checkpoint file, replaced at every save.
+        every (int): The number of generations between two saves (None: no generation criterion).
+        interval (float): The number of seconds between two saves (None: no time criterion).
+        signature (str): The identifier of the run (e.g. `result_key`); a checkpoint
+            written with another signature is refused."""
+
+    def __init__(self, path, every=10, interval=None, signature=None):
+        """Initializes the checkpoint.
+
+        Parameters:
+            path (str): The checkpoint file.
+            every (int): The number of generations between two saves. Defaults to 10.
+            interval (float): The number of seconds between two saves. Defaults to None.
+            signature (str): The identifier of the run. Defaults to None (not checked)."""
+        self.path = path
+        self.every = every
+        self.interval = interval
+        self.signature = signature
+        self._last = None
+
+    def exists(self):
+        """Tells whether a checkpoint has already been written."""
+        return os.path.exists(self.path)
+
+    def due(self, generation):
+        """Tells whether the state must be saved before a generation. The first generation
+        of a run (or of a resumed run) never is: its state is already known.
+
+        Parameters:
+            generation (int): The generation about to start.
+
+        Returns:
+            bool: True if a save is due."""
+        if self._last is None:
+            self._last = (generation, time.monotonic())
+            return False
+        last_generation, last_time = self._last
+        return ((self.every is not None and generation - last_generation >= self.every)
+                or (self.interval is not None and time.monotonic() - last_time >= self.interval))
+
+    def save(self, population, generation, indices, best, history):
+        """Writes the state of a run before a generation.
+
+        Parameters:
+            population (Pop): The population about to be evaluated.
+            generation (int): The generation about to start.
+            indices (np.ndarray): The current sample (None for the full set).
+            best (tuple): The best (fitness, tree) rescored elite, or None.
+            history (list): The per-generation statistics, or None."""
+        context = population.context
+        version, state, gauss = context.random.getstate()
+        arrays = encode_trees(population.content + ([best[1]] if best is not None else []))
+        ecrire_npz(
+            self.path,
+            {
+                "format": FORMAT,
+                "signature": self.signature,
+                "generation": generation,
+                "size": len(population.content),
+                "pop_gen": population.gen,
+                "pop_depth": population.depth,
+                "operators": [op.symbol for op in context.operators],
+                "random": [version, list(state), gauss],
+                "rng": population.rng.bit_generator.state,
+                "sample": indices is not None,
+                "best": best[0] if best is not None else None,
+                "history": history is not None,
+            },
+            indices=indices if indices is not None else np.empty(0, dtype=np.int64),
+            history=np.array(history or [], dtype=np.float64).reshape(-1, 5),
+            **arrays,
+        )
+        self._last = (generation, time.monotonic())
+
+    def load(self, population):
+        """Puts a population (built with the same context) back in the saved state.
+
+        Parameters:
+            population (Pop): The population to restore.
+
+        Returns:
+            tuple: The generation to start, the current sample, the best rescored elite
+                and the history (None if it was not recorded).
+
+        Raises:
+            ValueError: If the checkpoint was written by another run."""
+        entry = lire_npz(self.path)
+        meta = entry["meta"]
+        context = population.context
+        if meta["format"] != FORMAT:
+            raise ValueError(f"Unsupported checkpoint format {meta['format']}.")
+        if self.signature is not None and meta["signature"] != self.signature:
+            raise ValueError(f"The checkpoint {self.path} belongs to another run (parameters, seed or code differ).")
+        if meta["operators"] != [op.symbol for op in context.operators]:
+            raise ValueError(f"The checkpoint {self.path} does not match the operator set of the run.")
+
+        trees = decode_trees(entry, context)
+        population.content = trees[:meta["size"]]
+        population.gen = meta["pop_gen"]
+        population.depth = meta["pop_depth"]
+        population.rng.bit_generator.state = meta["rng"]
+        version, state, gauss = meta["random"]
+        context.random.setstate((version, tuple(state), gauss))
+        indices = entry["indices"] if meta["sample"] else None
+        best = (meta["best"], trees[meta["size"]]) if meta["best"] is not None else None
+        history = [(int(row[0]),) + tuple(row[1:]) for row in entry["history"].tolist()] if meta["history"] else None
+        self._last = (meta["generation"], time.monotonic())
+        return meta["generation"], indices, best, history
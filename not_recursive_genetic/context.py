@@ -0,0 +1,86 @@
+import random
+from fonctions import fonction
+from constantes import MULTI_OPERATORS_INIT, SGL_OPERATORS_INIT, TERMINALS_INIT
+
+"""context.py
+
+This module defines `RunContext`, the parameters and operator sets of one run.
+The context is passed explicitly to `Pop`, `Tree`, `genetic_algorithm` and
+`genetic_darwin` and owns the generator of the tree operators, so several runs
+with different configurations can execute at the same time in one process
+(threads, a process pool worker) without sharing any mutable state."""
+
+
+class RunContext(object):
+    """Represents the configuration of one run.
+
+    Attributes:
+        multi_operators (list): The binary operators (`fonction` of type "multi").
+        sgl_operators (list): The unary operators (`fonction` of type "sgl").
+        terminals (list): The terminals (the variable x and the constant "cst").
+        target_function (str): The target expression, e.g. "np.cos(x+4)".
+        interval_min (float): The lower bound of the sampling interval.
+        interval_max (float): The upper bound of the sampling interval.
+        nb_points (int): The number of sampling points.
+        pop_size (int): The size of the population.
+        max_depth (int): The maximal depth of the trees.
+        crossover_rate (float): The crossover probability.
+        mutation_rate (float): The mutation probability.
+        mutation_point_rate (float): The point mutation probability.
+        max_generations (int): The maximal number of generations.
+        target_fitness (float): The fitness stopping the run.
+        tournament_size (int): The number of trees of a tournament.
+        elitism (int): The number of elites kept at each generation.
+        ratio_full_trees (float): The ratio of full trees in a new population.
+        seed_range (int): The range of the seeds drawn for the runs.
+        crossover_leaves_rate (float): The probability of a leaves crossover (darwin).
+        darwin_factor (float): The fraction of survivors (darwin).
+        random (random.Random): The generator of the tree operators (generation,
+            crossover, mutation) and of the genetic loops."""
+
+    def __init__(self, multi_operators=None, sgl_operators=None, terminals=None, target_function="x",
+                 interval_min=-1.0, interval_max=1.0, nb_points=100, pop_size=100, max_depth=4,
+                 crossover_rate=0.8, mutation_rate=0.1, mutation_point_rate=0.05, max_generations=100,
+                 target_fitness=1e-6, tournament_size=10, elitism=50, ratio_full_trees=0.5, seed_range=9999,
+                 crossover_leaves_rate=0.10, darwin_factor=0.5, seed=None):
+        """Initializes a run context.
+
+        Parameters:
+            multi_operators (list): The binary operators. Defaults to every binary operator.
+            sgl_operators (list): The unary operators. Defaults to every unary operator.
+            terminals (list): The terminals. Defaults to x and "cst".
+            seed (int): The seed of the run generator. Defaults to None (fresh entropy).
+
+        The other parameters are stored as the attributes of the same name."""
+        if multi_operators is None:
+            multi_operators = [fonction(kernel, symbol, "multi") for symbol, kernel in MULTI_OPERATORS_INIT.items()]
+        if sgl_operators is None:
+            sgl_operators = [fonction(kernel, symbol, "sgl") for symbol, kernel in SGL_OPERATORS_INIT.items()]
+        if terminals is None:
+            terminals = [fonction(name, symbol, "terminals") for symbol, name in TERMINALS_INIT.items()]
+        self.multi_operators = list(multi_operators)
+        self.sgl_operators = list(sgl_operators)
+        self.terminals = list(terminals)
+        self.target_function = target_function
+        self.interval_min = interval_min
+        self.interval_max = interval_max
+        self.nb_points = nb_points
+        self.pop_size = pop_size
+        self.max_depth = max_depth
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.mutation_point_rate = mutation_point_rate
+        self.max_generations = max_generations
+        self.target_fitness = target_fitness
+        self.tournament_size = tournament_size
+        self.elitism = elitism
+        self.ratio_full_trees = ratio_full_trees
+        self.seed_range = seed_range
+        self.crossover_leaves_rate = crossover_leaves_rate
+        self.darwin_factor = darwin_factor
+        self.random = random.Random(seed)
+
+    @property
+    def operators(self):
+        """list: The binary then unary operators, the internal nodes of a tree."""
+        return self.multi_operators + self.sgl_operators
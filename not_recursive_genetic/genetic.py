@@ -1,67 +1,178 @@
-from constantes import *
 import operator
-import random
 import numpy as np
 from popavecclasses import Pop, Tree
-import matplotlib.pyplot as plt
+from cache import FitnessCache
+from selection import elite_indices
+from parallel import ParallelEvaluator
+from cible import compiler_cible
 
-def genetic_algorithm(pop_size, nb_gen, mutation_rate, crossover_rate, tournament_size, elitism, intervalle_min, intervalle_max, nombre_points, fonction_cible):
+def sample_indices(rng, nb_points, stage, sample_size, sample_mode="random"):
+    """Returns the points scoring one stage of a subsampled run.
+
+    Parameters:
+        rng (np.random.Generator): The generator of the population.
+        nb_points (int): The size of the full point set.
+        stage (int): The number of the sample (generation // sample_period).
+        sample_size (int): The size of the (first) sample.
+        sample_mode (str): "random" draws a new random subsample at every stage,
+            "progressive" takes evenly spaced points and doubles their number at
+            every stage (coarse to fine). Defaults to "random".
+
+    Returns:
+        np.ndarray: The sorted indices of the sample, or None for the full set."""
+    if sample_mode == "progressive":
+        size = sample_size * 2**stage
+        if size >= nb_points:
+            return None
+        return np.unique(np.linspace(0, nb_points-1, size).round().astype(np.int64))
+    if sample_mode != "random":
+        raise ValueError(f"Unknown sample mode {sample_mode!r}.")
+    if sample_size >= nb_points:
+        return None
+    return np.sort(rng.choice(nb_points, sample_size, replace=False))
+
+
+def _rescore(trees, y, cache, evaluator, best):
+    """Scores trees on the full point set and returns the best (fitness, tree) seen so far."""
+    elites = Pop("elites", trees[0].context)
+    elites.content = trees
+    elites.evaluate(y, cache, evaluator)
+    j = int(np.argmin(elites.fitness))
+    if best is None or elites.fitness[j] < best[0]:
+        best = (float(elites.fitness[j]), trees[j])
+    return best
+
+
+def _best(population, best):
+    """Returns the best tree of a population scored on the full set, or the best elite if better."""
+    tree = population.content[int(np.argmin(population.fitness))]
+    if best is not None and best[0] < tree.fitness:
+        tree = best[1]
+        tree.fitness, tree.fidelity = best[0], 1.0
+    return tree
+
+
+def genetic_algorithm(context, pop_size, nb_gen, mutation_rate, crossover_rate, tournament_size, elitism, intervalle_min, intervalle_max, nombre_points, fonction_cible, cache=None, seed=None, workers=0, sample_size=None, sample_mode="random", sample_period=1, history=None, checkpoint=None):
+    #Cache des fitness du run (les élites ne sont pas réévaluées)
+    if cache is None:
+        cache = FitnessCache()
     #Initialisation de la population
     a = np.linspace(intervalle_min, intervalle_max, nombre_points)
-    y = [(x, eval(fonction_cible)) for x in a]
-    population = Pop("population")
-    population.generate(pop_size, PROFONDEUR_MAX.c, RATIO_FULL_TREES.c)
+    #Cible validée et compilée une fois, évaluée en une passe sur tous les points
+    y = list(zip(a, compiler_cible(fonction_cible)(a)))
+    population = Pop("population", context, seed)
+    #Sous-échantillonnage optionnel : les élites sont réévaluées sur tous les points
+    indices, best, start = None, None, 0
+    #Reprise optionnelle : l'état sauvegardé remplace la population initiale
+    if checkpoint is not None and checkpoint.exists():
+        start, indices, best, saved_history = checkpoint.load(population)
+        if history is not None and saved_history is not None:
+            history[:] = saved_history
+    else:
+        population.generate(pop_size, context.max_depth, context.ratio_full_trees)
+    #Tirages propres au run (aucun état global partagé entre runs concurrents)
+    random = context.random
+    #Pool de processus optionnel, les points restent résidents dans chaque processus
+    evaluator = ParallelEvaluator(workers, a, [point[1] for point in y]) if workers > 0 else None
     
-    #Boucle principale
-    for i in range(nb_gen):
+    try:
+        #Boucle principale
+        for i in range(start, nb_gen):
+            #Sauvegarde périodique de l'état avant la génération
+            if checkpoint is not None and checkpoint.due(i):
+                checkpoint.save(population, i, indices, best, history)
+            if sample_size and i % sample_period == 0:
+                indices = sample_indices(population.rng, len(a), i // sample_period, sample_size, sample_mode)
+            #Evaluation de la population
+            population.evaluate(y, cache, evaluator, indices)
+            #Historique optionnel : (génération, fitness minimale, moyenne, maximale, fidélité)
+            #les fitness sont calculées sur l'échantillon, la fidélité en donne la part des points
+            if history is not None:
+                history.append((i, float(np.min(population.fitness)), float(np.mean(population.fitness)), float(np.max(population.fitness)), population.fidelity))
+            
+            new_pop_content = []
+            parents = []
+
+            while len(new_pop_content) < pop_size - elitism:
+                #Sélection des parents (tous les tournois de la génération en un tirage)
+                if not parents:
+                    parents = population.select(2*(pop_size - elitism - len(new_pop_content)), tournament_size)
+                parent1 = parents.pop()
+                parent2 = parents.pop()
+                #Croisement
+                children = parent1.crossover_func(parent2)
+                if children == None:
+                    continue
+                if random.random() < mutation_rate:
+                    children.mutation()
+                #Ajout des enfants à la nouvelle population
+                new_pop_content.append(children)
+            #Elitisme
+            elites = [population.content[j] for j in elite_indices(population.fitness, elitism)]
+            if indices is not None and elites:
+                best = _rescore(elites, y, cache, evaluator, best)
+            new_pop_content += elites
+
+
+            #Mise à jour de la population
+            population.content = new_pop_content
+            #Affichage de la meilleure fitness
+            
+            #Mise à jour de la génération
+            population.gen += 1
+            
         #Evaluation de la population
-        population.evaluate(y)
-        
-        new_pop_content = []
-
-        while len(new_pop_content) < pop_size - elitism:
-            #Sélection des parents
-            parent1 = population.tournament_selection(tournament_size)
-            parent2 = population.tournament_selection(tournament_size)
-            #Croisement
-            children = parent1.crossover_func(parent2)
-            if children == None:
-                continue
-            if random.random() < mutation_rate:
-                children.mutation()
-            #Ajout des enfants à la nouvelle population
-            new_pop_content.append(children)
-        #Elitisme
-        new_pop_content += sorted(population.content, key=(lambda x :x.fitness))[:elitism]
-
-
-        #Mise à jour de la population
-        population.content = new_pop_content
-        #Affichage de la meilleure fitness
-        
-        #Mise à jour de la génération
-        population.gen += 1
-        
-    #Evaluation de la population
-    population.evaluate(y)
+        population.evaluate(y, cache, evaluator)
+    finally:
+        if evaluator is not None:
+            evaluator.shutdown()
     
     #Retourne le meilleur individu
-    return sorted(population.content, key=(lambda x : x.fitness))[0]
+    return _best(population, best)
 
 
-def genetic_darwin (pop_size, nb_gen, mutation_rate, crossover_rate, crossover_leaves_rate, intervalle_min, intervalle_max, nombre_points, fonction_cible, darwin_factor):
+def genetic_darwin (context, pop_size, nb_gen, mutation_rate, crossover_rate, crossover_leaves_rate, intervalle_min, intervalle_max, nombre_points, fonction_cible, darwin_factor, cache=None, seed=None, workers=0, sample_size=None, sample_mode="random", sample_period=1, race_blocks=0):
+    if cache is None:
+        cache = FitnessCache()
     a = np.linspace(intervalle_min, intervalle_max, nombre_points)
-    y = [(x, eval(fonction_cible)) for x in a]
-    population = Pop("population")
-    population.generate(pop_size, PROFONDEUR_MAX.c, RATIO_FULL_TREES.c)
+    y = list(zip(a, compiler_cible(fonction_cible)(a)))
+    population = Pop("population", context, seed)
+    population.generate(pop_size, context.max_depth, context.ratio_full_trees)
     darwin_number = int(pop_size*darwin_factor)
+    evaluator = ParallelEvaluator(workers, a, [point[1] for point in y]) if workers > 0 else None
+    sampling = (sample_size, sample_mode, sample_period)
+    try:
+        best = _darwin_generations(population, y, cache, evaluator, pop_size, nb_gen, mutation_rate, crossover_rate, crossover_leaves_rate, darwin_number, sampling, race_blocks)
+    finally:
+        if evaluator is not None:
+            evaluator.shutdown()
+    return _best(population, best)
+
+
+def _darwin_generations(population, y, cache, evaluator, pop_size, nb_gen, mutation_rate, crossover_rate, crossover_leaves_rate, darwin_number, sampling=(None, "random", 1), race_blocks=0):
+    sample_size, sample_mode, sample_period = sampling
+    random = population.context.random
+    indices, best = None, None
     for i in range(nb_gen):
-        population.evaluate(y)
-        new_pop_content = sorted(population.content, key=(lambda x :x.fitness))[:darwin_number]
+        if sample_size and i % sample_period == 0:
+            indices = sample_indices(population.rng, len(y), i // sample_period, sample_size, sample_mode)
+        threshold = None
+        if race_blocks > 0 and i > 0 and darwin_number > 0:
+            #Les survivants (en tête de population) fixent le seuil : un descendant
+            #strictement moins bon que tous les survivants ne peut pas survivre
+            survivors = Pop("survivors", population.context)
+            survivors.content = population.content[:darwin_number]
+            survivors.evaluate(y, cache, evaluator, indices)
+            threshold = np.nextafter(survivors.fitness.max(), np.inf)
+        population.evaluate(y, cache, evaluator, indices, threshold, race_blocks)
+        new_pop_content = [population.content[j] for j in elite_indices(population.fitness, darwin_number)]
+        #Les survivants sont réévalués sur tous les points
+        if indices is not None and new_pop_content:
+            best = _rescore(new_pop_content, y, cache, evaluator, best)
         for j in range(pop_size-darwin_number):
             tirage = random.choices([1,2], weights=[mutation_rate, crossover_rate])[0]
             if tirage == 1 :
-                mutant = Tree("Mutant")
+                mutant = Tree("Mutant", population.context)
                 origin = random.choice(new_pop_content)
                 mutant.copy(origin)
                 mutant.mutation()
@@ -71,12 +182,12 @@ def genetic_darwin (pop_size, nb_gen, mutation_rate, crossover_rate, crossover_l
                 mother = random.choice(new_pop_content)
                 if random.random() > crossover_leaves_rate :
                     offspring = father.crossover_func(mother)
-                    offspring.fitness_calc(y)
                     new_pop_content.append(offspring)
                 else :
                     offspring = father.crossover_leaves(mother)
-                    offspring.fitness_calc(y)
                     new_pop_content.append(offspring)
         population.content = new_pop_content
         population.gen += 1
-    return sorted(population.content, key=(lambda x : x.fitness))[0]
\ No newline at end of file
+    #Les descendants sont évalués en un seul passage (et via le cache)
+    population.evaluate(y, cache, evaluator)
+    return best
\ No newline at end of file
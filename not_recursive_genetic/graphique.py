@@ -0,0 +1,44 @@
+import numpy as np
+
+"""graphique.py
+
+Plots of the results; matplotlib is only imported when a plot is drawn."""
+
+
+def afficher_graphique(meilleur_arbre_elit, fonction_cible, intervalle_min, intervalle_max, meilleur_arbre_darwin=None):
+    """
+    Affiche le graphique comparant la fonction cible et la fonction trouvée.
+    :param meilleur_arbre: L'arbre trouvé par l'algorithme génétique.
+    :param fonction_cible: La fonction cible à approximer.
+    :param intervalle_min: Borne inférieure de l'intervalle d'échantillonnage.
+    :param intervalle_max: Borne supérieure de l'intervalle d'échantillonnage.
+    """
+    import matplotlib.pyplot as plt
+
+    # Générer les valeurs pour le graphique
+    x_vals = np.linspace(intervalle_min, intervalle_max, 500)
+    y_cible = [fonction_cible(x) for x in x_vals]
+
+    def evaluer_fonction_trouvee(arbre, x_vals):
+        # Une passe vectorielle ; les points invalides (NaN, inf) ne sont pas tracés
+        with np.errstate(all="ignore"):
+            return np.broadcast_to(arbre.evaluate({"x": x_vals}), x_vals.shape)
+
+    y_trouvee_elit = evaluer_fonction_trouvee(meilleur_arbre_elit, x_vals)
+    if meilleur_arbre_darwin != None :
+        y_trouvee_darwin = evaluer_fonction_trouvee(meilleur_arbre_darwin, x_vals)
+
+    # Tracer les graphiques
+    plt.figure(figsize=(10, 6))
+    plt.plot(x_vals, y_cible, label="Fonction cible", color="blue", linewidth=2)
+    plt.plot(x_vals, y_trouvee_elit, label="Fonction trouvée elitisme", color="red", linestyle="--", linewidth=2)
+    if meilleur_arbre_darwin != None :
+        plt.plot(x_vals, y_trouvee_darwin, label="Fonction trouvée darwin", color="red", linestyle="--", linewidth=2)
+    plt.xlabel("x", fontsize=14)
+    plt.ylabel("f(x)", fontsize=14)
+    plt.title("Comparaison entre la fonction cible et la fonction trouvée", fontsize=16)
+    plt.axhline(0, color="black", linewidth=0.5, linestyle="--")
+    plt.axvline(0, color="black", linewidth=0.5, linestyle="--")
+    plt.legend(fontsize=12)
+    plt.grid(alpha=0.3)
+    plt.show()
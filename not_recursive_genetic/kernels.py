@@ -0,0 +1,122 @@
+import numpy as np
+
+"""kernels.py
+
+This module is the library of array-safe operator kernels shared by the scalar
+`Tree.evaluate` path and the `PopMatrix` engine. No kernel raises: a division by
+zero gives 1, a negative base with a non integer exponent (or 0 with a negative
+exponent) gives 1, and the other domain errors or overflows (log of a negative
+number, exp overflow) give NaN or inf. Such non-finite values form the invalid mask
+of an individual, turned into a penalty by `mean_squared_error` in one reduction.
+Kernels are meant to be called under `np.errstate(all="ignore")`."""
+
+
+def div_kernel(a, b):
+    """Protected division: a/b, or 1 where b is 0."""
+    return np.where(b != 0, a / np.where(b != 0, b, 1), 1.0)
+
+def pow_kernel(a, b):
+    """Protected power: a**b, or 1 for negative bases with a non integer exponent and
+    for 0 raised to a negative (or NaN) power."""
+    invalid = ((a < 0) & (np.floor(b) != b)) | ~((b >= 0) | (a != 0))
+    return np.where(invalid, 1.0, np.power(np.where(invalid, 1.0, a), b))
+
+
+def invalid_mask(values):
+    """Returns the mask of the non-finite (NaN or infinite) values.
+
+    Parameters:
+        values (np.ndarray): Outputs or errors.
+
+    Returns:
+        np.ndarray: True where the value is invalid."""
+    return ~np.isfinite(values)
+
+
+def mean_squared_error(values, y, penalty=np.inf):
+    """Computes the mean squared error in one reduction; an individual with any
+    non-finite error (invalid output or target, overflow) gets the penalty.
+
+    Parameters:
+        values (np.ndarray): Outputs, shaped [points] or [individuals, points].
+        y (np.ndarray): The target values [points].
+        penalty (float): The fitness of invalid individuals. Defaults to inf.
+
+    Returns:
+        float or np.ndarray: The fitness, or the fitness vector of the individuals."""
+    y = np.asarray(y, dtype=float)
+    values = np.asarray(values, dtype=float)
+    with np.errstate(all="ignore"):
+        errors = np.square(np.broadcast_to(values, np.broadcast_shapes(values.shape, y.shape)) - y)
+    fitness = np.where(invalid_mask(errors).any(axis=-1), penalty, errors.mean(axis=-1))
+    return float(fitness) if np.ndim(fitness) == 0 else fitness
+
+
+def race_stages(n, blocks):
+    """Splits n points into the stages of a racing evaluation.
+
+    The points are cut into `blocks` interleaved blocks (points k, k+blocks, ...), so
+    that each block spans the whole interval; the first stage holds one block and
+    every following stage as many blocks as all the previous ones together.
+
+    Parameters:
+        n (int): The number of points.
+        blocks (int): The number of blocks.
+
+    Returns:
+        list: The index arrays of the stages."""
+    blocks = max(1, min(blocks, n))
+    order = np.concatenate([np.arange(k, n, blocks) for k in range(blocks)])
+    ends = np.cumsum([len(range(k, n, blocks)) for k in range(blocks)])
+    stops = sorted({min(2**j, blocks) for j in range(blocks.bit_length()+1)})
+    bounds = [0] + [int(ends[stop-1]) for stop in stops]
+    return [order[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def race_mean_squared_error(evaluate_block, y, count, threshold, blocks=16, penalty=np.inf):
+    """Computes the mean squared error of `count` individuals stage by stage (see
+    `race_stages`), dropping an individual as soon as its partial sum proves that its
+    fitness cannot go below the threshold (racing).
+
+    An individual evaluated to the end gets exactly the `mean_squared_error` fitness.
+
+    Parameters:
+        evaluate_block (callable): Called with (rows, points), returns the outputs of the
+            selected individuals on the selected points, shaped [rows, points].
+        y (np.ndarray): The target values [points].
+        count (int): The number of individuals.
+        threshold (float): The fitness to beat.
+        blocks (int): The number of blocks of points. Defaults to 16.
+        penalty (float): The fitness of invalid individuals. Defaults to inf.
+
+    Returns:
+        tuple: The fitness vector (a lower bound for the dropped individuals) and the
+            boolean vector of the dropped individuals."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    stages = race_stages(n, blocks)
+    values = np.empty((count, n))
+    sums = np.zeros(count)
+    fitness = np.full(count, penalty, dtype=float)
+    aborted = np.zeros(count, dtype=bool)
+    active = np.arange(count)
+    for k, points in enumerate(stages):
+        if not len(active):
+            break
+        target = y[points]
+        outputs = np.broadcast_to(np.asarray(evaluate_block(active, points), dtype=float), (len(active), len(target)))
+        with np.errstate(all="ignore"):
+            errors = np.square(outputs - target)
+        # Invalid individuals keep the penalty, which is their exact fitness
+        valid = ~invalid_mask(errors).any(axis=1)
+        active, outputs, errors = active[valid], outputs[valid], errors[valid]
+        values[active[:, None], points] = outputs
+        sums[active] += errors.sum(axis=1)
+        if k < len(stages)-1:
+            stop = sums[active]/n >= threshold
+            fitness[active[stop]] = sums[active[stop]]/n
+            aborted[active[stop]] = True
+            active = active[~stop]
+    if len(active):
+        fitness[active] = mean_squared_error(values[active], y, penalty)
+    return fitness, aborted
@@ -1,89 +1,34 @@
 import sys
-#import os
-import numpy as np
+import os
+# Les modules communs aux deux moteurs (cible.py, ...) sont à la racine du dépôt
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PyQt5.QtWidgets import QMainWindow
 from interface import Ui_MainWindow  # Généré à partir du fichier .ui
 from PyQt5.QtWidgets import QApplication
-import matplotlib.pyplot as plt
-from genetic import genetic_algorithm, genetic_darwin
-from fonctions import *
-import operator
-from fonctions_spec import *
-from constantes import *
+from simulation import executer
+from graphique import afficher_graphique
 
 def main(config_file):
     """
     Fonction principale pour exécuter une simulation à partir d'un fichier de configuration.
     :param config_file: Chemin du fichier contenant les paramètres de la simulation.
     """
-
-    MULTI_OPERATORS_INIT.c = {"+":(operator.add), "-":(operator.sub), "*":(operator.mul), "/":(div_with0), "^":(pow_with0), }
-    SGL_OPERATORS_INIT.c = {"cos":(np.cos), "sin":(np.sin), "log" : (np.log), "exp" : (np.exp), "log": (np.log), "abs": (np.abs)}
-    TERMINALS_INIT.c = {"x": ("x"), "cst":("cst")}
-
-    TERMINALS_LIST.c = []
-    SGL_OPERATORS_LIST.c = []
-    MULTI_OPERATORS_LIST.c = []
-
-    with open (config_file) as config:
-        mylist = list(config)
-        D = {}
-        for i in range (0,12):
-            L = mylist[i].split()
-            D [L[0]] = L[2]
-        
-        for i in range (12,16):
-            ligne = mylist[i].split()
-
-            if ligne[2] == 'True':
-                MULTI_OPERATORS_LIST.c.append(fonction(MULTI_OPERATORS_INIT.c[ligne[0]], ligne[0], "multi"))
-        
-        for j in range (16,21):
-            ligne = mylist[j].split()
-
-            if ligne[2]=='True':
-                SGL_OPERATORS_LIST.c.append(fonction(SGL_OPERATORS_INIT.c[ligne[0]], ligne[0], "sgl"))
-
-
-    TERMINALS_LIST.c = [fonction("x", "x" , "terminals"), fonction("cst","cst", "terminals")]    
-
-    PROBA_MUTATION.c = float(D['proba_mutation'])
-    PROBA_MUTATION_POINT.c = float(D['proba_mutation_point'])
-    GENERATION_MAX.c = int(D['generations_max'])
-    FITNESS_CIBLE.c = float(D['fitness_cible'])
-    PROBA_CROSSOVER.c = float(D['proba_crossover'])
-    PROFONDEUR_MAX.c = int(D['profondeur_max'])
-    TAILLE_POPULATION.c = int(D['taille_population'])
-    NOMBRE_POINTS.c = int(D['nombre_points'])
-    INTERVALLE_MAX.c = float(D['intervalle_max'])
-    INTERVALLE_MIN.c = float(D['intervalle_min'])
-    FONCTION_CIBLE.c = D['fonction_cible']
-    TOURNAMENT_SIZE.c = 10
-    ELITISM.c = 50
-    RATIO_FULL_TREES.c = 0.5
-    SEED_RANGE.c = 9999
-    PROBA_CROSSOVER_LEAVES.c = 0.10
-    DARWIN_FACTOR.c = 0.5
-    
-    def fonction_cible(x):
-        return eval(FONCTION_CIBLE.c)
-    
-    points = np.linspace(INTERVALLE_MIN.c, INTERVALLE_MAX.c, NOMBRE_POINTS.c)
-    
-    # Lancer l'évolution
-    meilleur_arbre_elit = genetic_algorithm(TAILLE_POPULATION.c, GENERATION_MAX.c, PROBA_MUTATION.c, PROBA_CROSSOVER.c, TOURNAMENT_SIZE.c, ELITISM.c, INTERVALLE_MIN.c, INTERVALLE_MAX.c, NOMBRE_POINTS.c, FONCTION_CIBLE.c)
-    #meilleur_arbre_darwin = genetic_darwin(TAILLE_POPULATION.c, GENERATION_MAX.c, PROBA_MUTATION.c, PROBA_CROSSOVER.c, PROBA_CROSSOVER_LEAVES.c, INTERVALLE_MIN.c, INTERVALLE_MAX.c, NOMBRE_POINTS.c, FONCTION_CIBLE.c, DARWIN_FACTOR.c)
+    # Lire les paramètres et lancer l'évolution (voir simulation.py)
+    resultat = executer(config_file)
+    meilleur_arbre_elit = resultat["meilleur"]
 
     # Afficher les résultats
     print("=== Résultat Final ===")
     print(f"Meilleur individu elitisme : {meilleur_arbre_elit}")
-    print(f"Fitness : {meilleur_arbre_elit.fitness}")
-    #print(f"Meilleur individu darwin : {meilleur_arbre_darwin}")
-    #print(f"Fitness : {meilleur_arbre_darwin.fitness}")
+    print(f"Fitness : {resultat['fitness']}")
+    print(f"Cache fitness : {resultat['cache']}")
+    if resultat["historique"]:
+        # Part des points sur laquelle la dernière génération a été évaluée (1.0 : tous les points)
+        print(f"Fidélité : {resultat['historique'][-1][4]}")
 
     # Afficher le graphique
-    #afficher_graphique_both(meilleur_arbre_elit, fonction_cible, INTERVALLE_MIN.c, INTERVALLE_MAX.c, meilleur_arbre_darwin)
-    afficher_graphique(meilleur_arbre_elit, fonction_cible, INTERVALLE_MIN.c, INTERVALLE_MAX.c)
+    parametres = resultat["parametres"]
+    afficher_graphique(meilleur_arbre_elit, resultat["fonction_cible"], parametres["intervalle_min"], parametres["intervalle_max"])
 
 
 def sauvegarder_parametres(self, fichier="config_simulation.txt", parametres=None):
@@ -175,47 +120,6 @@ class MainApp(QMainWindow):
         sauvegarder_parametres(self, fichier="config_simulation.txt", parametres=parametres)
         main("config_simulation.txt")
 
-def afficher_graphique(meilleur_arbre_elit, fonction_cible, intervalle_min, intervalle_max, meilleur_arbre_darwin=None):
-    """
-    Affiche le graphique comparant la fonction cible et la fonction trouvée.
-    :param meilleur_arbre: L'arbre trouvé par l'algorithme génétique.
-    :param fonction_cible: La fonction cible à approximer.
-    :param intervalle_min: Borne inférieure de l'intervalle d'échantillonnage.
-    :param intervalle_max: Borne supérieure de l'intervalle d'échantillonnage.
-    """
-
-    # Générer les valeurs pour le graphique
-    x_vals = np.linspace(intervalle_min, intervalle_max, 500)
-    y_cible = [fonction_cible(x) for x in x_vals]
-
-    def evaluer_fonction_trouvee(arbre, x_vals):
-        y_vals = []
-        for x in x_vals:
-            try:
-                y_vals.append(arbre.evaluate({"x": x}))
-            except Exception:
-                y_vals.append(float("inf"))  # En cas d'erreur (ex. division par zéro)
-        return np.array(y_vals)
-
-    y_trouvee_elit = evaluer_fonction_trouvee(meilleur_arbre_elit, x_vals)
-    if meilleur_arbre_darwin != None :
-        y_trouvee_darwin = evaluer_fonction_trouvee(meilleur_arbre_darwin, x_vals)
-
-    # Tracer les graphiques
-    plt.figure(figsize=(10, 6))
-    plt.plot(x_vals, y_cible, label="Fonction cible", color="blue", linewidth=2)
-    plt.plot(x_vals, y_trouvee_elit, label="Fonction trouvée elitisme", color="red", linestyle="--", linewidth=2)
-    if meilleur_arbre_darwin != None :
-        plt.plot(x_vals, y_trouvee_darwin, label="Fonction trouvée darwin", color="red", linestyle="--", linewidth=2)
-    plt.xlabel("x", fontsize=14)
-    plt.ylabel("f(x)", fontsize=14)
-    plt.title("Comparaison entre la fonction cible et la fonction trouvée", fontsize=16)
-    plt.axhline(0, color="black", linewidth=0.5, linestyle="--")
-    plt.axvline(0, color="black", linewidth=0.5, linestyle="--")
-    plt.legend(fontsize=12)
-    plt.grid(alpha=0.3)
-    plt.show()
-
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = MainApp()
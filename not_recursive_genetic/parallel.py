@@ -0,0 +1,125 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from popmatrix import PopMatrix, EMPTY
+
+"""parallel.py
+
+This module evaluates a `PopMatrix` on a pool of processes. The points and the
+target vector are sent once to every worker (initializer); afterwards only the
+opcode and constant rows of the trees cross the process boundary."""
+
+# Resident state of each worker process
+_STATE = {}
+
+
+def _init_worker(x, y):
+    _STATE["x"] = x
+    _STATE["y"] = y
+
+
+def _points(indices):
+    # Subsample of the resident points, kept while the indices do not change
+    if indices is None:
+        return _STATE["x"], _STATE["y"]
+    key = indices.tobytes()
+    if _STATE.get("sample_key") != key:
+        _STATE["sample_key"] = key
+        _STATE["sample"] = (_STATE["x"][indices], _STATE["y"][indices])
+    return _STATE["sample"]
+
+
+def _evaluate_chunk(depth, opcodes, constants, indices=None):
+    matrix = PopMatrix(len(opcodes), depth)
+    matrix.opcodes = opcodes
+    matrix.constants = constants
+    return matrix.evaluate(*_points(indices))
+
+
+def _race_chunk(depth, opcodes, constants, threshold, blocks, indices=None):
+    matrix = PopMatrix(len(opcodes), depth)
+    matrix.opcodes = opcodes
+    matrix.constants = constants
+    return matrix.race(*_points(indices), threshold, blocks)
+
+
+def split_by_nodes(sizes, chunks):
+    """Splits consecutive individuals into chunks holding about the same number of nodes.
+
+    Parameters:
+        sizes (np.ndarray): The number of nodes of each individual.
+        chunks (int): The wanted number of chunks.
+
+    Returns:
+        list: (start, end) index pairs."""
+    total = np.cumsum(sizes)
+    if not len(total):
+        return []
+    bounds = np.searchsorted(total, np.linspace(0, total[-1], chunks+1)[1:-1], side="right")
+    bounds = [0] + sorted(set(int(b) for b in bounds) - {0, len(sizes)}) + [len(sizes)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class ParallelEvaluator(object):
+    """Represents a process pool keeping the point set resident.
+
+    Attributes:
+        workers (int): The number of processes.
+        chunks_per_worker (int): The number of chunks sent per worker and per call."""
+
+    def __init__(self, workers, x, y, chunks_per_worker=4):
+        """Starts the process pool.
+
+        Parameters:
+            workers (int): The number of processes.
+            x (np.ndarray): The points.
+            y (np.ndarray): The target values.
+            chunks_per_worker (int): Chunks per worker, for load balancing. Defaults to 4."""
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(np.asarray(x, dtype=float), np.asarray(y, dtype=float)))
+
+    def _chunks(self, matrix):
+        sizes = np.count_nonzero(matrix.opcodes != EMPTY, axis=1)
+        return split_by_nodes(sizes, self.workers*self.chunks_per_worker)
+
+    def evaluate(self, matrix, indices=None):
+        """Evaluates every row of a PopMatrix in parallel and fills its fitness vector.
+
+        Parameters:
+            matrix (PopMatrix): The encoded population.
+            indices (np.ndarray): The resident points to score on. Defaults to None (every point).
+
+        Returns:
+            np.ndarray: The fitness vector."""
+        futures = [(start, end, self.executor.submit(_evaluate_chunk, matrix.depth,
+                                                     matrix.opcodes[start:end], matrix.constants[start:end], indices))
+                   for start, end in self._chunks(matrix)]
+        for start, end, future in futures:
+            matrix.fitness[start:end] = future.result()
+        return matrix.fitness
+
+    def race(self, matrix, threshold, blocks=16, indices=None):
+        """Evaluates every row of a PopMatrix in parallel, dropping the rows that cannot
+        go below the threshold (see `PopMatrix.race`).
+
+        Parameters:
+            matrix (PopMatrix): The encoded population.
+            threshold (float): The fitness to beat.
+            blocks (int): The number of blocks of points. Defaults to 16.
+            indices (np.ndarray): The resident points to score on. Defaults to None (every point).
+
+        Returns:
+            tuple: The fitness vector (lower bounds for the dropped rows) and the
+                boolean vector of the dropped rows."""
+        aborted = np.zeros(len(matrix.opcodes), dtype=bool)
+        futures = [(start, end, self.executor.submit(_race_chunk, matrix.depth, matrix.opcodes[start:end],
+                                                     matrix.constants[start:end], threshold, blocks, indices))
+                   for start, end in self._chunks(matrix)]
+        for start, end, future in futures:
+            matrix.fitness[start:end], aborted[start:end] = future.result()
+        return matrix.fitness, aborted
+
+    def shutdown(self):
+        """Stops the process pool."""
+        self.executor.shutdown()
@@ -1,7 +1,10 @@
-import random
+from functools import lru_cache
 import numpy as np
 from fonctions import fonction
-from constantes import *
+from popmatrix import PopMatrix
+from serialization import encode_tree, stable_hash
+from kernels import mean_squared_error
+from selection import tournament_indices
 
 """population.py
 
@@ -10,6 +13,31 @@ and operations such as crossover, mutation, and evaluation of expressions. The k
 are the `Tree` class, which models individual solutions as trees, and the `Pop` class, which 
 manages populations of trees."""
 
+@lru_cache(maxsize=None)
+def subtree_indices(depth, i):
+    """Returns the heap indices of the subtree rooted at `i` in a tree of a given depth.
+
+    The subtree of `i` holds 2**k consecutive indices starting at (i+1)*2**k-1 on each
+    level k below it, so the levels are already in increasing order. The arrays are
+    memoized per (depth, i) and read-only.
+
+    Parameters:
+        depth (int): The depth of the heap array.
+        i (int): The index of the subtree root.
+
+    Returns:
+        np.ndarray: The sorted indices of the node and its descendants."""
+    n = 2**depth-1
+    levels = []
+    k = 0
+    while i < n and (i+1)*2**k-1 < n:
+        start = (i+1)*2**k-1
+        levels.append(np.arange(start, start+2**k))
+        k += 1
+    indices = np.concatenate(levels) if levels else np.empty(0, dtype=np.int64)
+    indices.flags.writeable = False
+    return indices
+
 def create_list(tree_obj, i):
     """Constructs a list of indices for a node and its children in a tree.
     Parameters:
@@ -18,35 +46,45 @@ def create_list(tree_obj, i):
         
     Returns:
         list: A sorted list of indices for the node and its children."""
-    tree = list(range(2**tree_obj.depth-1))
-    if i >= len(tree) or tree[i] is None:
-        return []
-    left_child_index = 2 * i + 1
-    right_child_index = 2 * i + 2
-    children = [i]
-    if left_child_index < len(tree) and tree[left_child_index] is not None:
-        children += create_list(tree_obj, left_child_index)
-    if right_child_index < len(tree) and tree[right_child_index] is not None:
-        children += create_list(tree_obj, right_child_index)
-    return sorted(children)
+    return subtree_indices(tree_obj.depth, i).tolist()
+
+def is_internal(node):
+    """Tells whether a node of `Tree.content` is an operator."""
+    return node is not None and (node.type == "sgl" or node.type == "multi")
 
 
 class Tree(object):
     """Represents a tree structure used in genetic programming.
     Attributes:
         name (str): The name of the tree.
-        content (list): The nodes of the tree.
-        depth (int): The depth of the tree. A tree with one node has a depth of 1"""
+        content (np.ndarray): The nodes of the tree, as a heap-ordered object array.
+        internal (np.ndarray): Boolean mask of the operator nodes of `content`.
+        depth (int): The depth of the tree. A tree with one node has a depth of 1
+        fidelity (float): The fraction of the points its fitness was computed on.
+        context (RunContext): The run the tree belongs to (operator sets, generator)."""
         
-    def __init__ (self, name):
+    def __init__ (self, name, context):
         """Initializes a new Tree instance.
         
         Parameters:
-            name (str): The name of the tree."""
+            name (str): The name of the tree.
+            context (RunContext): The run the tree belongs to."""
         self.name = name
-        self.content = []
+        self.context = context
+        self.content = np.empty(0, dtype=object)
+        self.internal = np.zeros(0, dtype=bool)
         self.depth = 0
         self.fitness = 0
+        self.fidelity = None
+
+    def set_content(self, nodes):
+        """Replaces the nodes of the tree and rebuilds the internal-node bitmap.
+
+        Parameters:
+            nodes (list): The heap-ordered nodes."""
+        self.content = np.empty(len(nodes), dtype=object)
+        self.content[:] = nodes
+        self.internal = np.array([is_internal(node) for node in nodes], dtype=bool)
 
     def fitness_calc(self, point_set):
         """Evaluates the fitness of the tree based on a set of points.
@@ -56,10 +94,11 @@ class Tree(object):
             
         Returns:
             float: The average fitness of the tree across all points."""
-        fitness = 0
-        for point in point_set :
-            fitness += abs(self.evaluate({"x":point[0]}) - point[1])**2
-        self.fitness = fitness/len(point_set)
+        x = np.array([point[0] for point in point_set], dtype=float)
+        y = np.array([point[1] for point in point_set], dtype=float)
+        with np.errstate(all="ignore"):
+            values = self.evaluate({"x": x})
+        self.fitness = mean_squared_error(values, y)
     def __repr__(self):
         """Generates a string representation of the tree as a mathematical expression.
         
@@ -103,18 +142,30 @@ class Tree(object):
                 return vector_dict[self.content[i].symbol]
         return build_eval()
     
+    def structural_hash(self):
+        """Computes a canonical hash of the tree structure and constants.
+
+        Returns:
+            int: The stable 64-bit hash of the prefix encoding of the tree (see
+                `serialization`), the same for two trees with identical reachable nodes
+                in any process."""
+        return stable_hash(*encode_tree(self))
+
     def copy(self, other):
-        self.content = other.content 
+        # The arrays are copied: mutating the copy must not alter the original
+        self.content = other.content.copy()
+        self.internal = other.internal.copy()
         self.depth = other.depth 
         self.fitness = other.fitness
+        self.context = other.context
     
     def generate_empty(self, depth):
         """Generates an empty tree with a specified depth.
         
         Parameters:
             depth (int): The depth of the tree."""
-        for i in range((2**depth)-1):
-            self.content.append(None)
+        self.content = np.full((2**depth)-1, None, dtype=object)
+        self.internal = np.zeros((2**depth)-1, dtype=bool)
         self.depth = depth
     
     def generate_tree_full(self, depth):
@@ -122,20 +173,23 @@ class Tree(object):
         
         Parameters:
             depth (int): The depth of the tree."""
+        random = self.context.random
+        content = []
         for i in range(2**(depth)-2**(depth-1)-1):
-            self.content.append(random.choices(MULTI_OPERATORS_LIST.c+SGL_OPERATORS_LIST.c, k=1)[0])
+            content.append(random.choices(self.context.operators, k=1)[0])
         for i in range(2**(depth-1)):
-            elt = random.choices(TERMINALS_LIST.c, k=1)[0]
+            elt = random.choices(self.context.terminals, k=1)[0]
             a = round(random.uniform(-5,5),1)
-            self.content.append(fonction(a, str(a),  "cst") if elt.noun == "cst" else elt)
+            content.append(fonction(a, str(a),  "cst") if elt.noun == "cst" else elt)
         for i in range(2**(depth)-2**(depth-1)-1):
             
-            if self.content[i] == None:
-                self.content[i*2+1] = None
-                self.content[i*2+2] = None
+            if content[i] == None:
+                content[i*2+1] = None
+                content[i*2+2] = None
             else:
-                if self.content[i].type == "sgl" :
-                    self.content[i*2+2] = None
+                if content[i].type == "sgl" :
+                    content[i*2+2] = None
+        self.set_content(content)
         self.depth = depth
         self.gen = 1
     
@@ -144,23 +198,26 @@ class Tree(object):
         
         Parameters:
             depth (int): The depth of the tree."""
+        random = self.context.random
+        content = []
         for i in range(2**(depth)-2**(depth-1)-1):
-            elt = random.choices(MULTI_OPERATORS_LIST.c+SGL_OPERATORS_LIST.c+TERMINALS_LIST.c,  k=1)[0]
+            elt = random.choices(self.context.operators+self.context.terminals,  k=1)[0]
             a = round(random.uniform(-5,5),1)
-            self.content.append(fonction(a, str(a),  "cst") if elt.noun == "cst" else elt)
+            content.append(fonction(a, str(a),  "cst") if elt.noun == "cst" else elt)
         for i in range(2**(depth-1)):
-            elt = random.choices(TERMINALS_LIST.c,  k=1)[0]
+            elt = random.choices(self.context.terminals,  k=1)[0]
             a = round(random.uniform(-5,5),1)
-            self.content.append(fonction(a, str(a), "cst") if elt.noun == "cst" else elt)
+            content.append(fonction(a, str(a), "cst") if elt.noun == "cst" else elt)
         for i in range(2**(depth)-2**(depth-1)-1):
             
-            if  self.content[i] == None or self.content[i].type == "terminals" or self.content[i].type == "cst":
-                self.content[i*2+1] = None
-                self.content[i*2+2] = None
+            if  content[i] == None or content[i].type == "terminals" or content[i].type == "cst":
+                content[i*2+1] = None
+                content[i*2+2] = None
             else:
 
-                if self.content[i].type == "sgl" :
-                    self.content[i*2+2] = None
+                if content[i].type == "sgl" :
+                    content[i*2+2] = None
+        self.set_content(content)
         self.depth = depth
         self.gen = 1
         
@@ -170,15 +227,11 @@ class Tree(object):
             
         Returns:
             int: The index of the crossover point."""
-        l = []
-        n=len(self.content)
-        for i in range(1, n) :
-            if self.content[i] is not None and (self.content[i].type == "sgl" or self.content[i].type == "multi"):
-                l.append(i)
+        l = np.flatnonzero(self.internal[1:])
         if len(l) == 0 :
             return 0
         else :
-            return(random.choice(l))
+            return int(l[self.context.random.randrange(len(l))]) + 1
         
     def crossover_func(self, other):
         """Performs crossover with another tree to produce an offspring tree.
@@ -197,23 +250,23 @@ class Tree(object):
         elif crossover_point_1 == 0 :
             return other.crossover_func(self)
         else :
-            offspring = Tree(f"Offspring")
+            offspring = Tree(f"Offspring", self.context)
             offspring.generate_empty(depth)
             offspring.gen = 1
-            offspring.content[0] = self.content[crossover_point_1-1]
-            ls_1 = create_list(offspring, 2)
-            ls_2 = create_list(self, crossover_point_1+crossover_point_1%2)
-            lo_1 = create_list(offspring, 1)
-            lo_2 = create_list(other, crossover_point_2)
-            offspring.content[0] = self.content[int((crossover_point_1-1)/2) if crossover_point_1%2 != 0 else int((crossover_point_1-2)/2)]
-            index = 0
-            for i in lo_1[:len(lo_2)] :
-                offspring.content[i] = other.content[lo_2[index]]
-                index += 1
-            index = 0
-            for i in ls_1[:len(ls_2)] :
-                offspring.content[i] = self.content[ls_2[index]]
-                index += 1
+            ls_1 = subtree_indices(depth, 2)
+            ls_2 = subtree_indices(self.depth, crossover_point_1+crossover_point_1%2)
+            lo_1 = subtree_indices(depth, 1)
+            lo_2 = subtree_indices(other.depth, crossover_point_2)
+            root = int((crossover_point_1-1)/2) if crossover_point_1%2 != 0 else int((crossover_point_1-2)/2)
+            offspring.content[0] = self.content[root]
+            offspring.internal[0] = self.internal[root]
+            # Subtrees of the same heap shape line up index by index
+            n = min(len(lo_1), len(lo_2))
+            offspring.content[lo_1[:n]] = other.content[lo_2[:n]]
+            offspring.internal[lo_1[:n]] = other.internal[lo_2[:n]]
+            n = min(len(ls_1), len(ls_2))
+            offspring.content[ls_1[:n]] = self.content[ls_2[:n]]
+            offspring.internal[ls_1[:n]] = self.internal[ls_2[:n]]
             return offspring
         
     def crossover_leaves(self, other):
@@ -224,20 +277,13 @@ class Tree(object):
             
         Returns:
             Tree: The resulting offspring tree."""
-        offspring = Tree(f"Offspring")
-        offspring.content = self.content                
-        offspring.depth = self.depth
+        offspring = Tree(f"Offspring", self.context)
+        offspring.copy(self)
         offspring.gen = 1
-        l1 = []
-        for i in range(2**offspring.depth-1):
-            if offspring.content[i] is not None and (offspring.content[i].type == "terminals" or offspring.content[i].type == "cst") :
-                l1.append(i)
-        l2 = []
-        for i in range(2**other.depth-1):
-            if other.content[i] is not None and (other.content[i].type == "terminals" or other.content[i].type == "cst") :
-                l2.append(i)
-        leave_1 = int(random.choices(l1)[0])
-        leave_2 = int(random.choices(l2)[0])
+        l1 = np.flatnonzero((offspring.content != None) & ~offspring.internal)
+        l2 = np.flatnonzero((other.content != None) & ~other.internal)
+        leave_1 = int(l1[self.context.random.randrange(len(l1))])
+        leave_2 = int(l2[self.context.random.randrange(len(l2))])
         offspring.content[leave_1] = other.content[leave_2]
         return offspring
     
@@ -246,14 +292,11 @@ class Tree(object):
         
         Returns:
             int: The index of the mutation point."""
-        l = []
-        for i in range(1, 2**self.depth-1): 
-            if self.content[i] is not None and (self.content[i].type == "sgl" or self.content[i].type == "multi"):
-                l.append(i)
+        l = np.flatnonzero(self.internal[1:])
         if len(l) == 0:
             return 0
         else :
-            return random.choices(l)[0]
+            return int(l[self.context.random.randrange(len(l))]) + 1
     
     def mutation(self):
         """Applies mutation to a subtree within the tree."""
@@ -262,18 +305,13 @@ class Tree(object):
         if mutation_point_1 == 0:
             return None
         else :
-            sub_depth = 1
-            while mutation_point_1 >= 2**sub_depth-1 :
-                sub_depth += 1
-            sub_depth = self.depth-sub_depth+1
-            sub_tree = Tree(f"Sub_tree for {self.name} mutation")
+            # Level of the mutation point, 1 for the root
+            sub_depth = self.depth-(mutation_point_1+1).bit_length()+1
+            sub_tree = Tree(f"Sub_tree for {self.name} mutation", self.context)
             sub_tree.generate_tree_growth(sub_depth)
-            l1 = create_list(self, mutation_point_1)
-            l2 = create_list(sub_tree, 0)
-            index = 0
-            for i in l1 :
-                self.content[i] = sub_tree.content[l2[index]]
-                index += 1
+            l1 = subtree_indices(self.depth, mutation_point_1)
+            self.content[l1] = sub_tree.content
+            self.internal[l1] = sub_tree.internal
 
 
 class Pop(object):
@@ -283,24 +321,89 @@ class Pop(object):
         name (str): The name of the population.
         content (list): The list of trees in the population.
         gen (int): The generation number.
-        depth (int): The depth of the population's trees."""
+        depth (int): The depth of the population's trees.
+        fidelity (float): The fraction of the points of the last evaluation.
+        aborted (np.ndarray): Boolean mask of the trees dropped by the last racing evaluation.
+        context (RunContext): The run the population belongs to."""
         
-    def __init__(self, name):
+    def __init__(self, name, context, seed=None):
         """Initializes a new Pop instance.
         
         Parameters:
-            name (str): The name of the population."""
+            name (str): The name of the population.
+            context (RunContext): The run the population belongs to.
+            seed (int): The seed of the NumPy generator used for selection. Defaults to None."""
         self.name = name
+        self.context = context
+        self.rng = np.random.default_rng(seed)
         self.content = []
         self.gen = 0
         self.depth = 0
-    def evaluate(self, point_set):
+        self.matrix = None
+        self.fitness = np.empty(0)
+        self.fidelity = 1.0
+        self.aborted = np.zeros(0, dtype=bool)
+    def evaluate(self, point_set, cache=None, evaluator=None, indices=None, threshold=None, blocks=16):
         """Evaluates the fitness of each tree in the population.
+
+        The population is encoded as a `PopMatrix` and evaluated level by level for
+        all trees and all points at once; the fitness is written back on each tree.
+        With a cache, only trees whose structure has not been scored yet on this
+        point set are encoded and evaluated.
         
         Parameters:
-            point_set (list): A list of dictionaries representing points."""
-        for tree in self.content :
-            tree.fitness_calc(point_set)
+            point_set (list): A list of (x, y) tuples.
+            cache (FitnessCache): The run's fitness cache. Defaults to None.
+            evaluator (ParallelEvaluator): A process pool holding the same point set,
+                used instead of the local evaluation. Defaults to None.
+            indices (np.ndarray): The points of `point_set` to score on (a subsample).
+                Defaults to None (every point).
+            threshold (float): If given, the evaluation of a tree stops as soon as its
+                fitness provably cannot go below this value (racing); such a tree gets a
+                lower bound of its fitness, is flagged in `aborted` and is not cached.
+                Defaults to None (full evaluation).
+            blocks (int): The number of blocks of points of a racing evaluation. Defaults to 16."""
+        x = np.array([point[0] for point in point_set], dtype=float)
+        y = np.array([point[1] for point in point_set], dtype=float)
+        self.fidelity = 1.0
+        if indices is not None:
+            self.fidelity = len(indices) / len(x)
+            x, y = x[indices], y[indices]
+        self.fitness = np.empty(len(self.content))
+        self.aborted = np.zeros(len(self.content), dtype=bool)
+        def run(matrix):
+            if threshold is not None:
+                if evaluator is not None:
+                    return evaluator.race(matrix, threshold, blocks, indices)
+                return matrix.race(x, y, threshold, blocks)
+            fitness = evaluator.evaluate(matrix, indices) if evaluator is not None else matrix.evaluate(x, y)
+            return fitness, np.zeros(len(fitness), dtype=bool)
+        if cache is None:
+            self.matrix = PopMatrix.from_trees(self.content)
+            self.fitness[:], self.aborted[:] = run(self.matrix)
+        else:
+            dataset = hash((x.tobytes(), y.tobytes()))
+            groups = {}
+            for i, tree in enumerate(self.content):
+                groups.setdefault((tree.structural_hash(), dataset), []).append(i)
+            missing = []
+            for key, rows in groups.items():
+                fitness = cache.get(key)
+                if fitness is None:
+                    missing.append(key)
+                else:
+                    self.fitness[rows] = fitness
+            self.matrix = PopMatrix.from_trees([self.content[groups[key][0]] for key in missing])
+            fitness, aborted = run(self.matrix)
+            for key, value, dropped in zip(missing, fitness.tolist(), aborted.tolist()):
+                self.fitness[groups[key]] = value
+                self.aborted[groups[key]] = dropped
+                # A lower bound is not a fitness: it is not cached
+                if not dropped:
+                    cache.put(key, value)
+        for tree, fitness in zip(self.content, self.fitness.tolist()):
+            tree.fitness = fitness
+            tree.fidelity = self.fidelity
 
     def tournament_selection(self, tournament_size):
         """Selects the best tree from a random sample of trees.
@@ -310,11 +413,18 @@ class Pop(object):
             
         Returns:
             Tree: The best tree from the sample."""
-        l = []
-        for i in range(tournament_size):
-            l.append(random.choice(self.content))
-        l.sort(key=lambda x: x.fitness, reverse=False)
-        return l[0]
+        return self.select(1, tournament_size)[0]
+
+    def select(self, number, tournament_size):
+        """Runs `number` tournaments at once on the fitness vector.
+        
+        Parameters:
+            number (int): The number of trees to select.
+            tournament_size (int): The number of trees sampled per tournament.
+            
+        Returns:
+            list: The winning trees."""
+        return [self.content[i] for i in tournament_indices(self.rng, self.fitness, number, tournament_size).tolist()]
     def generate(self, n, depth, ratio=0.5):
         """Generates a population of trees.
         
@@ -323,11 +433,11 @@ class Pop(object):
             depth (int): The depth of the trees.
             ratio (float): The ratio of full trees to growth trees. Defaults to 0.5."""
         for i in range(int(n*ratio)):
-            tree = Tree(f"Tree number {i+1}")
+            tree = Tree(f"Tree number {i+1}", self.context)
             tree.generate_tree_full(depth)
             self.content.append(tree)
         for i in range(int(n-n*ratio)):
-            tree = Tree(f"Tree number {int(n*ratio)+i+1}")
+            tree = Tree(f"Tree number {int(n*ratio)+i+1}", self.context)
             tree.generate_tree_growth(depth)
             self.content.append(tree)
         self.depth = depth
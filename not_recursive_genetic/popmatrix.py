@@ -0,0 +1,223 @@
+import numpy as np
+from fonctions import fonction
+from kernels import div_kernel, pow_kernel, mean_squared_error, race_mean_squared_error
+
+"""popmatrix.py
+
+This module stores a whole population of heap-array trees as 2-D typed arrays and
+evaluates it level by level, bottom-up, for all individuals and all points at once.
+Row `r` of the opcode matrix is the `content` list of one `Tree`: node `i` has its
+children at `2i+1` and `2i+2`, exactly like in `popavecclasses.Tree`."""
+
+EMPTY = 0
+VARIABLE = 1
+CONSTANT = 2
+
+
+# (symbol, arity, kernel) for every operator known by the engine
+KERNELS = [
+    ("+", 2, np.add),
+    ("-", 2, np.subtract),
+    ("*", 2, np.multiply),
+    ("/", 2, div_kernel),
+    ("^", 2, pow_kernel),
+    ("cos", 1, np.cos),
+    ("sin", 1, np.sin),
+    ("log", 1, np.log),
+    ("exp", 1, np.exp),
+    ("abs", 1, np.abs),
+]
+OPCODES = {symbol: CONSTANT + 1 + i for i, (symbol, _, _) in enumerate(KERNELS)}
+ARITY = np.array([0, 0, 0] + [arity for _, arity, _ in KERNELS], dtype=np.int8)
+
+
+def encode_node(node):
+    """Returns the (opcode, constant) pair for a `fonction` node (or None).
+
+    Parameters:
+        node (fonction): A node of `Tree.content`.
+
+    Returns:
+        tuple: The opcode and the constant value (0 when not a constant)."""
+    if node is None:
+        return EMPTY, 0.0
+    if node.type == "cst":
+        return CONSTANT, float(node.noun)
+    if node.type == "terminals":
+        return VARIABLE, 0.0
+    try:
+        return OPCODES[node.symbol], 0.0
+    except KeyError:
+        raise ValueError(f"Unknown operator {node.symbol!r} for the matrix engine.")
+
+
+def decode_nodes(opcodes, constants, context):
+    """Inverse of `encode_node` for a whole heap array.
+
+    Parameters:
+        opcodes (np.ndarray): The opcodes of the nodes.
+        constants (np.ndarray): The constants of the nodes.
+        context (RunContext): The run whose operator and variable nodes are reused.
+
+    Returns:
+        list: The heap-ordered nodes (None for the empty slots)."""
+    operators = {OPCODES[op.symbol]: op for op in context.operators}
+    variable = next(terminal for terminal in context.terminals if terminal.noun != "cst")
+    nodes = []
+    for code, constant in zip(opcodes.tolist(), constants.tolist()):
+        if code == EMPTY:
+            nodes.append(None)
+        elif code == VARIABLE:
+            nodes.append(variable)
+        elif code == CONSTANT:
+            nodes.append(fonction(constant, str(constant), "cst"))
+        else:
+            nodes.append(operators[code])
+    return nodes
+
+
+class PopMatrix(object):
+    """Represents a population as typed arrays.
+
+    Attributes:
+        depth (int): The depth of the heap arrays (2**depth-1 columns).
+        opcodes (np.ndarray): int8 matrix [pop_size, 2**depth-1].
+        constants (np.ndarray): float64 matrix of the same shape.
+        fitness (np.ndarray): float64 fitness vector [pop_size]."""
+
+    def __init__(self, size, depth):
+        """Initializes an empty matrix population.
+
+        Parameters:
+            size (int): The number of individuals.
+            depth (int): The depth of the trees."""
+        self.depth = depth
+        self.opcodes = np.zeros((size, 2**depth-1), dtype=np.int8)
+        self.constants = np.zeros((size, 2**depth-1), dtype=np.float64)
+        self.fitness = np.full(size, np.inf)
+
+    @classmethod
+    def from_trees(cls, trees):
+        """Encodes a list of `Tree` into a new PopMatrix.
+
+        Parameters:
+            trees (list): The trees to encode.
+
+        Returns:
+            PopMatrix: The encoded population."""
+        depth = max((tree.depth for tree in trees), default=1)
+        matrix = cls(len(trees), depth)
+        for row, tree in enumerate(trees):
+            matrix.encode(row, tree)
+        return matrix
+
+    def encode(self, row, tree):
+        """Writes one tree into a row of the matrices.
+
+        Parameters:
+            row (int): The row index.
+            tree (Tree): The tree to encode."""
+        for i, node in enumerate(tree.content):
+            self.opcodes[row, i], self.constants[row, i] = encode_node(node)
+        self.opcodes[row, len(tree.content):] = EMPTY
+
+    def decode(self, row, context):
+        """Rebuilds the tree stored in a row of the matrices.
+
+        Parameters:
+            row (int): The row index.
+            context (RunContext): The run of the tree, whose operator and terminal nodes are reused.
+
+        Returns:
+            Tree: The decoded tree."""
+        from popavecclasses import Tree
+        tree = Tree("decoded", context)
+        tree.set_content(decode_nodes(self.opcodes[row], self.constants[row], context))
+        tree.depth = self.depth
+        tree.fitness = float(self.fitness[row])
+        return tree
+
+    def evaluate_values(self, x, rows=slice(None)):
+        """Evaluates the root of every selected individual on every point.
+
+        Parameters:
+            x (np.ndarray): The points.
+            rows (slice or np.ndarray): The individuals to evaluate.
+
+        Returns:
+            np.ndarray: Matrix [individuals, points] of the tree outputs."""
+        opcodes = self.opcodes[rows]
+        constants = self.constants[rows]
+        x = np.asarray(x, dtype=float)
+        child = None
+        with np.errstate(all="ignore"):
+            for level in range(self.depth-1, -1, -1):
+                lo, hi = 2**level-1, 2**(level+1)-1
+                ops = opcodes[:, lo:hi]
+                # Empty slots are NaN so that an operator missing a child is invalid
+                values = np.full(ops.shape + x.shape, np.nan)
+                mask = ops == VARIABLE
+                values[mask] = x
+                mask = ops == CONSTANT
+                values[mask] = constants[:, lo:hi][mask][:, None]
+                if child is not None:
+                    left = child[:, 0::2]
+                    right = child[:, 1::2]
+                    for code in np.unique(ops[ops > CONSTANT]):
+                        mask = ops == code
+                        _, arity, kernel = KERNELS[code - CONSTANT - 1]
+                        if arity == 1:
+                            values[mask] = kernel(left[mask])
+                        else:
+                            values[mask] = kernel(left[mask], right[mask])
+                child = values
+        return child[:, 0]
+
+    def evaluate(self, x, y, chunk_size=None):
+        """Computes the mean squared error of every individual, invalid ones counting as inf.
+
+        Parameters:
+            x (np.ndarray): The points.
+            y (np.ndarray): The target values.
+            chunk_size (int): Number of individuals evaluated together. Defaults to a
+                size keeping the intermediate arrays around 32 MB.
+
+        Returns:
+            np.ndarray: The fitness vector."""
+        y = np.asarray(y, dtype=float)
+        n = len(self.opcodes)
+        if chunk_size is None:
+            chunk_size = max(1, 2**22 // max(1, 2**(self.depth-1) * len(y)))
+        for start in range(0, n, chunk_size):
+            rows = slice(start, min(n, start+chunk_size))
+            self.fitness[rows] = mean_squared_error(self.evaluate_values(x, rows), y)
+        return self.fitness
+
+    def race(self, x, y, threshold, blocks=16, chunk_size=None):
+        """Computes the fitness of every individual like `evaluate`, dropping those that
+        cannot go below the threshold (see `race_mean_squared_error`).
+
+        Parameters:
+            x (np.ndarray): The points.
+            y (np.ndarray): The target values.
+            threshold (float): The fitness to beat.
+            blocks (int): The number of blocks of points. Defaults to 16.
+            chunk_size (int): Number of individuals evaluated together. Defaults to the
+                same size as `evaluate`.
+
+        Returns:
+            tuple: The fitness vector (lower bounds for the dropped individuals) and the
+                boolean vector of the dropped individuals."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        n = len(self.opcodes)
+        aborted = np.zeros(n, dtype=bool)
+        if chunk_size is None:
+            chunk_size = max(1, 2**22 // max(1, 2**(self.depth-1) * len(y)))
+        for start in range(0, n, chunk_size):
+            end = min(n, start+chunk_size)
+            def evaluate_block(rows, points):
+                return self.evaluate_values(x[points], start+rows)
+            self.fitness[start:end], aborted[start:end] = race_mean_squared_error(
+                evaluate_block, y, end-start, threshold, blocks)
+        return self.fitness, aborted
@@ -0,0 +1,30 @@
+import hashlib
+import json
+import os
+from cache_disque import version_code
+
+"""result_cache.py
+
+This module computes the key of the runs of the iterative engine in the on-disk
+result cache shared by both engines (see `cache_disque.CacheResultats`)."""
+
+ENGINE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIRECTORY = os.path.join(ENGINE_DIRECTORY, "result_cache")
+
+
+def result_key(context, seed):
+    """Computes the canonical key of a run, independent of the line order and path of its
+    configuration file.
+
+    Parameters:
+        context (RunContext): The run parameters.
+        seed (int): The seed of the run.
+
+    Returns:
+        str: The hex digest of (engine, parameters, operator set, seed, code version)."""
+    parameters = {name: value for name, value in vars(context).items()
+                  if name not in ("multi_operators", "sgl_operators", "terminals", "random")}
+    parameters["operators"] = sorted(op.symbol for op in context.operators)
+    parameters["terminals"] = sorted(terminal.symbol for terminal in context.terminals)
+    description = {"engine": "iteratif", "parameters": parameters, "seed": seed, "version": version_code(ENGINE_DIRECTORY)}
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
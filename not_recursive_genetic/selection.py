@@ -0,0 +1,35 @@
+import numpy as np
+
+"""selection.py
+
+This module provides batched selection: all the tournaments of a generation are
+drawn at once as an index matrix, and elites are extracted with a stable sort."""
+
+
+def tournament_indices(rng, fitness, number, tournament_size):
+    """Draws several tournaments at once (candidates drawn with replacement).
+
+    Parameters:
+        rng (np.random.Generator): The random generator.
+        fitness (np.ndarray): The fitness vector of the population.
+        number (int): The number of tournaments.
+        tournament_size (int): The number of candidates per tournament.
+
+    Returns:
+        np.ndarray: The indices of the winners (lowest fitness of each row)."""
+    candidates = rng.integers(0, len(fitness), size=(number, tournament_size))
+    return candidates[np.arange(number), np.argmin(fitness[candidates], axis=1)]
+
+
+def elite_indices(fitness, number):
+    """Returns the indices of the `number` best individuals, best first.
+
+    Parameters:
+        fitness (np.ndarray): The fitness vector of the population.
+        number (int): The number of elites.
+
+    Returns:
+        np.ndarray: The indices, ties broken by smallest index like a stable sort."""
+    # A full stable sort: argpartition would pick arbitrary indices among the ties
+    # at the boundary, and populations are small
+    return np.argsort(fitness, kind="stable")[:max(number, 0)]
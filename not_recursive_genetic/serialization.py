@@ -0,0 +1,143 @@
+import hashlib
+import numpy as np
+from popmatrix import EMPTY, CONSTANT, ARITY, encode_node, decode_nodes
+
+"""serialization.py
+
+This module provides a compact binary format for trees. A tree is written in prefix
+order from its root: one int8 opcode per node (the `popmatrix` opcodes, EMPTY for a
+missing child) and one float64 per constant, the structure being implied by the
+arity of the opcodes. The heap slots that cannot be reached from the root are not
+written. A batch of n trees is the little-endian byte string
+
+    n               uint32
+    lengths[n]      uint32, the number of opcodes of each tree
+    depths[n]       uint8, the heap depth of each tree
+    opcodes[sum]    int8, the concatenated prefix opcodes
+    constants[k]    float64, one value per CONSTANT opcode, in order
+
+The stable 64-bit hash of a tree is computed on its opcodes and constants, so it is
+the same in every process and every session."""
+
+_UINT32 = np.dtype("<u4")
+_FLOAT64 = np.dtype("<f8")
+
+
+def encode_tree(tree):
+    """Returns the prefix encoding of the nodes reachable from the root of a tree.
+
+    Parameters:
+        tree (Tree): The tree to encode.
+
+    Returns:
+        tuple: The int8 opcodes and the float64 constants (0 when not a constant)."""
+    opcodes, constants = [], []
+    stack = [0]
+    while stack:
+        i = stack.pop()
+        code, constant = encode_node(tree.content[i]) if i < len(tree.content) else (EMPTY, 0.0)
+        opcodes.append(code)
+        constants.append(constant)
+        stack.extend(range(2*i+int(ARITY[code]), 2*i, -1))
+    return np.array(opcodes, dtype=np.int8), np.array(constants, dtype=np.float64)
+
+
+def stable_hash(opcodes, constants):
+    """Computes the stable structural hash of a prefix-encoded tree.
+
+    Parameters:
+        opcodes (np.ndarray): The prefix opcodes.
+        constants (np.ndarray): The constants, aligned on the opcodes.
+
+    Returns:
+        int: An unsigned 64-bit hash, equal for two trees with the same reachable nodes."""
+    digest = hashlib.blake2b(np.array([len(opcodes)], dtype=_UINT32).tobytes(), digest_size=8)
+    digest.update(np.ascontiguousarray(opcodes, dtype=np.int8).tobytes())
+    digest.update(np.ascontiguousarray(constants[opcodes == CONSTANT], dtype=_FLOAT64).tobytes())
+    return int.from_bytes(digest.digest(), "little")
+
+
+def encode_batch(trees):
+    """Encodes trees into one byte string.
+
+    Parameters:
+        trees (list): The trees to encode.
+
+    Returns:
+        bytes: The encoded batch."""
+    codes = [encode_tree(tree) for tree in trees]
+    lengths = np.array([len(opcodes) for opcodes, _ in codes], dtype=_UINT32)
+    depths = np.array([tree.depth for tree in trees], dtype=np.uint8)
+    if codes:
+        opcodes = np.concatenate([opcodes for opcodes, _ in codes])
+        constants = np.concatenate([constants for _, constants in codes])
+    else:
+        opcodes, constants = np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64)
+    return b"".join((np.array([len(codes)], dtype=_UINT32).tobytes(), lengths.tobytes(), depths.tobytes(),
+                     opcodes.tobytes(), constants[opcodes == CONSTANT].astype(_FLOAT64).tobytes()))
+
+
+def _read_batch(data):
+    # Splits a batch into (lengths, depths, opcodes, unpacked constants)
+    try:
+        n = int(np.frombuffer(data, dtype=_UINT32, count=1)[0])
+        offset = _UINT32.itemsize
+        lengths = np.frombuffer(data, dtype=_UINT32, count=n, offset=offset).astype(np.int64)
+        offset += _UINT32.itemsize*n
+        depths = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset)
+        offset += n
+        total = int(lengths.sum())
+        opcodes = np.frombuffer(data, dtype=np.int8, count=total, offset=offset)
+        mask = opcodes == CONSTANT
+        count = int(np.count_nonzero(mask))
+        if len(data) != offset + total + _FLOAT64.itemsize*count:
+            raise ValueError
+        constants = np.zeros(total, dtype=np.float64)
+        constants[mask] = np.frombuffer(data, dtype=_FLOAT64, count=count, offset=offset+total)
+    except ValueError:
+        raise ValueError("Truncated or invalid batch of trees.") from None
+    return lengths, depths, opcodes, constants
+
+
+def decode_batch(data, context):
+    """Rebuilds the trees of a batch written by `encode_batch`.
+
+    Parameters:
+        data (bytes): The encoded batch (bytes, bytearray or uint8 array).
+        context (RunContext): The run of the trees, whose operator and variable nodes are reused.
+
+    Returns:
+        list: The decoded trees, with their heap depth (unreachable slots are empty)."""
+    from popavecclasses import Tree
+    lengths, depths, opcodes, constants = _read_batch(data)
+    ends = np.cumsum(lengths)
+    trees = []
+    for i, (start, end) in enumerate(zip((ends - lengths).tolist(), ends.tolist())):
+        depth = int(depths[i])
+        content = [None]*(2**depth-1)
+        stack = [0]
+        for code, node in zip(opcodes[start:end].tolist(), decode_nodes(opcodes[start:end], constants[start:end], context)):
+            j = stack.pop()
+            if j < len(content):
+                content[j] = node
+            stack.extend(range(2*j+int(ARITY[code]), 2*j, -1))
+        tree = Tree(f"Tree number {i+1}", context)
+        tree.set_content(content)
+        tree.depth = depth
+        tree.gen = 1
+        trees.append(tree)
+    return trees
+
+
+def batch_hashes(data):
+    """Computes the stable hash of every tree of a batch without rebuilding the trees.
+
+    Parameters:
+        data (bytes): The encoded batch.
+
+    Returns:
+        np.ndarray: The uint64 hashes, in the order of the batch."""
+    lengths, _, opcodes, constants = _read_batch(data)
+    ends = np.cumsum(lengths)
+    return np.array([stable_hash(opcodes[start:end], constants[start:end])
+                     for start, end in zip((ends - lengths).tolist(), ends.tolist())], dtype=np.uint64)
@@ -0,0 +1,141 @@
+import numpy as np
+from genetic import genetic_algorithm
+from fonctions import *
+from constantes import MULTI_OPERATORS_INIT, SGL_OPERATORS_INIT
+from context import RunContext
+from cache import FitnessCache
+from cible import compiler_cible
+from serialization import encode_batch, decode_batch
+from cache_disque import CacheResultats
+from result_cache import DEFAULT_DIRECTORY, result_key
+from checkpoint import Checkpoint
+
+"""simulation.py
+
+Runs a simulation from a configuration file without any GUI: this module imports
+neither PyQt5 nor matplotlib. `main.py` (interface) and `lancer_simulation.py`
+(command line) both rely on it."""
+
+
+def configurer(config_file, graine=None):
+    """
+    Lit un fichier de configuration et construit le contexte du run.
+    :param config_file: Chemin du fichier contenant les paramètres de la simulation.
+    :param graine: Graine du générateur du run (None : aléatoire).
+    :return: RunContext décrivant le run (aucun état global n'est modifié).
+    """
+    multi_operators = []
+    sgl_operators = []
+
+    with open (config_file) as config:
+        mylist = list(config)
+        D = {}
+        for i in range (0,12):
+            L = mylist[i].split()
+            D [L[0]] = L[2]
+
+        for i in range (12,16):
+            ligne = mylist[i].split()
+
+            if ligne[2] == 'True':
+                multi_operators.append(fonction(MULTI_OPERATORS_INIT[ligne[0]], ligne[0], "multi"))
+
+        for j in range (16,21):
+            ligne = mylist[j].split()
+
+            if ligne[2]=='True':
+                sgl_operators.append(fonction(SGL_OPERATORS_INIT[ligne[0]], ligne[0], "sgl"))
+
+    #Valide l'expression dès la lecture (ValueError si elle est refusée)
+    compiler_cible(D['fonction_cible'])
+    return RunContext(
+        multi_operators=multi_operators,
+        sgl_operators=sgl_operators,
+        terminals=[fonction("x", "x" , "terminals"), fonction("cst","cst", "terminals")],
+        target_function=D['fonction_cible'],
+        interval_min=float(D['intervalle_min']),
+        interval_max=float(D['intervalle_max']),
+        nb_points=int(D['nombre_points']),
+        pop_size=int(D['taille_population']),
+        max_depth=int(D['profondeur_max']),
+        crossover_rate=float(D['proba_crossover']),
+        mutation_rate=float(D['proba_mutation']),
+        mutation_point_rate=float(D['proba_mutation_point']),
+        max_generations=int(D['generations_max']),
+        target_fitness=float(D['fitness_cible']),
+        tournament_size=10,
+        elitism=50,
+        ratio_full_trees=0.5,
+        seed_range=9999,
+        crossover_leaves_rate=0.10,
+        darwin_factor=0.5,
+        seed=graine,
+    )
+
+
+def executer(config_file, graine=None, cache_resultats=None, reprise=None, intervalle_reprise=10, delai_reprise=None):
+    """
+    Lance une simulation complète à partir d'un fichier de configuration.
+    Chaque appel a son propre contexte : plusieurs simulations peuvent s'exécuter en même temps.
+    :param config_file: Chemin du fichier contenant les paramètres de la simulation.
+    :param graine: Graine du run (None : aléatoire).
+    :param cache_resultats: Cache disque des résultats (voir cache_disque.py), None pour le cache
+                            par défaut, False pour le désactiver. Seuls les runs avec une graine y sont
+                            lus et écrits : sans graine, le résultat n'est pas reproductible.
+    :param reprise: Fichier du point de reprise (None : pas de sauvegarde). S'il existe, l'évolution
+                    repart de l'état qu'il contient et donne le même résultat qu'un run ininterrompu.
+    :param intervalle_reprise: Nombre de générations entre deux sauvegardes (None : pas de critère de génération).
+    :param delai_reprise: Durée en secondes entre deux sauvegardes (None : pas de critère de durée).
+    :return: Dictionnaire contenant le meilleur individu, sa fitness, le nombre de générations,
+             l'historique des générations, les valeurs cibles, les statistiques du cache,
+             la fonction cible et l'intervalle d'échantillonnage.
+    """
+    context = configurer(config_file, graine)
+    # Fonction cible compilée (voir cible.py)
+    fonction_cible = compiler_cible(context.target_function)
+    parametres = {"intervalle_min": context.interval_min, "intervalle_max": context.interval_max}
+
+    # Résultat déjà calculé pour ces paramètres, cette graine et ce code
+    if cache_resultats is None:
+        cache_resultats = CacheResultats(DEFAULT_DIRECTORY)
+    cle = result_key(context, graine) if cache_resultats and graine is not None else None
+    entree = cache_resultats.obtenir(cle) if cle is not None else None
+    if entree is not None:
+        meilleur, = decode_batch(entree["best"], context)
+        meilleur.fitness = entree["meta"]["fitness"]
+        return {
+            "meilleur": meilleur,
+            "fitness": entree["meta"]["fitness"],
+            "generations": entree["meta"]["generations"],
+            "historique": [(int(ligne[0]),) + tuple(ligne[1:]) for ligne in entree["history"].tolist()],
+            "valeurs_cible": entree["target"],
+            "cache": entree["meta"]["cache"],
+            "fonction_cible": fonction_cible,
+            "parametres": parametres,
+        }
+
+    # Lancer l'évolution
+    cache = FitnessCache()
+    historique = []
+    checkpoint = Checkpoint(reprise, intervalle_reprise, delai_reprise, result_key(context, graine)) if reprise is not None else None
+    meilleur_arbre_elit = genetic_algorithm(context, context.pop_size, context.max_generations, context.mutation_rate, context.crossover_rate, context.tournament_size, context.elitism, context.interval_min, context.interval_max, context.nb_points, context.target_function, cache, graine, history=historique, checkpoint=checkpoint)
+
+    resultat = {
+        "meilleur": meilleur_arbre_elit,
+        "fitness": float(meilleur_arbre_elit.fitness),
+        "generations": context.max_generations,
+        "historique": historique,
+        "valeurs_cible": fonction_cible(np.linspace(context.interval_min, context.interval_max, context.nb_points)),
+        "cache": cache.stats(),
+        "fonction_cible": fonction_cible,
+        "parametres": parametres,
+    }
+    if cle is not None:
+        cache_resultats.enregistrer(
+            cle,
+            {"fitness": resultat["fitness"], "generations": resultat["generations"], "cache": resultat["cache"]},
+            best=np.frombuffer(encode_batch([meilleur_arbre_elit]), dtype=np.uint8),
+            history=np.array(historique, dtype=np.float64).reshape(-1, 5),
+            target=np.asarray(resultat["valeurs_cible"], dtype=np.float64),
+        )
+    return resultat
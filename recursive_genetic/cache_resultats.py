@@ -0,0 +1,28 @@
+import hashlib
+import json
+import os
+from cache_disque import version_code
+
+"""Clé des résultats du moteur récursif dans le cache disque (voir cache_disque.py).
+
+Relancer une configuration déjà calculée avec la même graine relit le résultat au
+lieu de refaire l'évolution."""
+
+DOSSIER_MOTEUR = os.path.dirname(os.path.abspath(__file__))
+DOSSIER_DEFAUT = os.path.join(DOSSIER_MOTEUR, "cache_resultats")
+
+
+def cle_resultat(parametres, graine):
+    """
+    Clé canonique d'un run : ne dépend ni de l'ordre des lignes du fichier de configuration
+    ni de son chemin.
+    :param parametres: Paramètres lus (voir simulation.lire_configuration).
+    :param graine: Graine du run.
+    """
+    description = {
+        "moteur": "recursif",
+        "parametres": {**parametres, "fonctions": sorted(parametres["fonctions"])},
+        "graine": graine,
+        "version": version_code(DOSSIER_MOTEUR),
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
@@ -1,13 +1,62 @@
+import numpy as np
+
+# Fonctions connues, indexées par symbole (une seule instance partagée par symbole)
+_REGISTRE = {}
+
+
+def fonction_par_nom(nom):
+    """
+    Renvoie la Fonction enregistrée sous un symbole.
+    :param nom: Symbole de la fonction (par exemple "+").
+    """
+    if nom not in _REGISTRE:
+        import fonctions_base  # enregistre les fonctions de base
+    return _REGISTRE[nom]
+
+
 class Fonction:
-    def __init__(self, nom, argument, fonction):
-        self.nom = nom
-        self.argument = argument
-        self.fonction = fonction
+    """Fonction immuable et partagée par tous les arbres ; elle est sérialisée par son symbole."""
+
+    __slots__ = ("nom", "argument", "fonction", "fonction_vect")
+
+    def __init__(self, nom, argument, fonction, fonction_vect=None):
+        """
+        nom: Symbole de la fonction (identifie la fonction dans le registre).
+        argument: Nombre d'arguments attendus.
+        fonction: Version scalaire (un point à la fois).
+        fonction_vect: Version vectorielle appliquée à des tableaux NumPy (optionnelle).
+        """
+        object.__setattr__(self, "nom", nom)
+        object.__setattr__(self, "argument", argument)
+        object.__setattr__(self, "fonction", fonction)
+        object.__setattr__(self, "fonction_vect", fonction_vect)
+        _REGISTRE[nom] = self
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("Une Fonction est immuable.")
+
+    def __reduce__(self):
+        return fonction_par_nom, (self.nom,)
 
     def apply(self, *arguments): #applique à une liste d'arguments
         if len(arguments) != self.argument:
             raise ValueError(f"La fonction {self.nom} attend {self.argument} arguments, mais {len(arguments)} ont été fournis.")
         return self.fonction(*arguments)
 
+    def apply_vect(self, *arguments): #applique à une liste de tableaux
+        if len(arguments) != self.argument:
+            raise ValueError(f"La fonction {self.nom} attend {self.argument} arguments, mais {len(arguments)} ont été fournis.")
+        if self.fonction_vect is not None:
+            return self.fonction_vect(*arguments)
+        # Pas de noyau vectoriel : on retombe sur la version scalaire point par point
+        colonnes = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in arguments])
+        resultat = np.empty(colonnes[0].shape)
+        for i, valeurs in enumerate(zip(*[c.ravel() for c in colonnes])):
+            try:
+                resultat.flat[i] = self.fonction(*valeurs)
+            except Exception:
+                resultat.flat[i] = np.nan
+        return resultat
+
     def __repr__(self):
-        return f"Fonction(nom='{self.nom}', arguments={self.argument})"
\ No newline at end of file
+        return f"Fonction(nom='{self.nom}', arguments={self.argument})"
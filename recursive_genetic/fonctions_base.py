@@ -1,16 +1,19 @@
-import math
+import numpy as np
+import noyaux
 from fonction import Fonction
 
-addition = Fonction("+", 2, lambda a, b: a + b)
-soustraction = Fonction("-", 2, lambda a, b: a - b)
-multiplication = Fonction("*", 2, lambda a, b: a * b)
-division = Fonction("/", 2, lambda a, b: a / b if b != 0 else 1)
-puissance = Fonction("^", 2, lambda a, b: a ** b if a >= 0 or (int(b) == b and b >= 0) else abs(a) ** b)
-exponentielle = Fonction("exp", 1, math.exp)
-cosinus = Fonction("cos", 1, math.cos)
-sinus = Fonction("sin", 1, math.sin)
-logarithme = Fonction("log", 1, lambda x: math.log(x) if x > 0 else 1)
-valeur_absolue = Fonction("abs", 1, abs)
+# Versions scalaires et vectorielles partagent les noyaux protégés (voir noyaux.py) :
+# l'évaluation point par point ne lève donc pas d'exception
+addition = Fonction("+", 2, lambda a, b: a + b, np.add)
+soustraction = Fonction("-", 2, lambda a, b: a - b, np.subtract)
+multiplication = Fonction("*", 2, lambda a, b: a * b, np.multiply)
+division = Fonction("/", 2, noyaux.division, noyaux.division)
+puissance = Fonction("^", 2, noyaux.puissance, noyaux.puissance)
+exponentielle = Fonction("exp", 1, noyaux.exponentielle, noyaux.exponentielle)
+cosinus = Fonction("cos", 1, np.cos, np.cos)
+sinus = Fonction("sin", 1, np.sin, np.sin)
+logarithme = Fonction("log", 1, noyaux.logarithme, noyaux.logarithme)
+valeur_absolue = Fonction("abs", 1, np.abs, np.abs)
 
 
 FONCTIONS_BASE = [
@@ -24,4 +27,4 @@ FONCTIONS_BASE = [
     sinus,
     logarithme,
     valeur_absolue,
-]
\ No newline at end of file
+]
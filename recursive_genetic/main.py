@@ -1,12 +1,12 @@
+import os
 import sys
-import numpy as np
+# Les modules communs aux deux moteurs (cible.py, ...) sont à la racine du dépôt
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PyQt5.QtWidgets import QMainWindow
 from interface import Ui_MainWindow  # Généré à partir du fichier .ui
-from model.population import Population
-from model.terminal import Terminal
-from fonctions_base import FONCTIONS_BASE
 from PyQt5.QtWidgets import QApplication
-import matplotlib.pyplot as plt
+from simulation import executer
+from graphique import afficher_graphique
 
 
 def main(config_file):
@@ -14,73 +14,29 @@ def main(config_file):
     Fonction principale pour exécuter une simulation à partir d'un fichier de configuration.
     :param config_file: Chemin du fichier contenant les paramètres de la simulation.
     """
-    # Lire les paramètres depuis le fichier
+    # Lire les paramètres et lancer l'évolution (voir simulation.py)
     try:
-        with open(config_file, "r") as f:
-            params = {}
-            for line in f:
-                key, value = line.strip().split(" = ")
-                params[key] = value
-    except Exception as e:
-        print(f"Erreur lors de la lecture du fichier de configuration : {e}")
-        return
-
-    # Convertir les paramètres dans les bons types
-    try:
-        fonction_cible_str = params["fonction_cible"]
-        intervalle_min = float(params["intervalle_min"])
-        intervalle_max = float(params["intervalle_max"])
-        nombre_points = int(params["nombre_points"])
-        taille_population = int(params["taille_population"])
-        profondeur_max = int(params["profondeur_max"])
-        proba_crossover = float(params["proba_crossover"])
-        proba_mutation = float(params["proba_mutation"])
-        proba_mutation_point = float(params["proba_mutation_point"])
-        generations_max = int(params["generations_max"])
-        fitness_cible = float(params["fitness_cible"])
-        fonctions = [key for key, val in params.items() if val == "True"]
+        resultat = executer(config_file, afficher_stats=True)
     except KeyError as e:
         print(f"Paramètre manquant dans le fichier de configuration : {e}")
         return
     except ValueError as e:
         print(f"Erreur de conversion de paramètre : {e}")
         return
-
-    # Définir la fonction cible
-    def fonction_cible(x):
-        return eval(fonction_cible_str)
-
-    # Créer les points d'échantillonnage
-    points = [{"x": x} for x in np.linspace(intervalle_min, intervalle_max, nombre_points)]
-
-    # Configurer les terminaux et les fonctions
-    term_set = [Terminal("x")] + [Terminal(i) for i in range(-2, 2)]
-    func_set = [f for f in FONCTIONS_BASE if f.nom in fonctions]
-
-    # Créer et générer la population
-    population = Population(
-        taille=taille_population,
-        profondeur_max=profondeur_max,
-        term_set=term_set,
-        func_set=func_set,
-        fonction_cible=fonction_cible,
-        points=points,
-        proba_crossover=proba_crossover,
-        proba_mutation=proba_mutation,
-        proba_mutation_point=proba_mutation_point,
-    )
-    population.generer_population()
-
-    # Lancer l'évolution
-    meilleur_arbre = population.evoluer(generations_max=generations_max, fitness_cible=fitness_cible)
+    except OSError as e:
+        print(f"Erreur lors de la lecture du fichier de configuration : {e}")
+        return
 
     # Afficher les résultats
     print("=== Résultat Final ===")
-    print(f"Meilleur individu : {meilleur_arbre}")
-    print(f"Fitness : {meilleur_arbre.fitness(fonction_cible, points)}")
+    print(f"Meilleur individu : {resultat['meilleur']}")
+    print(f"Fitness : {resultat['fitness']}")
+    print(f"Cache fitness : {resultat['cache']}")
 
     # Afficher le graphique
-    afficher_graphique(meilleur_arbre, fonction_cible, intervalle_min, intervalle_max)
+    parametres = resultat["parametres"]
+    afficher_graphique(resultat["meilleur"], resultat["fonction_cible"],
+                       parametres["intervalle_min"], parametres["intervalle_max"])
 
 
 def sauvegarder_parametres(self, fichier="config_simulation.txt", parametres=None):
@@ -172,43 +128,6 @@ class MainApp(QMainWindow):
         sauvegarder_parametres(self, fichier="config_simulation.txt", parametres=parametres)
         main("config_simulation.txt")
 
-def afficher_graphique(meilleur_arbre, fonction_cible, intervalle_min, intervalle_max):
-    """
-    Affiche le graphique comparant la fonction cible et la fonction trouvée.
-    :param meilleur_arbre: L'arbre trouvé par l'algorithme génétique.
-    :param fonction_cible: La fonction cible à approximer.
-    :param intervalle_min: Borne inférieure de l'intervalle d'échantillonnage.
-    :param intervalle_max: Borne supérieure de l'intervalle d'échantillonnage.
-    """
-
-    # Générer les valeurs pour le graphique
-    x_vals = np.linspace(intervalle_min, intervalle_max, 500)
-    y_cible = [fonction_cible(x) for x in x_vals]
-
-    def evaluer_fonction_trouvee(arbre, x_vals):
-        y_vals = []
-        for x in x_vals:
-            try:
-                y_vals.append(arbre.evaluer({"x": x}))
-            except Exception:
-                y_vals.append(float("inf"))  # En cas d'erreur (ex. division par zéro)
-        return np.array(y_vals)
-
-    y_trouvee = evaluer_fonction_trouvee(meilleur_arbre, x_vals)
-
-    # Tracer les graphiques
-    plt.figure(figsize=(10, 6))
-    plt.plot(x_vals, y_cible, label="Fonction cible", color="blue", linewidth=2)
-    plt.plot(x_vals, y_trouvee, label="Fonction trouvée", color="red", linestyle="--", linewidth=2)
-    plt.xlabel("x", fontsize=14)
-    plt.ylabel("f(x)", fontsize=14)
-    plt.title("Comparaison entre la fonction cible et la fonction trouvée", fontsize=16)
-    plt.axhline(0, color="black", linewidth=0.5, linestyle="--")
-    plt.axvline(0, color="black", linewidth=0.5, linestyle="--")
-    plt.legend(fontsize=12)
-    plt.grid(alpha=0.3)
-    plt.show()
-
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = MainApp()
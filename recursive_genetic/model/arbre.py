@@ -1,6 +1,44 @@
 import random
+import numpy as np
 from model.noeud import NoeudInterne, NoeudExterne
 from model.terminal import Terminal
+from model.table_noeuds import TableNoeuds
+from noyaux import erreur_quadratique_moyenne, course_erreur_quadratique, en_flottants
+
+def points_en_colonnes(points):
+    """
+    Transforme une liste de points (dictionnaires) en colonnes NumPy.
+    :param points: Liste de dictionnaires, par exemple [{"x": 1}, {"x": 2}].
+    :return: Dictionnaire associant chaque variable au tableau de ses valeurs.
+    """
+    if not points:
+        return {}
+    return {nom: np.array([point[nom] for point in points], dtype=float) for nom in points[0]}
+
+
+def calculer_valeurs_cible(fonction_cible, points, colonnes=None):
+    """
+    Calcule le vecteur des valeurs de la fonction cible sur des points (NaN là où elle n'est pas définie).
+    :param fonction_cible: Fonction cible, vectorielle de préférence.
+    :param points: Liste de dictionnaires représentant les points d'échantillonnage.
+    :param colonnes: Colonnes de ces points (calculées si absentes).
+    """
+    if colonnes is None:
+        colonnes = points_en_colonnes(points)
+    try:
+        with np.errstate(all="ignore"):
+            valeurs = np.asarray(fonction_cible(**colonnes), dtype=float)
+        return np.broadcast_to(valeurs, (len(points),)).copy()
+    except Exception:
+        # Fonction cible non vectorisable (ex. math.cos) : évaluation point par point
+        valeurs = []
+        for point in points:
+            try:
+                valeurs.append(fonction_cible(**point))
+            except Exception:
+                valeurs.append(np.nan)
+        return np.array(valeurs, dtype=float)
+
 
 class Arbre:
 
@@ -15,14 +53,40 @@ class Arbre:
         self.func_set = func_set
         self.racine = None
         self.fitness_score = None
-    
-    def profondeur(self, racine):
-        if racine is None:
-            return 0
+
+    @property
+    def racine(self):
+        return self._racine
+
+    @racine.setter
+    def racine(self, racine):
+        # La table des nœuds sera reconstruite à la demande
+        self._racine = racine
+        self._table = None
+
+    def table(self):
+        """Table préfixe des nœuds (parents, profondeurs, tailles, hauteurs), construite une fois."""
+        if self._table is None:
+            self._table = TableNoeuds.construire(self._racine)
+        return self._table
+
+    def _appliquer_table(self, table):
+        self._racine = table.noeuds[0]
+        self._table = table
+        self.fitness_score = None
+
+    def profondeur(self, racine=None):
+        """Profondeur de l'arbre (ou d'un sous-arbre), comptée en nœuds."""
+        if racine is None or racine is self._racine:
+            return int(self.table().hauteurs[0]) + 1 if self._racine is not None else 0
         if isinstance(racine, NoeudExterne):
             return 1
         if isinstance(racine, NoeudInterne):
             return 1 + max(self.profondeur(enfant) for enfant in racine.enfants)
+
+    def taille(self):
+        """Nombre de nœuds de l'arbre."""
+        return len(self.table())
     def generer_grow(self):
         self.racine = self._generer_noeud(self.profondeur_max, method="grow")
 
@@ -34,8 +98,8 @@ class Arbre:
         if profondeur == 0:
             terminal = random.choice(self.term_set)
             if terminal.valeur == "cst":
-                    return NoeudExterne(Terminal(int(random.uniform(-10, 10))), profondeur=profondeur)
-            return NoeudExterne(terminal, profondeur)
+                    return NoeudExterne(Terminal(int(random.uniform(-10, 10))))
+            return NoeudExterne(terminal)
 
         if method == "grow":
             # On décide aléatoirement de créer un terminal ou un nœud interne
@@ -43,25 +107,65 @@ class Arbre:
                 terminal = random.choice(self.term_set)
                 
                 if terminal.valeur == "cst":
-                    return NoeudExterne(Terminal(int(random.uniform(-10, 10))), profondeur=profondeur)
-                return NoeudExterne(terminal, profondeur=profondeur)
+                    return NoeudExterne(Terminal(int(random.uniform(-10, 10))))
+                return NoeudExterne(terminal)
 
         # Méthode full (ou grow qui décide de générer un nœud interne)
         fonction = random.choice(self.func_set)
         enfants = [self._generer_noeud(profondeur - 1, method) for _ in range(fonction.argument)]
         return NoeudInterne(fonction, enfants)
     def update_profondeur(self):
-        self.racine.update_profondeur(0)
+        # Les nœuds sont partagés entre arbres : leur profondeur n'est pas stockée
+        pass
 
-    def evaluer(self, variables):
+    def evaluer(self, variables, borne=None):
         """
-        Évalue l'arbre pour un dictionnaire de variables.
+        Évalue l'arbre pour un dictionnaire de variables, en float64.
         :param variables: Dictionnaire associant des variables à leurs valeurs.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
         :return: Résultat de l'évaluation.
         """
         if not self.racine:
             raise ValueError("L'arbre n'a pas été généré.")
-        return self.racine.evaluer(variables)
+        return self.racine.evaluer(en_flottants(variables), borne)
+
+    def evaluer_vect(self, colonnes, memo=None, garder_sorties=False, borne=None):
+        """
+        Évalue l'arbre en une seule passe sur des colonnes de valeurs.
+        :param colonnes: Dictionnaire associant des variables à des tableaux NumPy.
+        :param memo: Cache des sorties de sous-arbres partagé par la population (optionnel).
+        :param garder_sorties: Si True, chaque nœud interne garde sa sortie ; seuls les nœuds
+                               créés depuis (chemins reconstruits) sont calculés aux évaluations suivantes.
+                               Les sorties gardées sont comptées dans la mémoire de memo, qui les
+                               évince comme ses entrées (sans memo, aucune sortie n'est gardée).
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Tableau des valeurs de l'arbre pour chaque point.
+        """
+        if not self.racine:
+            raise ValueError("L'arbre n'a pas été généré.")
+        with np.errstate(all="ignore"):
+            return self.racine.evaluer_vect(colonnes, memo, garder_sorties, borne)
+
+    def empreinte(self):
+        """
+        Empreinte structurelle canonique de l'arbre (indépendante de l'identité des objets),
+        valable dans le processus courant (voir empreinte_stable).
+        :return: Entier identique pour deux arbres de même structure.
+        """
+        if not self.racine:
+            raise ValueError("L'arbre n'a pas été généré.")
+        return self.racine.empreinte()
+
+    def empreinte_stable(self, table=None):
+        """
+        Empreinte structurelle sur 64 bits, identique d'un processus ou d'une session à l'autre.
+        :param table: Table d'opcodes à utiliser (construite à partir de term_set/func_set si absente).
+        :return: Entier non signé, égal à l'empreinte du programme équivalent.
+        """
+        if not self.racine:
+            raise ValueError("L'arbre n'a pas été généré.")
+        from model.programme import Programme
+        return Programme.depuis_arbre(self, table).empreinte()
 
     def __repr__(self):
         """
@@ -72,12 +176,15 @@ class Arbre:
             return "Arbre vide"
         return repr(self.racine)
 
-    def fitness(self, fonction_cible, points):
+    def fitness(self, fonction_cible, points, valeurs_cible=None, borne=None):
         """
         Calcule l'erreur quadratique moyenne (fitness) entre l'arbre et une fonction cible.
         :param fonction_cible: Fonction cible (callable Python) à approximer.
         :param points: Liste de dictionnaires représentant les points d'échantillonnage
                        (par exemple [{"x": 1, "y": 2}, {"x": 3, "y": 4}]).
+        :param valeurs_cible: Valeurs déjà calculées de la fonction cible sur ces points
+                              (voir calculer_valeurs_cible) ; évite de la réévaluer.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
         :return: Erreur quadratique moyenne entre l'arbre et la fonction cible.
         """
 
@@ -87,51 +194,80 @@ class Arbre:
         if not (self.fitness_score is None):
             return self.fitness_score
 
-        erreurs = []
+        # Les noyaux ne lèvent pas d'exception : une erreur de domaine ou un débordement
+        # donne une valeur non finie, pénalisée en une seule réduction
+        with np.errstate(all="ignore"):
+            valeurs_arbre = [self.evaluer(point, borne) for point in points]
+        if valeurs_cible is None:
+            valeurs_cible = calculer_valeurs_cible(fonction_cible, points)
+        self.fitness_score = erreur_quadratique_moyenne(valeurs_arbre, valeurs_cible)
+        return self.fitness_score
 
-        for point in points:
-            try:
-                # Évaluer l'arbre
-                valeur_arbre = self.evaluer(point)
-                # Évaluer la fonction cible
-                valeur_cible = fonction_cible(**point)
-                # Calculer la différence au carré
-                erreur = (valeur_arbre - valeur_cible) ** 2
-                erreurs.append(erreur)
-            except Exception as e:
-                # Si une évaluation échoue (ex. division par zéro), ajouter une pénalité élevée
-                erreurs.append(float("inf"))
-
-        # Retourner la moyenne des erreurs quadratiques
-        self.fitness_score = sum(erreurs) / len(erreurs)
+    def fitness_vect(self, colonnes, valeurs_cible, memo=None, garder_sorties=False, borne=None):
+        """
+        Version vectorielle de fitness : l'arbre est parcouru une seule fois
+        sur l'ensemble des points.
+        :param colonnes: Colonnes des points d'échantillonnage (voir points_en_colonnes).
+        :param valeurs_cible: Tableau des valeurs de la fonction cible sur ces points.
+        :param memo: Cache des sorties de sous-arbres (voir CacheSousArbres).
+        :param garder_sorties: Si True, réévaluation incrémentale (voir evaluer_vect).
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Erreur quadratique moyenne entre l'arbre et la fonction cible.
+        """
+        if not self.racine:
+            raise ValueError("L'arbre n'a pas été généré.")
+
+        if not (self.fitness_score is None):
+            return self.fitness_score
+
+        valeurs_arbre = self.evaluer_vect(colonnes, memo, garder_sorties, borne)
+        self.fitness_score = erreur_quadratique_moyenne(valeurs_arbre, valeurs_cible)
         return self.fitness_score
 
+    def fitness_course(self, colonnes, valeurs_cible, seuil, nb_blocs=16, borne=None):
+        """
+        Fitness vectorielle évaluée par étapes de points de plus en plus grandes, abandonnée dès que
+        l'arbre ne peut plus battre le seuil (voir course_erreur_quadratique).
+        :param colonnes: Colonnes des points d'échantillonnage.
+        :param valeurs_cible: Tableau des valeurs de la fonction cible sur ces points.
+        :param seuil: Fitness à battre (par exemple celle du pire individu de la population).
+        :param nb_blocs: Nombre de blocs de points.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Couple (fitness ou borne inférieure, interrompue) ; fitness_score n'est
+                 renseigné que si l'évaluation est allée à son terme.
+        """
+        if not self.racine:
+            raise ValueError("L'arbre n'a pas été généré.")
+
+        if not (self.fitness_score is None):
+            return self.fitness_score, False
+
+        def evaluer_bloc(indices):
+            return self.evaluer_vect({nom: colonne[indices] for nom, colonne in colonnes.items()}, borne=borne)
+
+        fitness, interrompue = course_erreur_quadratique(evaluer_bloc, valeurs_cible, seuil, nb_blocs)
+        if not interrompue:
+            self.fitness_score = fitness
+        return fitness, interrompue
+
     def crossover(self, autre_arbre):
         """
         Réalise un crossover entre cet arbre et un autre arbre.
+        Les parents ne sont pas modifiés : le descendant partage avec eux tous les
+        sous-arbres inchangés et seul le chemin jusqu'au point de greffe est recréé.
         :param autre_arbre: L'autre arbre avec lequel croiser cet arbre.
         :return: Un nouvel arbre (descendant).
         """
-        # Copier les deux arbres pour préserver les originaux
-        arbre1 = self._copier_arbre(self.racine)
-        arbre2 = self._copier_arbre(autre_arbre.racine)
-
-        # Sélectionner un sous-arbre aléatoire dans chaque arbre
-        noeud1, parent1 = self._selectionner_noeud_aleatoire(arbre1)
-        noeud2, _ = self._selectionner_noeud_aleatoire(arbre2, prof_min=noeud1.profondeur, interne=isinstance(noeud1, NoeudInterne))
-
-        # Remplacer le sous-arbre sélectionné dans arbre1 par celui de arbre2
-        if parent1 is None:
-            # Si le parent est None, on remplace la racine
-            descendant = noeud2
-        else:
-            index = parent1.enfants.index(noeud1)
-            parent1.enfants[index] = noeud2
-            descendant = arbre1
+        # Sélectionner un nœud dans chaque arbre ; le sous-arbre greffé doit tenir
+        # dans la profondeur restante
+        table1, table2 = self.table(), autre_arbre.table()
+        i = self._selectionner_indice()
+        place = self.profondeur_max - int(table1.profondeurs[i])
+        j = autre_arbre._selectionner_indice(np.flatnonzero(table2.hauteurs <= max(place, 0)))
 
-        # Créer un nouvel arbre pour le descendant
+        # Remplacer le sous-arbre sélectionné dans le premier arbre par celui du second
         nouvel_arbre = Arbre(self.profondeur_max, self.term_set, self.func_set)
-        nouvel_arbre.racine = descendant
+        nouvel_arbre._appliquer_table(table1.greffer(i, table2.sous_table(j)))
         return nouvel_arbre
 
     def mutation(self):
@@ -142,7 +278,9 @@ class Arbre:
             raise ValueError("L'arbre doit être généré avant d'appliquer une mutation.")
 
         # Sélectionner un nœud aléatoire
-        noeud, parent = self._selectionner_noeud_aleatoire(self.racine)
+        table = self.table()
+        i = self._selectionner_indice()
+        noeud = table.noeuds[i]
 
         # Appliquer une mutation
         if isinstance(noeud, NoeudExterne):
@@ -153,87 +291,54 @@ class Arbre:
             else: nouveau_noeud = NoeudExterne(nouveau_terminal)
         elif isinstance(noeud, NoeudInterne):
             # Remplacer un sous-arbre par un nouvel arbre généré
-            nouveau_noeud = self._generer_noeud(self.profondeur_max-noeud.profondeur, method="grow")
+            nouveau_noeud = self._generer_noeud(self.profondeur_max - int(table.profondeurs[i]), method="grow")
         else:
             raise ValueError("Type de nœud inconnu pour mutation.")
 
-        # Si le nœud est la racine
-        if parent is None:
-            self.racine = nouveau_noeud
-        else:
-            # Remplacer le nœud dans son parent
-            index = parent.enfants.index(noeud)
-            parent.enfants[index] = nouveau_noeud
-        self.racine.update_profondeur(0)
+        self._appliquer_table(table.greffer(i, TableNoeuds.construire(nouveau_noeud)))
 
-    def _copier_arbre(self, noeud):
+    def _selectionner_indice(self, candidats=None):
         """
-        Copie récursivement un arbre à partir de son nœud racine.
-        :param noeud: Nœud racine de l'arbre à copier.
-        :return: Copie indépendante de l'arbre.
+        Tire l'indice préfixe d'un nœud, interne avec 90 % de chances s'il en existe.
+        Sans candidats, le tirage est uniforme dans chaque catégorie et en temps constant.
+        :param candidats: Indices autorisés (tous les nœuds par défaut).
         """
-        if isinstance(noeud, NoeudExterne):
-            return NoeudExterne(noeud.terminal)
-        elif isinstance(noeud, NoeudInterne):
-            enfants_copies = [self._copier_arbre(enfant) for enfant in noeud.enfants]
-            return NoeudInterne(noeud.fonction, enfants_copies)
+        table = self.table()
+        if candidats is None:
+            internes, externes = table.internes, table.externes
         else:
-            raise ValueError("Type de nœud inconnu lors de la copie.")
-
-    def _selectionner_noeud_aleatoire(self, noeud, parent=None, prof_min=float("inf"), interne=None):
-        """
-        Sélectionne un nœud aléatoire dans un arbre avec une probabilité
-        de 90 % pour choisir un nœud interne.
-        :param noeud: Le nœud actuel.
-        :param parent: Le parent du nœud actuel.
-        :return: Tuple (nœud sélectionné, parent).
-        """
-        # Si le nœud est une feuille, on le retourne directement
-        if isinstance(noeud, NoeudExterne):
-            return noeud, parent
-
-        # Construire une liste de tous les nœuds internes et externes
-        noeuds_internes = [(noeud, parent)] if isinstance(noeud, NoeudInterne) else []
-        noeuds_externes = []
-
-        for enfant in noeud.enfants:
-            if enfant.profondeur < prof_min:
-                continue
-            elif isinstance(enfant, NoeudInterne):
-                noeuds_internes.append((enfant, noeud))
-            elif isinstance(enfant, NoeudExterne):
-                noeuds_externes.append((enfant, noeud))
-            else:
-                raise ValueError("Type de nœud inconnu lors de la sélection.")
-
-        # Sélectionner un nœud avec 90% de chances pour un nœud interne
-        if noeuds_internes and (not noeuds_externes or (interne==True or random.random() < 0.9)):
-            return random.choice(noeuds_internes)
-
-        # Sinon, retourner un nœud externe
-        return random.choice(noeuds_externes)
+            internes = candidats[table.hauteurs[candidats] > 0]
+            externes = candidats[table.hauteurs[candidats] == 0]
+        if len(internes) and (not len(externes) or random.random() < 0.9):
+            return int(internes[random.randrange(len(internes))])
+        return int(externes[random.randrange(len(externes))])
 
     def point_mutation(self):
         """
         Applique une mutation ponctuelle (point mutation) sur cet arbre.
         Si un nœud interne est sélectionné, sa fonction est remplacée par une autre
         fonction avec le même nombre d'arguments.
-        Si un nœud externe est sélectionné, son terminal est remplacé par un autre terminal.
+        Si un nœud externe est sélectionné, son terminal est remplacé par une nouvelle constante.
         """
         if not self.racine:
             raise ValueError("L'arbre doit être généré avant d'appliquer une mutation.")
 
         # Sélectionner un nœud aléatoire
-        noeud, _ = self._selectionner_noeud_aleatoire(self.racine)
+        table = self.table()
+        i = self._selectionner_indice()
+        noeud = table.noeuds[i]
+        greffon = table.sous_table(i)
 
         if isinstance(noeud, NoeudInterne):
             # Mutation de fonction : remplacer par une autre fonction avec le même nombre d'arguments
             nouvelle_fonction = random.choice(
                 [f for f in self.func_set if f.argument == noeud.fonction.argument]
             )
-            noeud.fonction = nouvelle_fonction
+            greffon.noeuds[0] = NoeudInterne(nouvelle_fonction, noeud.enfants)
         elif isinstance(noeud, NoeudExterne):
-            # Mutation de terminal : remplacer par un autre terminal
-            noeud.terminal.value = random.uniform(-10, 10)
+            # Mutation de terminal : remplacer par une nouvelle constante
+            greffon.noeuds[0] = NoeudExterne(Terminal(random.uniform(-10, 10)))
         else:
             raise ValueError("Type de nœud inconnu pour mutation.")
+        # La forme ne change pas : seuls le nœud et ses ancêtres sont recréés
+        self._appliquer_table(table.greffer(i, greffon))
@@ -0,0 +1,166 @@
+import multiprocessing
+import random
+import traceback
+import numpy as np
+from model.population import Population
+from model.programme import TableOpcodes
+from model.serialisation import encoder_lot, decoder_individus
+
+"""Modèle en îles : plusieurs populations évoluent dans des processus séparés.
+
+Chaque île est une Population complète avec son propre générateur aléatoire et,
+éventuellement, ses propres paramètres. Toutes les `intervalle_migration`
+générations, le processus principal récupère les meilleurs individus de chaque
+île et les envoie à l'île voisine (anneau) ou à une île tirée au hasard. Les
+migrants de chaque île traversent les tubes en un seul lot au format binaire
+compact de serialisation.py."""
+
+TOPOLOGIES = ("anneau", "aleatoire")
+
+
+def _decoder(lot, parametres, table):
+    return decoder_individus(lot, parametres["profondeur_max"], parametres["term_set"], parametres["func_set"],
+                             table, parametres.get("representation", "arbre"))
+
+
+def _ile(connexion, parametres, graine):
+    """Boucle d'une île : attend les ordres du processus principal et y répond."""
+    try:
+        random.seed(graine)
+        population = Population(**parametres, graine=graine)
+        table = TableOpcodes(population.term_set, population.func_set)
+        population.generer_population()
+        generation = 0
+        while True:
+            ordre = connexion.recv()
+            if ordre[0] == "evoluer":
+                _, nb_generations, fitness_cible, nombre_migrants, immigrants = ordre
+                population.accueillir([individu for lot in immigrants for individu in _decoder(lot, parametres, table)])
+                for _ in range(nb_generations):
+                    if population.meilleur_complet()[1] <= fitness_cible:
+                        break
+                    population.preparer_generation(generation)
+                    population.effectuer_crossover()
+                    generation += 1
+                emigrants = encoder_lot(population.emigrants(nombre_migrants), table)
+                # Le minimum rapporté est la fitness du meilleur individu sur tous les points
+                statistiques = (population.meilleur_complet()[1],) + population.index.statistiques()[1:]
+                connexion.send(("ok", statistiques, emigrants))
+            elif ordre[0] == "meilleur":
+                meilleur, fitness = population.meilleur_complet()
+                connexion.send(("ok", fitness, encoder_lot([meilleur], table)))
+            else:
+                break
+        population.fermer()
+    except Exception:
+        connexion.send(("erreur", traceback.format_exc()))
+    finally:
+        connexion.close()
+
+
+class Archipel:
+    """Ensemble de populations évoluant en parallèle et échangeant leurs meilleurs individus."""
+
+    def __init__(self, nb_iles, parametres, parametres_iles=None, topologie="anneau",
+                 nb_migrants=2, intervalle_migration=5, graine=None):
+        """
+        :param nb_iles: Nombre d'îles (un processus par île).
+        :param parametres: Arguments de Population communs à toutes les îles (sans `graine`).
+                           Avec la méthode de démarrage "spawn", fonction_cible doit être picklable.
+        :param parametres_iles: Liste optionnelle (une entrée par île) de paramètres remplaçant
+                                ceux de `parametres`, par exemple taille_tournoi ou proba_crossover.
+        :param topologie: "anneau" (l'île i envoie à l'île i+1) ou "aleatoire" (destination tirée à chaque migration).
+        :param nb_migrants: Nombre de meilleurs individus envoyés par chaque île.
+        :param intervalle_migration: Nombre de générations entre deux migrations.
+        :param graine: Graine dont sont dérivés les générateurs de chaque île.
+        """
+        if topologie not in TOPOLOGIES:
+            raise ValueError(f"Topologie inconnue : {topologie} (attendu : {', '.join(TOPOLOGIES)}).")
+        if parametres_iles is not None and len(parametres_iles) != nb_iles:
+            raise ValueError("parametres_iles doit contenir une entrée par île.")
+        self.nb_iles = nb_iles
+        self.parametres = parametres
+        self.parametres_iles = parametres_iles or [{} for _ in range(nb_iles)]
+        self.topologie = topologie
+        self.nb_migrants = nb_migrants
+        self.intervalle_migration = intervalle_migration
+        sequences = np.random.SeedSequence(graine).spawn(nb_iles + 1)
+        self.graines = [int(sequence.generate_state(1)[0]) for sequence in sequences[:nb_iles]]
+        self.rng = np.random.default_rng(sequences[-1])
+        self.historique = []
+
+    def _destinations(self):
+        """Renvoie, pour chaque île, l'île qui reçoit ses migrants."""
+        if self.topologie == "anneau" or self.nb_iles < 2:
+            return [(i + 1) % self.nb_iles for i in range(self.nb_iles)]
+        decalages = self.rng.integers(1, self.nb_iles, size=self.nb_iles)
+        return [int((i + decalage) % self.nb_iles) for i, decalage in enumerate(decalages)]
+
+    @staticmethod
+    def _recevoir(connexion):
+        reponse = connexion.recv()
+        if reponse[0] == "erreur":
+            raise RuntimeError(f"Erreur dans une île :\n{reponse[1]}")
+        return reponse[1:]
+
+    def evoluer(self, generations_max=100, fitness_cible=1e-6, afficher_stats=True):
+        """
+        Lance l'évolution de toutes les îles.
+        :param generations_max: Nombre maximal de générations de chaque île.
+        :param fitness_cible: Fitness minimale à atteindre (critère d'arrêt global).
+        :param afficher_stats: Si True, affiche la meilleure fitness de chaque île à chaque migration.
+        :return: Le meilleur individu de l'archipel.
+        """
+        connexions, processus = [], []
+        try:
+            for i in range(self.nb_iles):
+                parent, enfant = multiprocessing.Pipe()
+                ile = multiprocessing.Process(
+                    target=_ile, args=(enfant, {**self.parametres, **self.parametres_iles[i]}, self.graines[i]),
+                    daemon=True,
+                )
+                ile.start()
+                enfant.close()
+                connexions.append(parent)
+                processus.append(ile)
+            return self._evoluer(connexions, generations_max, fitness_cible, afficher_stats)
+        finally:
+            for connexion in connexions:
+                try:
+                    connexion.send(("fin",))
+                except (BrokenPipeError, OSError):
+                    pass
+            for ile in processus:
+                ile.join()
+
+    def _evoluer(self, connexions, generations_max, fitness_cible, afficher_stats):
+        immigrants = [[] for _ in range(self.nb_iles)]
+        generation = 0
+        while generation < generations_max:
+            nb_generations = min(self.intervalle_migration, generations_max - generation)
+            for connexion, arrivants in zip(connexions, immigrants):
+                connexion.send(("evoluer", nb_generations, fitness_cible, self.nb_migrants, arrivants))
+            reponses = [self._recevoir(connexion) for connexion in connexions]
+            generation += nb_generations
+
+            minimums = [statistiques[0] for statistiques, _ in reponses]
+            self.historique.append(minimums)
+            if afficher_stats:
+                print(f"Génération {generation} : meilleures fitness par île {minimums}")
+            if min(minimums) <= fitness_cible:
+                break
+
+            immigrants = [[] for _ in range(self.nb_iles)]
+            for (_, emigrants), destination in zip(reponses, self._destinations()):
+                immigrants[destination].append(emigrants)
+
+        # Meilleur individu global
+        meilleurs = []
+        for connexion in connexions:
+            connexion.send(("meilleur",))
+            meilleurs.append(self._recevoir(connexion))
+        fitness, lot = min(meilleurs, key=lambda meilleur: meilleur[0])
+        individu, = _decoder(lot, self.parametres,
+                             TableOpcodes(self.parametres["term_set"], self.parametres["func_set"]))
+        individu.fitness_score = fitness
+        return individu
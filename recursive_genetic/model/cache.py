@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class CacheFitness:
+    """Cache LRU des fitness, indexé par (empreinte structurelle, empreinte des données)."""
+
+    def __init__(self, taille_max=10000):
+        """
+        :param taille_max: Nombre maximal d'entrées conservées (0 désactive le cache).
+        """
+        self.taille_max = taille_max
+        self.entrees = OrderedDict()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle):
+        """
+        Renvoie la fitness associée à la clé, ou None si elle est absente.
+        :param cle: Clé (empreinte de l'arbre, empreinte des données).
+        """
+        fitness = self.entrees.get(cle)
+        if fitness is None:
+            self.echecs += 1
+            return None
+        self.entrees.move_to_end(cle)
+        self.succes += 1
+        return fitness
+
+    def enregistrer(self, cle, fitness):
+        """
+        Mémorise une fitness en évinçant l'entrée la moins récemment utilisée si besoin.
+        :param cle: Clé (empreinte de l'arbre, empreinte des données).
+        :param fitness: Valeur à mémoriser.
+        """
+        if self.taille_max <= 0:
+            return
+        self.entrees[cle] = fitness
+        self.entrees.move_to_end(cle)
+        while len(self.entrees) > self.taille_max:
+            self.entrees.popitem(last=False)
+            self.evictions += 1
+
+    def statistiques(self):
+        """Renvoie les compteurs du cache sous forme de dictionnaire."""
+        total = self.succes + self.echecs
+        return {
+            "Succès": self.succes,
+            "Échecs": self.echecs,
+            "Évictions": self.evictions,
+            "Taux de succès": self.succes / total if total else 0.0,
+            "Entrées": len(self.entrees),
+        }
+
+
+class CacheSousArbres:
+    """
+    Cache des sorties vectorielles des sous-arbres, partagé par toute la population.
+    Les entrées sont indexées par (empreinte structurelle du sous-arbre, borne) ; celles qui
+    n'ont pas servi pendant une génération sont évincées au début de la suivante.
+    Les sorties gardées par les nœuds (réévaluation incrémentale, voir retenir) sont comptées
+    dans la même mémoire et suivent la même éviction : un nœud évincé oublie sa sortie.
+    """
+
+    def __init__(self, memoire_max=64 * 2**20):
+        """
+        :param memoire_max: Mémoire maximale occupée par les vecteurs, en octets (0 désactive le cache).
+        """
+        self.memoire_max = memoire_max
+        self.memoire = 0
+        self.entrees = OrderedDict()
+        self.actives = set()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle):
+        """
+        Renvoie le vecteur de sortie d'un sous-arbre, ou None s'il est absent.
+        :param cle: Clé (empreinte structurelle du sous-arbre, borne de magnitude).
+        """
+        valeurs = self.entrees.get(cle)
+        if valeurs is None:
+            self.echecs += 1
+            return None
+        self.entrees.move_to_end(cle)
+        self.actives.add(cle)
+        self.succes += 1
+        return valeurs
+
+    def _ajouter(self, cle, valeurs):
+        self.entrees[cle] = valeurs
+        self.actives.add(cle)
+        self.memoire += np.asarray(valeurs).nbytes
+        while self.memoire > self.memoire_max:
+            self._retirer(next(iter(self.entrees)))
+            self.evictions += 1
+
+    def _retirer(self, cle):
+        self.memoire -= np.asarray(self.entrees.pop(cle)).nbytes
+        # Sortie gardée par un nœud (les autres clés sont des tuples)
+        if not isinstance(cle, tuple):
+            cle.oublier_sortie()
+
+    def enregistrer(self, cle, valeurs):
+        """
+        Mémorise la sortie d'un sous-arbre (en lecture seule, car partagée entre arbres).
+        :param cle: Clé (empreinte structurelle du sous-arbre, borne de magnitude).
+        :param valeurs: Tableau (ou scalaire) NumPy produit par le sous-arbre.
+        """
+        taille = np.asarray(valeurs).nbytes
+        if taille > self.memoire_max or cle in self.entrees:
+            return
+        if isinstance(valeurs, np.ndarray):
+            valeurs.flags.writeable = False
+        self._ajouter(cle, valeurs)
+
+    def retenir(self, noeud, valeurs):
+        """
+        Compte la sortie gardée par un nœud dans la mémoire du cache ; si elle est évincée,
+        le nœud l'oublie (voir NoeudInterne.oublier_sortie).
+        :param noeud: Nœud interne qui garde sa sortie.
+        :param valeurs: Sortie du nœud.
+        :return: True si la sortie peut être gardée, False si elle dépasse à elle seule la mémoire du cache.
+        """
+        if noeud in self.entrees:
+            # Même nœud sur d'autres colonnes ou avec une autre borne : l'ancienne sortie est remplacée
+            self.memoire -= np.asarray(self.entrees.pop(noeud)).nbytes
+        if np.asarray(valeurs).nbytes > self.memoire_max:
+            return False
+        self._ajouter(noeud, valeurs)
+        return True
+
+    def marquer(self, noeud):
+        """
+        Marque comme utilisée la sortie gardée par un nœud (elle reste en cache une génération de plus).
+        :param noeud: Nœud interne dont la sortie vient d'être relue.
+        """
+        if noeud in self.entrees:
+            self.entrees.move_to_end(noeud)
+            self.actives.add(noeud)
+
+    def nouvelle_generation(self):
+        """Évince les entrées froides (inutilisées pendant la génération écoulée)."""
+        for cle in [c for c in self.entrees if c not in self.actives]:
+            self._retirer(cle)
+            self.evictions += 1
+        self.actives.clear()
+
+    def vider(self):
+        """Vide le cache (à appeler si les points d'échantillonnage changent)."""
+        for cle in list(self.entrees):
+            self._retirer(cle)
+        self.actives.clear()
+
+    def statistiques(self):
+        """Renvoie les compteurs du cache sous forme de dictionnaire."""
+        total = self.succes + self.echecs
+        return {
+            "Succès": self.succes,
+            "Échecs": self.echecs,
+            "Évictions": self.evictions,
+            "Taux de succès": self.succes / total if total else 0.0,
+            "Entrées": len(self.entrees),
+            "Mémoire": self.memoire,
+        }
@@ -0,0 +1,133 @@
+import heapq
+import numpy as np
+
+
+class IndexFitness:
+    """
+    Conteneur d'individus indexé par fitness.
+    Chaque individu occupe un emplacement fixe ; un tableau NumPy parallèle garde sa
+    fitness. Deux tas de couples (fitness, emplacement), l'un ordonné par le minimum et
+    l'autre par le maximum, donnent le meilleur et le pire sans parcourir la population
+    et sont mis à jour en O(log n). Une entrée périmée (fitness actualisée ou individu
+    remplacé) reste dans les tas : elle est ignorée quand elle arrive au sommet, et les
+    tas sont reconstruits quand les entrées périmées deviennent majoritaires.
+    """
+
+    def __init__(self, capacite=0):
+        """
+        :param capacite: Taille prévue de la population (le tableau s'agrandit si besoin).
+        """
+        self.individus = []
+        self.fitness = np.empty(capacite, dtype=np.float64)
+        # Version de la fitness de chaque emplacement : une entrée des tas n'est valide
+        # que si elle porte la version courante de son emplacement
+        self._versions = []
+        self._tas_min = []
+        self._tas_max = []
+
+    def __len__(self):
+        return len(self.individus)
+
+    def __iter__(self):
+        return iter(self.individus)
+
+    @staticmethod
+    def _cle(fitness):
+        # NaN casserait l'ordre des tas : il est classé comme une pénalité infinie
+        return float("inf") if fitness != fitness else fitness
+
+    def _indexer(self, emplacement):
+        fitness = float(self.fitness[emplacement])
+        version = self._versions[emplacement]
+        heapq.heappush(self._tas_min, (fitness, emplacement, version))
+        # Tas du maximum : à fitness égale, le plus grand emplacement est le pire
+        heapq.heappush(self._tas_max, (-fitness, -emplacement, version))
+        if len(self._tas_min) > 2 * len(self.individus) + 16:
+            self._compacter()
+
+    def _compacter(self):
+        # Retire toutes les entrées périmées (coût amorti constant par mise à jour)
+        self._tas_min = [entree for entree in self._tas_min if entree[2] == self._versions[entree[1]]]
+        self._tas_max = [entree for entree in self._tas_max if entree[2] == self._versions[-entree[1]]]
+        heapq.heapify(self._tas_min)
+        heapq.heapify(self._tas_max)
+
+    def _premiers(self, tas, signe, nombre):
+        # Les `nombre` premières entrées valides d'un tas, dans l'ordre du tas ; signe vaut -1
+        # pour le tas du maximum, dont les emplacements sont stockés négativement
+        entrees = []
+        while tas and len(entrees) < nombre:
+            entree = heapq.heappop(tas)
+            if entree[2] == self._versions[signe * entree[1]]:
+                entrees.append(entree)
+        for entree in entrees:
+            heapq.heappush(tas, entree)
+        return [signe * emplacement for _, emplacement, _ in entrees]
+
+    def ajouter(self, individu, fitness):
+        """
+        Ajoute un individu et renvoie son emplacement.
+        :param individu: Arbre à ajouter.
+        :param fitness: Fitness de l'arbre.
+        """
+        emplacement = len(self.individus)
+        if emplacement == len(self.fitness):
+            self.fitness = np.resize(self.fitness, max(1, 2 * emplacement))
+        self.individus.append(individu)
+        self.fitness[emplacement] = self._cle(fitness)
+        self._versions.append(0)
+        self._indexer(emplacement)
+        return emplacement
+
+    def actualiser(self, emplacement, fitness):
+        """
+        Met à jour la fitness d'un individu (après une mutation par exemple).
+        :param emplacement: Emplacement de l'individu.
+        :param fitness: Nouvelle fitness.
+        """
+        self.fitness[emplacement] = self._cle(fitness)
+        self._versions[emplacement] += 1
+        self._indexer(emplacement)
+
+    def remplacer(self, emplacement, individu, fitness):
+        """
+        Remplace l'individu d'un emplacement (typiquement le pire) par un autre.
+        :param emplacement: Emplacement à réutiliser.
+        :param individu: Nouvel arbre.
+        :param fitness: Fitness du nouvel arbre.
+        """
+        self.individus[emplacement] = individu
+        self.actualiser(emplacement, fitness)
+
+    def meilleur(self):
+        """Emplacement de l'individu de plus petite fitness."""
+        return self._premiers(self._tas_min, 1, 1)[0]
+
+    def pire(self):
+        """Emplacement de l'individu de plus grande fitness."""
+        return self._premiers(self._tas_max, -1, 1)[0]
+
+    def meilleurs(self, nombre):
+        """Emplacements des `nombre` individus de plus petite fitness, du meilleur au moins bon."""
+        return self._premiers(self._tas_min, 1, nombre)
+
+    def pires(self, nombre):
+        """Emplacements des `nombre` individus de plus grande fitness, du pire au moins mauvais."""
+        return self._premiers(self._tas_max, -1, nombre)
+
+    def quantile(self, q):
+        """
+        Emplacement de l'individu situé au quantile q de la distribution des fitness
+        (les tas ne donnent pas les rangs : la population est triée, en O(n log n)).
+        :param q: Quantile entre 0 (meilleur) et 1 (pire).
+        """
+        ordre = sorted(zip(self.valeurs().tolist(), range(len(self.individus))))
+        return ordre[int(round(q * (len(ordre) - 1)))][1]
+
+    def valeurs(self):
+        """Tableau des fitness, aligné sur les emplacements."""
+        return self.fitness[:len(self.individus)]
+
+    def statistiques(self):
+        """Renvoie (minimum, moyenne, maximum) des fitness."""
+        return self.fitness[self.meilleur()], float(np.mean(self.valeurs())), self.fitness[self.pire()]
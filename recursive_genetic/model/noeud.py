@@ -1,33 +1,104 @@
+import weakref
+from noyaux import borner
+
+
 class Noeud:
-    def __init__(self, profondeur=0):
-        self.profondeur = profondeur
-    def update_profondeur(self, profondeur):
-        pass
+    """
+    Nœud persistant : une fois construit, un nœud n'est jamais modifié, ce qui permet
+    à plusieurs arbres de partager leurs sous-arbres communs par référence.
+    """
+    __slots__ = ()
 
 class NoeudExterne(Noeud):
-    def __init__(self, terminal, profondeur=0):
-        super().__init__(profondeur)
-        self.terminal = terminal
-    def evaluer(self, variables):
+    __slots__ = ("terminal", "__weakref__")
+
+    # Une seule feuille par terminal, partagée par tous les arbres
+    _instances = weakref.WeakValueDictionary()
+
+    def __new__(cls, terminal):
+        feuille = cls._instances.get(terminal)
+        if feuille is None:
+            feuille = super().__new__(cls)
+            feuille.terminal = terminal
+            cls._instances[terminal] = feuille
+        return feuille
+    def __reduce__(self):
+        return NoeudExterne, (self.terminal,)
+    def evaluer(self, variables, borne=None):
         return self.terminal.evaluer(variables)
-    def update_profondeur(self, profondeur):
-        self.profondeur = profondeur
+    def evaluer_vect(self, colonnes, memo=None, garder_sorties=False, borne=None):
+        return self.terminal.evaluer_vect(colonnes)
+    def empreinte(self):
+        # Le type distingue la constante 1 de 1.0 (évaluations différentes) ; repr évite
+        # que hash(-1) == hash(-2) ne confonde deux constantes
+        return hash((type(self.terminal.valeur).__name__, repr(self.terminal.valeur)))
     def __repr__(self):
         return repr(self.terminal)
 
 class NoeudInterne(Noeud):
-    def __init__(self, fonction, enfants, profondeur=0): #un enfant est soit un terminal soit une fonction sous la forme d'une listen donc soit un noeud interne ou externe
-        super().__init__(profondeur)
+    __slots__ = ("fonction", "enfants", "_empreinte", "_sortie", "_jeu", "_borne")
+
+    def __init__(self, fonction, enfants): #un enfant est soit un terminal soit une fonction, donc soit un noeud interne ou externe
         self.fonction = fonction
-        self.enfants = enfants
-    def update_profondeur(self, profondeur):
-        self.profondeur = profondeur
-        for enfant in self.enfants:
-            enfant.update_profondeur(profondeur + 1)
-
-    def evaluer(self, variables):
-        valeurs = [enfant.evaluer(variables) for enfant in self.enfants]
-        return self.fonction.apply(*valeurs)
+        self.enfants = tuple(enfants)
+        self._empreinte = None
+        # Sortie mémorisée, jeu de colonnes et borne pour lesquels elle est valide ; le
+        # nœud étant immuable, elle reste valable dans tous les arbres qui le partagent.
+        # Elle est comptée dans la mémoire du cache des sous-arbres, qui l'efface à l'éviction
+        self._sortie = None
+        self._jeu = None
+        self._borne = None
+
+    def remplacer_enfant(self, indice, enfant):
+        """
+        Renvoie une copie du nœud dont l'enfant d'indice donné est remplacé (le nœud n'est pas modifié).
+        :param indice: Position de l'enfant à remplacer.
+        :param enfant: Nouveau sous-arbre.
+        """
+        return NoeudInterne(self.fonction, self.enfants[:indice] + (enfant,) + self.enfants[indice + 1:])
+
+    def evaluer(self, variables, borne=None):
+        valeurs = [enfant.evaluer(variables, borne) for enfant in self.enfants]
+        return borner(self.fonction.apply(*valeurs), borne)
+
+    def evaluer_vect(self, colonnes, memo=None, garder_sorties=False, borne=None):
+        # Sortie déjà connue sur ces colonnes avec cette borne (éventuellement calculée pour un autre arbre)
+        if self._jeu is colonnes and self._borne == borne:
+            if memo is not None:
+                memo.marquer(self)
+            return self._sortie
+        # Un sous-arbre déjà évalué ailleurs dans la population n'est pas recalculé ; la borne
+        # change les sorties, elle fait donc partie de la clé
+        valeurs = None
+        if memo is not None:
+            cle = (self.empreinte(), borne)
+            valeurs = memo.obtenir(cle)
+        if valeurs is None:
+            valeurs = borner(self.fonction.apply_vect(
+                *[enfant.evaluer_vect(colonnes, memo, garder_sorties, borne) for enfant in self.enfants]
+            ), borne)
+            if memo is not None:
+                memo.enregistrer(cle, valeurs)
+        # Les sorties gardées sont bornées par la mémoire du cache des sous-arbres : sans cache, rien n'est gardé
+        if garder_sorties and memo is not None:
+            if memo.retenir(self, valeurs):
+                self._sortie = valeurs
+                self._jeu = colonnes
+                self._borne = borne
+            else:
+                self.oublier_sortie()
+        return valeurs
+
+    def oublier_sortie(self):
+        """Efface la sortie gardée par le nœud (appelé par le cache des sous-arbres à l'éviction)."""
+        self._sortie = None
+        self._jeu = None
+        self._borne = None
+
+    def empreinte(self):
+        if self._empreinte is None:
+            self._empreinte = hash((self.fonction.nom,) + tuple(enfant.empreinte() for enfant in self.enfants))
+        return self._empreinte
 
     def __repr__(self):
         if self.fonction.argument == 1:
@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from model.programme import Programme, TableOpcodes
+from model.serialisation import encoder_lot, decoder_lot
+
+"""Évaluation parallèle des fitness sur un pool de processus.
+
+Les points et le vecteur cible sont envoyés une seule fois à chaque processus
+(initialiseur) ; seuls les lots d'individus, au format binaire compact de
+serialisation.py, traversent ensuite la frontière entre processus."""
+
+# État résident de chaque processus de travail
+_ETAT = {}
+
+
+def _initialiser(colonnes, valeurs_cible, term_set, func_set, borne=None):
+    # Terminaux et fonctions sont sérialisés par valeur et par symbole, puis réinternés
+    _ETAT["colonnes"] = colonnes
+    _ETAT["valeurs_cible"] = valeurs_cible
+    _ETAT["term_set"] = term_set
+    _ETAT["func_set"] = func_set
+    _ETAT["borne"] = borne
+    _ETAT["table"] = TableOpcodes(term_set, func_set)
+
+
+def _jeu(indices):
+    # Sous-échantillon des points résidents, gardé tant que les indices ne changent pas
+    if indices is None:
+        return _ETAT["colonnes"], _ETAT["valeurs_cible"]
+    cle = indices.tobytes()
+    if _ETAT.get("cle_echantillon") != cle:
+        _ETAT["cle_echantillon"] = cle
+        _ETAT["echantillon"] = ({nom: col[indices] for nom, col in _ETAT["colonnes"].items()},
+                                _ETAT["valeurs_cible"][indices])
+    return _ETAT["echantillon"]
+
+
+def _evaluer_lot(lot, indices=None):
+    colonnes, valeurs_cible = _jeu(indices)
+    fitness = []
+    for opcodes, constantes in decoder_lot(lot):
+        programme = Programme(0, _ETAT["term_set"], _ETAT["func_set"], table=_ETAT["table"],
+                              opcodes=opcodes, constantes=constantes)
+        fitness.append(programme.fitness_vect(colonnes, valeurs_cible, _ETAT["borne"]))
+    return fitness
+
+
+def _evaluer_lot_course(lot, seuil, nb_blocs, indices=None):
+    colonnes, valeurs_cible = _jeu(indices)
+    resultats = []
+    for opcodes, constantes in decoder_lot(lot):
+        programme = Programme(0, _ETAT["term_set"], _ETAT["func_set"], table=_ETAT["table"],
+                              opcodes=opcodes, constantes=constantes)
+        resultats.append(programme.fitness_course(colonnes, valeurs_cible, seuil, nb_blocs, _ETAT["borne"]))
+    return resultats
+
+
+def decouper_par_noeuds(tailles, nombre_lots):
+    """
+    Découpe une suite d'individus en lots contigus de nombres de nœuds équilibrés.
+    :param tailles: Nombre de nœuds de chaque individu.
+    :param nombre_lots: Nombre de lots souhaité.
+    :return: Liste de couples (début, fin) d'indices.
+    """
+    cumul = np.cumsum(tailles)
+    if not len(cumul):
+        return []
+    bornes = np.searchsorted(cumul, np.linspace(0, cumul[-1], nombre_lots + 1)[1:-1], side="right")
+    bornes = [0] + sorted(set(int(b) for b in bornes) - {0, len(tailles)}) + [len(tailles)]
+    return list(zip(bornes[:-1], bornes[1:]))
+
+
+class EvaluateurParallele:
+    """Pool de processus gardant en mémoire les points et le vecteur cible."""
+
+    def __init__(self, nb_workers, colonnes, valeurs_cible, term_set, func_set, lots_par_worker=4, borne=None):
+        """
+        :param nb_workers: Nombre de processus.
+        :param colonnes: Colonnes des points d'échantillonnage.
+        :param valeurs_cible: Vecteur des valeurs cibles.
+        :param term_set: Terminaux de la population.
+        :param func_set: Fonctions de la population.
+        :param lots_par_worker: Nombre de lots par processus et par appel (équilibrage).
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        """
+        self.nb_workers = nb_workers
+        self.lots_par_worker = lots_par_worker
+        self.table = TableOpcodes(term_set, func_set)
+        self.executeur = ProcessPoolExecutor(
+            max_workers=nb_workers,
+            initializer=_initialiser,
+            initargs=(colonnes, valeurs_cible, list(term_set), list(func_set), borne),
+        )
+
+    def _soumettre(self, tache, individus, *arguments):
+        programmes = [individu if isinstance(individu, Programme) else Programme.depuis_arbre(individu, self.table)
+                      for individu in individus]
+        lots = decouper_par_noeuds([len(programme.opcodes) for programme in programmes],
+                                   self.nb_workers * self.lots_par_worker)
+        futurs = [self.executeur.submit(tache, encoder_lot(programmes[debut:fin], self.table), *arguments)
+                  for debut, fin in lots]
+        resultats = []
+        for futur in futurs:
+            resultats.extend(futur.result())
+        return resultats
+
+    def evaluer(self, individus, indices=None):
+        """
+        Calcule la fitness d'une liste d'arbres (Arbre ou Programme) en parallèle.
+        :param individus: Individus à évaluer.
+        :param indices: Indices des points du sous-échantillon à utiliser (None : tous les points).
+        :return: Liste des fitness, dans l'ordre des individus.
+        """
+        return self._soumettre(_evaluer_lot, individus, indices)
+
+    def evaluer_course(self, individus, seuil, nb_blocs=16, indices=None):
+        """
+        Évalue une liste d'arbres en parallèle en abandonnant ceux qui ne peuvent pas battre le seuil.
+        :param individus: Individus à évaluer.
+        :param seuil: Fitness à battre.
+        :param nb_blocs: Nombre de blocs de points (voir course_erreur_quadratique).
+        :param indices: Indices des points du sous-échantillon à utiliser (None : tous les points).
+        :return: Liste de couples (fitness ou borne inférieure, interrompue), dans l'ordre des individus.
+        """
+        return self._soumettre(_evaluer_lot_course, individus, seuil, nb_blocs, indices)
+
+    def fermer(self):
+        self.executeur.shutdown()
@@ -1,14 +1,24 @@
 import random
-from model.arbre import Arbre
+import numpy as np
+from model.arbre import Arbre, points_en_colonnes, calculer_valeurs_cible
+from model.programme import Programme, TableOpcodes
+from model.cache import CacheFitness, CacheSousArbres
+from model.index_fitness import IndexFitness
+from model.selection import tirer_tournois
+from model.parallele import EvaluateurParallele
 from fonction import Fonction
 from model.terminal import Terminal
-import matplotlib.pyplot as plt
 
 class Population:
     """Classe pour gérer une population d'arbres."""
 
     def __init__(self, taille, profondeur_max, term_set, func_set, fonction_cible, points,
-                 taille_tournoi=3, proba_crossover=0.8, proba_mutation=0.1, proba_mutation_point=0.05):
+                 taille_tournoi=3, proba_crossover=0.8, proba_mutation=0.1, proba_mutation_point=0.05,
+                 vectoriel=True, representation="arbre", taille_cache=10000,
+                 memoire_sous_arbres=64 * 2**20, sorties_incrementales=False, graine=None,
+                 nb_workers=0, borne_magnitude=None, budget_operations=None,
+                 echantillonnage=None, taille_echantillon=None, periode_echantillon=1, nb_elites=3,
+                 nb_blocs_course=0):
         """
         Initialise la population d'arbres avec des probabilités pour les opérations génétiques.
         :param taille: Taille totale de la population.
@@ -21,6 +31,30 @@ class Population:
         :param proba_crossover: Probabilité de réaliser un crossover (par défaut 0.8).
         :param proba_mutation: Probabilité de réaliser une mutation générale (par défaut 0.1).
         :param proba_mutation_point: Probabilité de réaliser une mutation ponctuelle (par défaut 0.05).
+        :param vectoriel: Si True, chaque arbre est évalué en une passe NumPy sur tous les points.
+        :param representation: "arbre" (nœuds chaînés) ou "programme" (opcodes préfixes et machine à pile).
+        :param taille_cache: Nombre maximal de fitness mémorisées par empreinte structurelle (0 pour désactiver).
+        :param memoire_sous_arbres: Mémoire (octets) du cache des sorties de sous-arbres communs (0 pour désactiver).
+        :param sorties_incrementales: Si True, chaque nœud garde sa sortie et seuls les chemins modifiés
+                                      par mutation ou crossover sont réévalués. Les sorties gardées sont
+                                      comptées dans memoire_sous_arbres (sans effet si ce cache est désactivé).
+        :param graine: Graine du générateur NumPy utilisé pour la sélection.
+        :param nb_workers: Nombre de processus pour évaluer les lots d'individus (0 : évaluation locale).
+        :param borne_magnitude: Magnitude maximale de la sortie de chaque nœud, les valeurs au-delà
+                                sont saturées (None : pas de borne).
+        :param budget_operations: Nombre maximal d'évaluations de nœuds (nœuds × points) par individu ;
+                                  un individu plus coûteux est invalide et n'est pas évalué (None : illimité).
+        :param echantillonnage: None (tous les points), "aleatoire" (sous-échantillon tiré à nouveau toutes
+                                les periode_echantillon générations) ou "progressif" (points régulièrement
+                                espacés dont le nombre double à chaque période jusqu'au jeu complet).
+        :param taille_echantillon: Nombre de points du (premier) échantillon.
+        :param periode_echantillon: Nombre de générations entre deux changements d'échantillon.
+        :param nb_elites: Avec un échantillonnage, nombre de meilleurs individus réévalués sur tous
+                          les points pour le critère d'arrêt et le choix du meilleur individu.
+        :param nb_blocs_course: Si > 0, les descendants sont évalués en course contre la fitness du pire
+                                individu : l'erreur est accumulée sur nb_blocs_course blocs de points et
+                                l'évaluation est abandonnée dès qu'ils ne peuvent plus le remplacer
+                                (0 : évaluation complète).
         """
         self.taille = taille
         self.profondeur_max = profondeur_max
@@ -32,65 +66,375 @@ class Population:
         self.proba_crossover = proba_crossover
         self.proba_mutation = proba_mutation
         self.proba_mutation_point = proba_mutation_point
-        self.population = []
+        self.vectoriel = vectoriel
+        self.representation = representation
+        self.index = IndexFitness(taille)
+        # Nombre de générations effectuées par le dernier appel à evoluer, et leurs statistiques
+        # (génération, meilleure fitness sur tous les points, fitness moyenne, fitness maximale,
+        # fidélité) : moyenne et maximum sont calculés sur l'échantillon actif, dont la fidélité
+        # donne la part des points
+        self.generations = 0
+        self.historique = []
+        self.rng = np.random.default_rng(graine)
+        self.cache = CacheFitness(taille_cache)
+        self.sorties_incrementales = sorties_incrementales
+        if nb_workers > 0 and not vectoriel:
+            raise ValueError("L'évaluation parallèle nécessite le mode vectoriel.")
+        self.nb_workers = nb_workers
+        if nb_blocs_course > 0 and not vectoriel:
+            raise ValueError("L'évaluation en course nécessite le mode vectoriel.")
+        self.nb_blocs_course = nb_blocs_course
+        self.courses = {"Interrompues": 0, "Complètes": 0}
+        self.borne_magnitude = borne_magnitude
+        self.budget_operations = budget_operations
+        self._evaluateur = None
+        self.memo = None
+        if vectoriel and representation == "arbre" and memoire_sous_arbres > 0:
+            self.memo = CacheSousArbres(memoire_sous_arbres)
+        # Le vecteur cible est calculé une fois, y compris en mode point par point
+        self.colonnes = points_en_colonnes(points)
+        self.valeurs_cible = self._calculer_valeurs_cible()
+        self.empreinte_donnees = self._empreinte_jeu(self.colonnes, self.valeurs_cible)
+        # Jeu complet ; colonnes, valeurs_cible, points et empreinte_donnees décrivent le jeu actif
+        if echantillonnage not in (None, "aleatoire", "progressif"):
+            raise ValueError(f"Échantillonnage inconnu : {echantillonnage}")
+        self.echantillonnage = echantillonnage
+        self.taille_echantillon = taille_echantillon
+        self.periode_echantillon = periode_echantillon
+        self.nb_elites = nb_elites
+        self.jeu_complet = (points, self.colonnes, self.valeurs_cible, self.empreinte_donnees)
+        self.indices_echantillon = None
+        if echantillonnage is not None:
+            if not taille_echantillon or taille_echantillon < 1:
+                raise ValueError("L'échantillonnage nécessite une taille_echantillon positive.")
+            self._activer_echantillon(self._tirer_echantillon(0))
+
+    @staticmethod
+    def _empreinte_jeu(colonnes, valeurs_cible):
+        return hash(tuple(sorted((nom, col.tobytes()) for nom, col in colonnes.items())) + (valeurs_cible.tobytes(),))
+
+    def _calculer_valeurs_cible(self):
+        """Calcule une seule fois le vecteur des valeurs de la fonction cible."""
+        return calculer_valeurs_cible(self.fonction_cible, self.points, self.colonnes)
+
+    @property
+    def fidelite(self):
+        """Fraction des points sur laquelle sont calculées les fitness de l'index (1.0 : jeu complet)."""
+        return len(self.valeurs_cible) / len(self.jeu_complet[2])
+
+    def _tirer_echantillon(self, generation):
+        """
+        Indices des points de l'échantillon de la génération (None : jeu complet).
+        :param generation: Numéro de la génération.
+        """
+        nombre_points = len(self.jeu_complet[2])
+        if self.echantillonnage == "progressif":
+            taille = self.taille_echantillon * 2 ** (generation // self.periode_echantillon)
+            if taille >= nombre_points:
+                return None
+            # Points régulièrement espacés : du grossier vers le fin
+            return np.unique(np.linspace(0, nombre_points - 1, taille).round().astype(np.int64))
+        if self.taille_echantillon >= nombre_points:
+            return None
+        return np.sort(self.rng.choice(nombre_points, self.taille_echantillon, replace=False))
+
+    def _activer_echantillon(self, indices):
+        """
+        Fait d'un sous-ensemble des points le jeu actif.
+        :param indices: Indices des points retenus (None : jeu complet).
+        """
+        points, colonnes, valeurs_cible, empreinte = self.jeu_complet
+        if indices is not None:
+            points = [points[i] for i in indices]
+            colonnes = {nom: col[indices] for nom, col in colonnes.items()}
+            valeurs_cible = valeurs_cible[indices]
+            empreinte = self._empreinte_jeu(colonnes, valeurs_cible)
+        self.points, self.colonnes, self.valeurs_cible, self.empreinte_donnees = points, colonnes, valeurs_cible, empreinte
+        self.indices_echantillon = indices
+        # Les sorties mémorisées des sous-arbres portent sur l'ancien jeu
+        if self.memo is not None:
+            self.memo.vider()
+
+    def changer_echantillon(self, generation):
+        """
+        Passe à l'échantillon de la génération et réévalue toute la population dessus :
+        les fitness de l'index ne sont comparables que sur un même jeu de points.
+        :param generation: Numéro de la génération.
+        """
+        indices = self._tirer_echantillon(generation)
+        if indices is None and self.indices_echantillon is None:
+            return
+        if indices is not None and self.indices_echantillon is not None and np.array_equal(indices, self.indices_echantillon):
+            return
+        self._activer_echantillon(indices)
+        for arbre in self.population:
+            arbre.fitness_score = None
+        for emplacement, fitness in enumerate(self.evaluer_lot(self.population)):
+            self.index.actualiser(emplacement, fitness)
+
+    def preparer_generation(self, generation):
+        """
+        Prépare une génération : éviction des sorties froides et, avec un échantillonnage,
+        changement d'échantillon toutes les periode_echantillon générations.
+        :param generation: Numéro de la génération (à partir de 0).
+        """
+        if self.memo is not None:
+            self.memo.nouvelle_generation()
+        if self.echantillonnage is not None and generation > 0 and generation % self.periode_echantillon == 0:
+            self.changer_echantillon(generation)
+
+    def fitness_complete(self, arbre):
+        """
+        Fitness d'un individu sur tous les points, quel que soit l'échantillon actif
+        (la fitness de l'arbre sur l'échantillon n'est pas modifiée).
+        :param arbre: Individu de la population.
+        """
+        if self.indices_echantillon is None:
+            return self.evaluer_fitness(arbre)
+        points, colonnes, valeurs_cible, empreinte = self.jeu_complet
+        cle = (arbre.empreinte(), empreinte)
+        fitness = self.cache.obtenir(cle)
+        if fitness is None:
+            score, arbre.fitness_score = arbre.fitness_score, None
+            if self._hors_budget(arbre, len(points)):
+                fitness = float("inf")
+            elif self.vectoriel:
+                fitness = arbre.fitness_vect(colonnes, valeurs_cible, borne=self.borne_magnitude)
+            else:
+                fitness = arbre.fitness(self.fonction_cible, points, valeurs_cible, self.borne_magnitude)
+            arbre.fitness_score = score
+            self.cache.enregistrer(cle, fitness)
+        return fitness
+
+    def meilleur_complet(self):
+        """
+        Meilleur individu et sa fitness sur tous les points. Avec un échantillonnage, les
+        nb_elites meilleurs individus de l'échantillon sont réévalués sur le jeu complet.
+        :return: Couple (individu, fitness complète).
+        """
+        if self.indices_echantillon is None:
+            meilleur = self.meilleur_individu()
+            return meilleur, self.evaluer_fitness(meilleur)
+        elites = [self.population[emplacement] for emplacement in self.index.meilleurs(self.nb_elites)]
+        return min(((elite, self.fitness_complete(elite)) for elite in elites), key=lambda couple: couple[1])
+
+    @property
+    def population(self):
+        """Liste des individus, dans l'ordre de leurs emplacements dans l'index."""
+        return self.index.individus
+
+    def evaluer_fitness(self, arbre):
+        """
+        Calcule (ou relit) la fitness d'un arbre selon le mode d'évaluation choisi.
+        Les arbres structurellement identiques à un arbre déjà évalué sont servis par le cache.
+        """
+        if arbre.fitness_score is not None:
+            return arbre.fitness_score
+        cle = (arbre.empreinte(), self.empreinte_donnees)
+        fitness = self.cache.obtenir(cle)
+        if fitness is not None:
+            arbre.fitness_score = fitness
+            return fitness
+        fitness = self._calculer_fitness(arbre)
+        self.cache.enregistrer(cle, fitness)
+        return fitness
+
+    def _hors_budget(self, arbre, nombre_points=None):
+        """Indique si l'évaluation de l'arbre (sur le jeu actif par défaut) dépasserait le budget d'opérations."""
+        if nombre_points is None:
+            nombre_points = len(self.points)
+        return self.budget_operations is not None and arbre.taille() * nombre_points > self.budget_operations
+
+    def _calculer_fitness(self, arbre):
+        if self._hors_budget(arbre):
+            # Individu invalide : même pénalité qu'une sortie non finie
+            arbre.fitness_score = float("inf")
+            return arbre.fitness_score
+        borne = self.borne_magnitude
+        if self.vectoriel and self.representation == "arbre":
+            return arbre.fitness_vect(self.colonnes, self.valeurs_cible, self.memo, self.sorties_incrementales, borne)
+        if self.vectoriel:
+            return arbre.fitness_vect(self.colonnes, self.valeurs_cible, borne)
+        return arbre.fitness(self.fonction_cible, self.points, self.valeurs_cible, borne)
+
+    def _calculer_fitness_course(self, arbre, seuil):
+        if self._hors_budget(arbre):
+            arbre.fitness_score = float("inf")
+            return arbre.fitness_score, False
+        return arbre.fitness_course(self.colonnes, self.valeurs_cible, seuil, self.nb_blocs_course,
+                                    self.borne_magnitude)
+
+    def evaluer_lot(self, arbres, seuil=None):
+        """
+        Évalue une liste d'arbres en une fois : les doublons structurels et les arbres
+        déjà en cache ne sont pas recalculés, les autres sont envoyés au pool de
+        processus si nb_workers > 0.
+        :param arbres: Arbres à évaluer.
+        :param seuil: Fitness à battre ; avec nb_blocs_course > 0, l'évaluation d'un arbre qui ne peut
+                      plus passer sous ce seuil est abandonnée (None : évaluation complète).
+        :return: Liste des fitness, dans l'ordre des arbres. La fitness d'un arbre abandonné est
+                 remplacée par une borne inférieure (>= seuil), qui n'est ni mise en cache ni
+                 attribuée à l'arbre.
+        """
+        course = seuil is not None and self.nb_blocs_course > 0
+        groupes = {}
+        for arbre in arbres:
+            if arbre.fitness_score is None:
+                groupes.setdefault((arbre.empreinte(), self.empreinte_donnees), []).append(arbre)
+        a_calculer = []
+        for cle, groupe in groupes.items():
+            fitness = self.cache.obtenir(cle)
+            if fitness is None:
+                a_calculer.append(cle)
+            else:
+                for arbre in groupe:
+                    arbre.fitness_score = fitness
+        representants = [groupes[cle][0] for cle in a_calculer]
+        if self.nb_workers > 0 and representants:
+            # Les individus hors budget ne sont pas envoyés au pool
+            valeurs = [float("inf") if self._hors_budget(arbre) else None for arbre in representants]
+            a_envoyer = [arbre for arbre, fitness in zip(representants, valeurs) if fitness is None]
+            if not a_envoyer:
+                resultats = iter([])
+            elif course:
+                resultats = iter(self._evaluateur_parallele().evaluer_course(
+                    a_envoyer, seuil, self.nb_blocs_course, self.indices_echantillon))
+            else:
+                resultats = ((fitness, False) for fitness in
+                             self._evaluateur_parallele().evaluer(a_envoyer, self.indices_echantillon))
+            valeurs = [next(resultats) if fitness is None else (fitness, False) for fitness in valeurs]
+        elif course:
+            valeurs = [self._calculer_fitness_course(arbre, seuil) for arbre in representants]
+        else:
+            valeurs = [(self._calculer_fitness(arbre), False) for arbre in representants]
+        bornes = {}
+        for cle, (fitness, interrompue) in zip(a_calculer, valeurs):
+            if course:
+                self.courses["Interrompues" if interrompue else "Complètes"] += 1
+            if interrompue:
+                bornes[cle] = fitness
+                continue
+            self.cache.enregistrer(cle, fitness)
+            for arbre in groupes[cle]:
+                arbre.fitness_score = fitness
+        return [bornes[(arbre.empreinte(), self.empreinte_donnees)] if arbre.fitness_score is None
+                else arbre.fitness_score for arbre in arbres]
+
+    def _evaluateur_parallele(self):
+        if self._evaluateur is None:
+            # Les processus gardent le jeu complet ; l'échantillon actif leur est désigné par ses indices
+            _, colonnes, valeurs_cible, _ = self.jeu_complet
+            self._evaluateur = EvaluateurParallele(self.nb_workers, colonnes, valeurs_cible,
+                                                   self.term_set, self.func_set, borne=self.borne_magnitude)
+        return self._evaluateur
+
+    def fermer(self):
+        """Arrête le pool de processus d'évaluation s'il a été démarré."""
+        if self._evaluateur is not None:
+            self._evaluateur.fermer()
+            self._evaluateur = None
 
     def generer_population(self):
         """Génère une population avec 50 % d'arbres grow et 50 % full."""
-        self.population = []
+        self.index = IndexFitness(self.taille)
+        table = TableOpcodes(self.term_set, self.func_set) if self.representation == "programme" else None
+        arbres = []
         for i in range(self.taille):
-            arbre = Arbre(self.profondeur_max, self.term_set, self.func_set)
+            if table is not None:
+                arbre = Programme(self.profondeur_max, self.term_set, self.func_set, table=table)
+            else:
+                arbre = Arbre(self.profondeur_max, self.term_set, self.func_set)
             if i < self.taille / 2:
                 arbre.generer_grow()
             else:
                 arbre.generer_full()
-            self.population.append(arbre)
+            arbres.append(arbre)
+        for arbre, fitness in zip(arbres, self.evaluer_lot(arbres)):
+            self.index.ajouter(arbre, fitness)
+
+    def _tournoi(self):
+        """Renvoie l'emplacement du vainqueur d'un tournoi."""
+        return int(tirer_tournois(self.rng, self.index.valeurs(), 1, self.taille_tournoi)[0])
 
     def selection_tournoi(self):
         """Sélectionne un individu via un tournoi."""
-        candidats = random.sample(self.population, self.taille_tournoi)
-        return min(candidats, key=lambda arbre: arbre.fitness(self.fonction_cible, self.points))
+        return self.population[self._tournoi()]
 
     def meilleur_individu(self):
         """Trouve l'individu avec la meilleure fitness dans la population."""
         if not self.population:
             raise ValueError("La population est vide.")
-        return min(self.population, key=lambda arbre: arbre.fitness(self.fonction_cible, self.points))
+        return self.population[self.index.meilleur()]
 
     def effectuer_crossover(self):
         """
         Effectue un crossover entre deux parents avec une probabilité donnée.
         """
-        for _ in range(self.taille):
+        # Tous les tournois de la génération sont tirés d'un coup
+        gagnants = tirer_tournois(self.rng, self.index.valeurs(), 2 * self.taille, self.taille_tournoi).tolist()
+        descendants = []
+        for k in range(self.taille):
             if random.random() < self.proba_crossover:
-                parent1 = self.selection_tournoi()
-                parent2 = self.selection_tournoi()
+                parent1 = self.population[gagnants[2 * k]]
+                parent2 = self.population[gagnants[2 * k + 1]]
                 descendant = parent1.crossover(parent2)
-                descendant.update_profondeur()
-                # Remplacer le pire individu par le descendant
-                pire_arbre = max(self.population, key=lambda arbre: arbre.fitness(self.fonction_cible, self.points))
-                if descendant.fitness(self.fonction_cible, self.points) < pire_arbre.fitness(self.fonction_cible, self.points):
-                    self.population.remove(pire_arbre)
-                    self.population.append(descendant)
-                    if random.random() < self.proba_mutation:
-                        descendant.mutation()
-                    if random.random() < self.proba_mutation_point:
-                        descendant.point_mutation()
+                descendants.append(descendant)
+
+        # Les descendants de la génération sont évalués en un seul lot ; en course, ceux qui
+        # ne peuvent pas battre le pire individu actuel sont abandonnés en cours d'évaluation
+        seuil = float(self.index.fitness[self.index.pire()]) if self.nb_blocs_course > 0 else None
+        for descendant, fitness in zip(descendants, self.evaluer_lot(descendants, seuil)):
+            # Remplacer le pire individu par le descendant
+            pire = self.index.pire()
+            if descendant.fitness_score is None and fitness < self.index.fitness[pire]:
+                # Une mutation a dégradé le pire individu au-delà du seuil : la borne
+                # inférieure ne suffit plus à écarter le descendant
+                fitness = self.evaluer_fitness(descendant)
+            if fitness < self.index.fitness[pire]:
+                self.index.remplacer(pire, descendant, fitness)
+                mute = False
+                if random.random() < self.proba_mutation:
+                    descendant.mutation()
+                    mute = True
+                if random.random() < self.proba_mutation_point:
+                    descendant.point_mutation()
+                    mute = True
+                if mute:
+                    self.index.actualiser(pire, self.evaluer_fitness(descendant))
+
+    def emigrants(self, nombre):
+        """
+        Renvoie les meilleurs individus, candidats à la migration (modèle en îles).
+        :param nombre: Nombre d'individus à faire migrer.
+        """
+        return [self.population[emplacement] for emplacement in self.index.meilleurs(nombre)]
+
+    def accueillir(self, immigrants):
+        """
+        Intègre des individus venus d'une autre île à la place des pires individus.
+        :param immigrants: Arbres (ou programmes) de même représentation que la population.
+        """
+        for emplacement, immigrant, fitness in zip(self.index.pires(len(immigrants)), immigrants,
+                                                   self.evaluer_lot(immigrants)):
+            self.index.remplacer(emplacement, immigrant, fitness)
 
     def effectuer_mutation(self):
         """
         Applique une mutation générale sur un individu avec une probabilité donnée.
         """
         if random.random() < self.proba_mutation:
-            individu = self.selection_tournoi()
-            individu.mutation()
+            emplacement = self._tournoi()
+            self.population[emplacement].mutation()
+            self.index.actualiser(emplacement, self.evaluer_fitness(self.population[emplacement]))
 
     def effectuer_mutation_point(self):
         """
         Applique une mutation ponctuelle sur un individu avec une probabilité donnée.
         """
         if random.random() < self.proba_mutation_point:
-            individu = self.selection_tournoi()
-            individu.point_mutation()
+            emplacement = self._tournoi()
+            self.population[emplacement].point_mutation()
+            self.index.actualiser(emplacement, self.evaluer_fitness(self.population[emplacement]))
 
     def statistiques_fitness(self):
         """
@@ -100,48 +444,73 @@ class Population:
         if not self.population:
             raise ValueError("La population est vide.")
 
-        fitness_values = [arbre.fitness(self.fonction_cible, self.points) for arbre in self.population]
-        fitness_min = min(fitness_values)
-        fitness_max = max(fitness_values)
-        fitness_moyenne = sum(fitness_values) / len(fitness_values)
+        fitness_values = self.index.valeurs().tolist()
+        fitness_min, fitness_moyenne, fitness_max = self.index.statistiques()
 
         stats = {
             "Fitness Moyenne": fitness_moyenne,
             "Fitness Minimale": fitness_min,
             "Fitness Maximale": fitness_max,
             "Distribution": fitness_values,
+            "Cache": self.cache.statistiques(),
+            "Cache sous-arbres": self.memo.statistiques() if self.memo is not None else None,
+            # Part des points sur laquelle ces fitness ont été calculées
+            "Fidélité": self.fidelite,
+            "Points": len(self.valeurs_cible),
+            "Course": dict(self.courses) if self.nb_blocs_course > 0 else None,
         }
 
         # Afficher les statistiques
         print("=== Statistiques de Fitness ===")
-        print(f"Fitness Moyenne   : {fitness_moyenne} , prof = {self.meilleur_individu().profondeur(self.meilleur_individu().racine)}")
+        meilleur = self.meilleur_individu()
+        print(f"Fitness Moyenne   : {fitness_moyenne} , prof = {meilleur.profondeur()}")
         print(f"Fitness Minimale  : {fitness_min}")
         print(f"Fitness Maximale  : {fitness_max}")
+        print(f"Cache fitness     : {stats['Cache']['Succès']} succès / {stats['Cache']['Échecs']} échecs")
+        print(f"Fidélité          : {stats['Points']} / {len(self.jeu_complet[2])} points")
+        if self.nb_blocs_course > 0:
+            print(f"Course            : {self.courses['Interrompues']} abandons / "
+                  f"{self.courses['Complètes']} évaluations complètes")
         print("===============================")
 
         return stats
 
-    def evoluer(self, generations_max=100, fitness_cible=1e-6, afficher_stats=True):
+    def evoluer(self, generations_max=100, fitness_cible=1e-6, afficher_stats=True, reprise=None):
         """
         Lance le processus évolutif pour atteindre la fonction cible.
         :param generations_max: Nombre maximal de générations.
         :param fitness_cible: Fitness minimale à atteindre (critère d'arrêt).
-        :param afficher_stats: Si True, affiche les statistiques à chaque génération.
+        :param afficher_stats: Si True, affiche les statistiques à chaque génération
+                               et trace leur évolution à la fin.
+        :param reprise: Point de reprise (voir model/reprise.py). S'il existe déjà, l'évolution
+                        repart de l'état sauvegardé ; l'état est ensuite sauvegardé périodiquement.
         :return: Le meilleur individu trouvé.
         """
+        try:
+            return self._evoluer(generations_max, fitness_cible, afficher_stats, reprise)
+        finally:
+            self.fermer()
+
+    def _evoluer(self, generations_max, fitness_cible, afficher_stats, reprise=None):
         min_fit = []
         mean_fit = []
         worst_fit = []
         generations = []
-        for generation in range(generations_max):
-            # Évaluer la population
-            meilleur = self.meilleur_individu()
-            meilleure_fitness = meilleur.fitness(self.fonction_cible, self.points)
+        self.historique = []
+        debut = reprise.restaurer(self) if reprise is not None and reprise.existe() else 0
+        for generation in range(debut, generations_max):
+            if reprise is not None and reprise.echeance(generation):
+                reprise.sauvegarder(self, generation)
+            self.generations = generation
+            self.preparer_generation(generation)
+            # Évaluer la population (meilleur individu jugé sur tous les points)
+            meilleur, meilleure_fitness = self.meilleur_complet()
+            self.historique.append((generation, meilleure_fitness) + self.index.statistiques()[1:] + (self.fidelite,))
 
             # Afficher les statistiques de la génération
             if afficher_stats:
                 print(f"Génération {generation + 1} :")
-                print(f"  Meilleure fitness : {meilleure_fitness}")
+                print(f"  Meilleure fitness : {meilleure_fitness} (tous les points)")
                 print(f"  Meilleur individu : {meilleur}")
                 stat = self.statistiques_fitness()
                 min_fit.append(stat["Fitness Minimale"])
@@ -151,14 +520,8 @@ class Population:
 
             # Critère d'arrêt
             if meilleure_fitness <= fitness_cible:
-                plt.plot(generations, min_fit, label='Fitness Minimale', color='blue')
-                plt.plot(generations, mean_fit, label='Fitness Moyenne', color='green')
-                plt.plot(generations, worst_fit, label='Fitness Maximale', color='red')
-                plt.legend()
-                plt.xlabel('Génération')
-                plt.ylabel('Fitness')
-                plt.title('Évolution de la fitness')
-                plt.show()
+                if afficher_stats:
+                    self.tracer_evolution(generations, min_fit, mean_fit, worst_fit)
                 print("Solution atteinte !")
                 return meilleur
 
@@ -168,6 +531,21 @@ class Population:
             #self.effectuer_mutation_point()
         
         # Afficher l'évolution de la fitness sur un seul et même graphique
+        if afficher_stats:
+            self.tracer_evolution(generations, min_fit, mean_fit, worst_fit)
+
+        # Si le critère d'arrêt n'est pas atteint
+        self.generations = generations_max
+        print("Nombre maximal de générations atteint.")
+        return self.meilleur_complet()[0]
+
+    @staticmethod
+    def tracer_evolution(generations, min_fit, mean_fit, worst_fit):
+        """
+        Trace l'évolution des fitness minimale, moyenne et maximale.
+        matplotlib n'est importé qu'ici, pour que les exécutions sans affichage ne le chargent pas.
+        """
+        import matplotlib.pyplot as plt
         plt.plot(generations, min_fit, label='Fitness Minimale', color='blue')
         plt.plot(generations, mean_fit, label='Fitness Moyenne', color='green')
         plt.plot(generations, worst_fit, label='Fitness Maximale', color='red')
@@ -176,7 +554,3 @@ class Population:
         plt.ylabel('Fitness')
         plt.title('Évolution de la fitness')
         plt.show()
-
-        # Si le critère d'arrêt n'est pas atteint
-        print("Nombre maximal de générations atteint.")
-        return self.meilleur_individu()
@@ -0,0 +1,429 @@
+import random
+import numpy as np
+from model.noeud import NoeudInterne, NoeudExterne
+from model.terminal import Terminal
+from noyaux import erreur_quadratique_moyenne, course_erreur_quadratique, en_flottants, borner
+from model.arbre import calculer_valeurs_cible
+
+"""Représentation linéaire (préfixe) des arbres.
+
+Un programme est un tableau d'opcodes int8 en ordre préfixe et un tableau
+float64 de constantes de même longueur. La structure est entièrement déduite
+de l'arité de chaque opcode : il n'y a ni objets nœuds ni récursion, et copier
+un individu revient à copier deux tableaux."""
+
+CONSTANTE = 0
+CONSTANTE_ENTIERE = 1
+
+
+class TableOpcodes:
+    """Correspondance entre opcodes et symboles (constantes, variables, fonctions)."""
+
+    def __init__(self, term_set, func_set):
+        """
+        term_set: Liste des terminaux disponibles (les variables sont les terminaux non numériques).
+        func_set: Liste des fonctions disponibles.
+        """
+        self.variables = [t.valeur for t in term_set
+                          if not isinstance(t.valeur, (int, float)) and t.valeur != "cst"]
+        self.fonctions = list(func_set)
+        self.debut_fonctions = 2 + len(self.variables)
+        if self.debut_fonctions + len(self.fonctions) > 127:
+            raise ValueError("Trop de symboles pour un codage sur int8.")
+        self.arites = np.array([0] * self.debut_fonctions + [f.argument for f in self.fonctions], dtype=np.int8)
+        self._codes_variables = {nom: 2 + i for i, nom in enumerate(self.variables)}
+        self._codes_fonctions = {f.nom: self.debut_fonctions + i for i, f in enumerate(self.fonctions)}
+
+    def code_variable(self, nom):
+        return self._codes_variables[nom]
+
+    def code_fonction(self, fonction):
+        return self._codes_fonctions[fonction.nom]
+
+    def fonction(self, code):
+        return self.fonctions[code - self.debut_fonctions]
+
+    def variable(self, code):
+        return self.variables[code - 2]
+
+
+class Programme:
+
+    def __init__(self, profondeur_max, term_set, func_set, table=None, opcodes=None, constantes=None):
+        """
+        profondeur_max: Profondeur maximale du programme (comptée comme pour Arbre).
+        term_set: Liste des terminaux disponibles.
+        func_set: Liste des fonctions disponibles.
+        table: Table d'opcodes partagée (construite à partir de term_set/func_set si absente).
+        opcodes: Tableau int8 des opcodes en ordre préfixe.
+        constantes: Tableau float64 des constantes, aligné sur opcodes.
+        """
+        self.profondeur_max = profondeur_max
+        self.term_set = term_set
+        self.func_set = func_set
+        self.table = table if table is not None else TableOpcodes(term_set, func_set)
+        self.opcodes = opcodes if opcodes is not None else np.empty(0, dtype=np.int8)
+        self.constantes = constantes if constantes is not None else np.empty(0, dtype=np.float64)
+        self.fitness_score = None
+        self._fins = None
+        self._profondeurs = None
+        self._hauteurs = None
+
+    @classmethod
+    def depuis_arbre(cls, arbre, table=None):
+        """
+        Construit le programme équivalent à un Arbre.
+        :param arbre: Arbre généré à convertir.
+        :param table: Table d'opcodes à réutiliser (recommandé pour toute une population).
+        :return: Nouveau Programme.
+        """
+        programme = cls(arbre.profondeur_max, arbre.term_set, arbre.func_set, table=table)
+        opcodes, constantes = [], []
+        pile = [arbre.racine]
+        while pile:
+            noeud = pile.pop()
+            if isinstance(noeud, NoeudInterne):
+                opcodes.append(programme.table.code_fonction(noeud.fonction))
+                constantes.append(0.0)
+                pile.extend(reversed(noeud.enfants))
+            else:
+                programme._encoder_terminal(noeud.terminal.valeur, opcodes, constantes)
+        programme.opcodes = np.array(opcodes, dtype=np.int8)
+        programme.constantes = np.array(constantes, dtype=np.float64)
+        programme.fitness_score = arbre.fitness_score
+        return programme
+
+    def vers_arbre(self):
+        """
+        Reconstruit l'Arbre équivalent (utile pour l'affichage ou l'ancien moteur).
+        :return: Nouvel Arbre.
+        """
+        from model.arbre import Arbre
+        pile = []
+        for i in range(len(self.opcodes) - 1, -1, -1):
+            code = int(self.opcodes[i])
+            if code >= self.table.debut_fonctions:
+                fonction = self.table.fonction(code)
+                enfants = [pile.pop() for _ in range(fonction.argument)]
+                pile.append(NoeudInterne(fonction, enfants))
+            else:
+                pile.append(NoeudExterne(Terminal(self._valeur_terminal(i))))
+        arbre = Arbre(self.profondeur_max, self.term_set, self.func_set)
+        arbre.racine = pile.pop()
+        arbre.update_profondeur()
+        arbre.fitness_score = self.fitness_score
+        return arbre
+
+    def _encoder_terminal(self, valeur, opcodes, constantes):
+        if isinstance(valeur, int):
+            opcodes.append(CONSTANTE_ENTIERE)
+            constantes.append(float(valeur))
+        elif isinstance(valeur, float):
+            opcodes.append(CONSTANTE)
+            constantes.append(valeur)
+        else:
+            opcodes.append(self.table.code_variable(valeur))
+            constantes.append(0.0)
+
+    def _valeur_terminal(self, i):
+        code = self.opcodes[i]
+        if code == CONSTANTE_ENTIERE:
+            return int(self.constantes[i])
+        if code == CONSTANTE:
+            return float(self.constantes[i])
+        return self.table.variable(code)
+
+    def generer_grow(self):
+        self._generer(self.profondeur_max, method="grow")
+
+    def generer_full(self):
+        self._generer(self.profondeur_max, method="full")
+
+    def _generer(self, profondeur, method):
+        opcodes, constantes = [], []
+        self._generer_sous_programme(profondeur, method, opcodes, constantes)
+        self._remplacer(np.array(opcodes, dtype=np.int8), np.array(constantes, dtype=np.float64))
+
+    def _generer_sous_programme(self, profondeur, method, opcodes, constantes):
+        """Même tirage que Arbre._generer_noeud, écrit directement en préfixe."""
+        if profondeur == 0 or (method == "grow" and
+                               random.random() < len(self.term_set) / (len(self.term_set) + len(self.func_set))):
+            terminal = random.choice(self.term_set)
+            if terminal.valeur == "cst":
+                self._encoder_terminal(int(random.uniform(-10, 10)), opcodes, constantes)
+            else:
+                self._encoder_terminal(terminal.valeur, opcodes, constantes)
+            return
+        fonction = random.choice(self.func_set)
+        opcodes.append(self.table.code_fonction(fonction))
+        constantes.append(0.0)
+        for _ in range(fonction.argument):
+            self._generer_sous_programme(profondeur - 1, method, opcodes, constantes)
+
+    def _remplacer(self, opcodes, constantes):
+        self.opcodes = opcodes
+        self.constantes = constantes
+        self.fitness_score = None
+        self._fins = None
+        self._profondeurs = None
+        self._hauteurs = None
+
+    def fins(self):
+        """Indice de fin (exclu) du sous-programme commençant à chaque position."""
+        if self._fins is None:
+            arites = self.table.arites[self.opcodes]
+            fins = np.empty(len(self.opcodes), dtype=np.int64)
+            pile = []
+            for i in range(len(self.opcodes) - 1, -1, -1):
+                fin = i + 1
+                for _ in range(arites[i]):
+                    fin = pile.pop()
+                fins[i] = fin
+                pile.append(fin)
+            self._fins = fins
+        return self._fins
+
+    def profondeurs(self):
+        """Profondeur de chaque nœud (0 pour la racine)."""
+        if self._profondeurs is None:
+            arites = self.table.arites[self.opcodes]
+            profondeurs = np.empty(len(self.opcodes), dtype=np.int64)
+            pile = []
+            for i, arite in enumerate(arites):
+                profondeurs[i] = len(pile)
+                if arite:
+                    pile.append(arite)
+                    continue
+                while pile:
+                    pile[-1] -= 1
+                    if pile[-1]:
+                        break
+                    pile.pop()
+            self._profondeurs = profondeurs
+        return self._profondeurs
+
+    def hauteurs(self):
+        """Hauteur de chaque sous-programme (0 pour une feuille)."""
+        if self._hauteurs is None:
+            arites = self.table.arites[self.opcodes]
+            hauteurs = np.empty(len(self.opcodes), dtype=np.int64)
+            pile = []
+            for i in range(len(self.opcodes) - 1, -1, -1):
+                hauteur = 0
+                for _ in range(arites[i]):
+                    hauteur = max(hauteur, pile.pop() + 1)
+                hauteurs[i] = hauteur
+                pile.append(hauteur)
+            self._hauteurs = hauteurs
+        return self._hauteurs
+
+    def profondeur(self, racine=None):
+        """Profondeur du programme, comptée en nœuds comme Arbre.profondeur."""
+        return int(self.hauteurs()[0]) + 1 if len(self.opcodes) else 0
+
+    def taille(self):
+        """Nombre de nœuds du programme."""
+        return len(self.opcodes)
+
+    def update_profondeur(self):
+        # Les profondeurs sont déduites des opcodes à la demande
+        pass
+
+    def empreinte(self):
+        """Empreinte structurelle stable sur 64 bits, calculée sur le format binaire du programme."""
+        from model.serialisation import empreinte
+        return empreinte(self.opcodes, self.constantes)
+
+    def copy(self):
+        copie = Programme(self.profondeur_max, self.term_set, self.func_set, table=self.table,
+                          opcodes=self.opcodes.copy(), constantes=self.constantes.copy())
+        copie.fitness_score = self.fitness_score
+        return copie
+
+    def evaluer(self, variables, borne=None):
+        """
+        Évalue le programme pour un dictionnaire de variables (pile, sans récursion), en float64.
+        :param variables: Dictionnaire associant des variables à leurs valeurs.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Résultat de l'évaluation.
+        """
+        if not len(self.opcodes):
+            raise ValueError("Le programme n'a pas été généré.")
+        variables = en_flottants(variables)
+        pile = []
+        for i in range(len(self.opcodes) - 1, -1, -1):
+            code = self.opcodes[i]
+            if code >= self.table.debut_fonctions:
+                fonction = self.table.fonction(code)
+                pile.append(borner(fonction.apply(*[pile.pop() for _ in range(fonction.argument)]), borne))
+            elif code <= CONSTANTE_ENTIERE:
+                pile.append(np.float64(self.constantes[i]))
+            else:
+                pile.append(variables.get(self.table.variable(code)))
+        return pile.pop()
+
+    def evaluer_vect(self, colonnes, borne=None):
+        """
+        Évalue le programme sur des colonnes de valeurs avec une pile de tableaux.
+        :param colonnes: Dictionnaire associant des variables à des tableaux NumPy.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Tableau des valeurs du programme pour chaque point.
+        """
+        if not len(self.opcodes):
+            raise ValueError("Le programme n'a pas été généré.")
+        table = self.table
+        opcodes = self.opcodes.tolist()
+        pile = []
+        with np.errstate(all="ignore"):
+            for i in range(len(opcodes) - 1, -1, -1):
+                code = opcodes[i]
+                if code >= table.debut_fonctions:
+                    fonction = table.fonction(code)
+                    pile.append(borner(fonction.apply_vect(*[pile.pop() for _ in range(fonction.argument)]), borne))
+                elif code <= CONSTANTE_ENTIERE:
+                    pile.append(np.float64(self.constantes[i]))
+                else:
+                    pile.append(colonnes[table.variable(code)])
+        return pile.pop()
+
+    def fitness(self, fonction_cible, points, valeurs_cible=None, borne=None):
+        """
+        Calcule l'erreur quadratique moyenne point par point (même sémantique que Arbre.fitness).
+        :param fonction_cible: Fonction cible (callable Python) à approximer.
+        :param points: Liste de dictionnaires représentant les points d'échantillonnage.
+        :param valeurs_cible: Valeurs déjà calculées de la fonction cible sur ces points.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Erreur quadratique moyenne entre le programme et la fonction cible.
+        """
+        if self.fitness_score is not None:
+            return self.fitness_score
+        with np.errstate(all="ignore"):
+            valeurs = [self.evaluer(point, borne) for point in points]
+        if valeurs_cible is None:
+            valeurs_cible = calculer_valeurs_cible(fonction_cible, points)
+        self.fitness_score = erreur_quadratique_moyenne(valeurs, valeurs_cible)
+        return self.fitness_score
+
+    def fitness_vect(self, colonnes, valeurs_cible, borne=None):
+        """
+        Calcule l'erreur quadratique moyenne en une passe de la machine à pile.
+        :param colonnes: Colonnes des points d'échantillonnage.
+        :param valeurs_cible: Tableau des valeurs de la fonction cible sur ces points.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Erreur quadratique moyenne entre le programme et la fonction cible.
+        """
+        if self.fitness_score is not None:
+            return self.fitness_score
+        valeurs = self.evaluer_vect(colonnes, borne)
+        self.fitness_score = erreur_quadratique_moyenne(valeurs, valeurs_cible)
+        return self.fitness_score
+
+    def fitness_course(self, colonnes, valeurs_cible, seuil, nb_blocs=16, borne=None):
+        """
+        Fitness évaluée par étapes de points de plus en plus grandes, abandonnée dès que le programme
+        ne peut plus battre le seuil (même sémantique que Arbre.fitness_course).
+        :param colonnes: Colonnes des points d'échantillonnage.
+        :param valeurs_cible: Tableau des valeurs de la fonction cible sur ces points.
+        :param seuil: Fitness à battre.
+        :param nb_blocs: Nombre de blocs de points.
+        :param borne: Magnitude maximale de la sortie de chaque nœud (None : pas de borne).
+        :return: Couple (fitness ou borne inférieure, interrompue).
+        """
+        if self.fitness_score is not None:
+            return self.fitness_score, False
+
+        def evaluer_bloc(indices):
+            return self.evaluer_vect({nom: colonne[indices] for nom, colonne in colonnes.items()}, borne)
+
+        fitness, interrompue = course_erreur_quadratique(evaluer_bloc, valeurs_cible, seuil, nb_blocs)
+        if not interrompue:
+            self.fitness_score = fitness
+        return fitness, interrompue
+
+    def _selectionner_indice(self, candidats=None):
+        """
+        Tire un indice de nœud, interne avec 90 % de chances s'il en existe
+        (même biais que Arbre._selectionner_indice).
+        """
+        if candidats is None:
+            candidats = np.arange(len(self.opcodes))
+        internes = candidats[self.opcodes[candidats] >= self.table.debut_fonctions]
+        externes = candidats[self.opcodes[candidats] < self.table.debut_fonctions]
+        if len(internes) and (not len(externes) or random.random() < 0.9):
+            return int(random.choice(internes))
+        return int(random.choice(externes))
+
+    def crossover(self, autre_programme):
+        """
+        Réalise un crossover par raccordement de tranches de tableaux.
+        :param autre_programme: L'autre programme avec lequel croiser celui-ci.
+        :return: Un nouveau programme (descendant).
+        """
+        i = self._selectionner_indice()
+        place = self.profondeur_max - int(self.profondeurs()[i])
+        candidats = np.flatnonzero(autre_programme.hauteurs() <= max(place, 0))
+        j = autre_programme._selectionner_indice(candidats)
+        fin_i = self.fins()[i]
+        fin_j = autre_programme.fins()[j]
+
+        descendant = Programme(self.profondeur_max, self.term_set, self.func_set, table=self.table)
+        descendant._remplacer(
+            np.concatenate((self.opcodes[:i], autre_programme.opcodes[j:fin_j], self.opcodes[fin_i:])),
+            np.concatenate((self.constantes[:i], autre_programme.constantes[j:fin_j], self.constantes[fin_i:])),
+        )
+        return descendant
+
+    def mutation(self):
+        """
+        Remplace un sous-programme aléatoire par un sous-programme généré (méthode grow).
+        """
+        if not len(self.opcodes):
+            raise ValueError("Le programme doit être généré avant d'appliquer une mutation.")
+        i = self._selectionner_indice()
+        fin = self.fins()[i]
+        opcodes, constantes = [], []
+        self._generer_sous_programme(max(self.profondeur_max - int(self.profondeurs()[i]), 0), "grow", opcodes, constantes)
+        self._remplacer(
+            np.concatenate((self.opcodes[:i], np.array(opcodes, dtype=np.int8), self.opcodes[fin:])),
+            np.concatenate((self.constantes[:i], np.array(constantes, dtype=np.float64), self.constantes[fin:])),
+        )
+
+    def point_mutation(self):
+        """
+        Mutation ponctuelle : une fonction est remplacée par une autre de même arité,
+        un terminal par une nouvelle constante.
+        """
+        if not len(self.opcodes):
+            raise ValueError("Le programme doit être généré avant d'appliquer une mutation.")
+        i = self._selectionner_indice()
+        code = self.opcodes[i]
+        structure = (self._fins, self._profondeurs, self._hauteurs)
+        opcodes, constantes = self.opcodes.copy(), self.constantes.copy()
+        if code >= self.table.debut_fonctions:
+            arite = self.table.arites[code]
+            opcodes[i] = self.table.code_fonction(random.choice([f for f in self.func_set if f.argument == arite]))
+        else:
+            opcodes[i] = CONSTANTE
+            constantes[i] = random.uniform(-10, 10)
+        self._remplacer(opcodes, constantes)
+        # La structure ne change pas : fins, profondeurs et hauteurs restent valides
+        self._fins, self._profondeurs, self._hauteurs = structure
+
+    def __repr__(self):
+        if not len(self.opcodes):
+            return "Programme vide"
+        pile = []
+        for i in range(len(self.opcodes) - 1, -1, -1):
+            code = self.opcodes[i]
+            if code < self.table.debut_fonctions:
+                pile.append(str(self._valeur_terminal(i)))
+                continue
+            fonction = self.table.fonction(code)
+            args = [pile.pop() for _ in range(fonction.argument)]
+            if fonction.argument == 1:
+                pile.append(f"{fonction.nom}({args[0]})")
+            elif fonction.argument == 2:
+                pile.append(f"({args[0]} {fonction.nom} {args[1]})")
+            else:
+                pile.append(f"{fonction.nom}({', '.join(args)})")
+        return pile.pop()
@@ -0,0 +1,122 @@
+import os
+import random
+import time
+import numpy as np
+from model.index_fitness import IndexFitness
+from model.programme import TableOpcodes
+from model.serialisation import encoder_lot, decoder_individus
+from cache_disque import ecrire_npz, lire_npz
+
+"""Points de reprise d'une évolution.
+
+Toutes les `intervalle` générations ou `delai` secondes, l'état complet de la
+population est écrit dans un fichier .npz : individus (un lot au format
+binaire de serialisation.py, sans pickle), fitness, échantillon actif,
+historique, états des générateurs random et NumPy et numéro de génération.
+Une évolution relancée avec le même point de reprise repart de la dernière
+sauvegarde et produit exactement le même résultat qu'une évolution ininterrompue."""
+
+FORMAT = 3
+
+
+class PointReprise:
+    """Sauvegarde périodique et restauration de l'état d'une évolution."""
+
+    def __init__(self, chemin, intervalle=10, delai=None, signature=None):
+        """
+        :param chemin: Fichier du point de reprise (remplacé à chaque sauvegarde).
+        :param intervalle: Nombre de générations entre deux sauvegardes (None : pas de critère de génération).
+        :param delai: Durée en secondes entre deux sauvegardes (None : pas de critère de durée).
+        :param signature: Identifiant de la simulation (par exemple cle_resultat) ; un point de reprise
+                          écrit avec une autre signature est refusé.
+        """
+        self.chemin = chemin
+        self.intervalle = intervalle
+        self.delai = delai
+        self.signature = signature
+        self._derniere = None
+
+    def existe(self):
+        """Indique si un point de reprise a déjà été écrit."""
+        return os.path.exists(self.chemin)
+
+    def echeance(self, generation):
+        """
+        Indique si l'état doit être sauvegardé avant la génération. La première génération
+        d'une évolution (ou d'une reprise) ne l'est jamais : son état est déjà connu.
+        :param generation: Numéro de la génération sur le point de commencer.
+        """
+        if self._derniere is None:
+            self._derniere = (generation, time.monotonic())
+            return False
+        generation_sauvegarde, instant = self._derniere
+        return ((self.intervalle is not None and generation - generation_sauvegarde >= self.intervalle)
+                or (self.delai is not None and time.monotonic() - instant >= self.delai))
+
+    def sauvegarder(self, population, generation):
+        """
+        Écrit l'état de la population avant la génération.
+        :param population: Population en cours d'évolution.
+        :param generation: Numéro de la prochaine génération à effectuer.
+        """
+        table = TableOpcodes(population.term_set, population.func_set)
+        individus = encoder_lot(population.population, table)
+        version, etat, gauss = random.getstate()
+        echantillon = population.indices_echantillon
+        ecrire_npz(
+            self.chemin,
+            {
+                "format": FORMAT,
+                "signature": self.signature,
+                "generation": generation,
+                "taille": population.taille,
+                "representation": population.representation,
+                "variables": table.variables,
+                "fonctions": [fonction.nom for fonction in table.fonctions],
+                "random": [version, list(etat), gauss],
+                "rng": population.rng.bit_generator.state,
+                "echantillon": echantillon is not None,
+                "courses": population.courses,
+            },
+            individus=np.frombuffer(individus, dtype=np.uint8),
+            fitness=population.index.valeurs(),
+            indices_echantillon=echantillon if echantillon is not None else np.empty(0, dtype=np.int64),
+            historique=np.array(population.historique, dtype=np.float64).reshape(-1, 5),
+        )
+        self._derniere = (generation, time.monotonic())
+
+    def restaurer(self, population):
+        """
+        Remet la population (construite avec les mêmes paramètres) dans l'état sauvegardé.
+        :param population: Population à restaurer.
+        :return: Numéro de la prochaine génération à effectuer.
+        :raises ValueError: Si le point de reprise provient d'une autre simulation.
+        """
+        entree = lire_npz(self.chemin)
+        meta = entree["meta"]
+        table = TableOpcodes(population.term_set, population.func_set)
+        if meta["format"] != FORMAT:
+            raise ValueError(f"Format de point de reprise non pris en charge : {meta['format']}.")
+        if self.signature is not None and meta["signature"] != self.signature:
+            raise ValueError(f"Le point de reprise {self.chemin} provient d'une autre simulation "
+                             "(paramètres, graine ou code différents).")
+        if (meta["taille"], meta["representation"], meta["variables"], meta["fonctions"]) != \
+                (population.taille, population.representation, table.variables,
+                 [fonction.nom for fonction in table.fonctions]):
+            raise ValueError(f"Le point de reprise {self.chemin} ne correspond pas à cette population.")
+
+        individus = decoder_individus(entree["individus"], population.profondeur_max, population.term_set,
+                                      population.func_set, table, population.representation)
+        population.index = IndexFitness(population.taille)
+        for individu, fitness in zip(individus, entree["fitness"].tolist()):
+            individu.fitness_score = fitness
+            population.index.ajouter(individu, fitness)
+        population._activer_echantillon(entree["indices_echantillon"] if meta["echantillon"] else None)
+        version, etat, gauss = meta["random"]
+        random.setstate((version, tuple(etat), gauss))
+        population.rng.bit_generator.state = meta["rng"]
+        population.courses = meta["courses"]
+        population.historique = [(int(ligne[0]),) + tuple(ligne[1:]) for ligne in entree["historique"].tolist()]
+        population.generations = meta["generation"]
+        self._derniere = (meta["generation"], time.monotonic())
+        return meta["generation"]
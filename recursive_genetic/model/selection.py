@@ -0,0 +1,18 @@
+import numpy as np
+
+"""Sélection vectorisée : tous les tournois d'une génération sont tirés d'un coup
+sous forme de matrice d'indices."""
+
+
+def tirer_tournois(rng, fitness, nombre, taille_tournoi):
+    """
+    Tire plusieurs tournois à la fois (candidats tirés avec remise).
+    :param rng: Générateur NumPy (np.random.Generator).
+    :param fitness: Tableau des fitness de la population.
+    :param nombre: Nombre de tournois à tirer.
+    :param taille_tournoi: Nombre de candidats par tournoi.
+    :return: Tableau des indices des vainqueurs (fitness minimale de chaque ligne).
+    """
+    candidats = rng.integers(0, len(fitness), size=(nombre, taille_tournoi))
+    return candidats[np.arange(nombre), np.argmin(fitness[candidats], axis=1)]
+
@@ -0,0 +1,127 @@
+import hashlib
+import numpy as np
+from model.programme import Programme, CONSTANTE_ENTIERE
+
+"""Format binaire compact des individus.
+
+Un lot de n individus est une suite d'octets petit-boutiste :
+
+    n                   uint32
+    longueurs[n]        uint32, nombre de nœuds de chaque individu
+    opcodes[somme]      int8, programmes préfixes concaténés (voir TableOpcodes)
+    constantes[k]       float64, une valeur par opcode de constante, dans l'ordre
+
+La structure de chaque individu est déduite de l'arité de ses opcodes : il n'y a
+ni pointeurs ni séparateurs, et un nœud non constant n'occupe qu'un octet. Ce
+format sert au transport des individus entre processus, aux points de reprise
+et au cache disque ; l'empreinte stable d'un individu (64 bits) est calculée sur
+ses octets et ne dépend donc ni du processus ni de la session."""
+
+_ENTIER = np.dtype("<u4")
+_FLOTTANT = np.dtype("<f8")
+
+
+def _programmes(individus, table):
+    return [individu if isinstance(individu, Programme) else Programme.depuis_arbre(individu, table)
+            for individu in individus]
+
+
+def empreinte(opcodes, constantes):
+    """
+    Empreinte structurelle stable d'un programme préfixe : deux programmes ont la même
+    empreinte, dans n'importe quel processus, s'ils ont les mêmes opcodes et les mêmes constantes.
+    :param opcodes: Tableau int8 des opcodes.
+    :param constantes: Tableau float64 des constantes, aligné sur opcodes.
+    :return: Entier non signé sur 64 bits.
+    """
+    calcul = hashlib.blake2b(np.array([len(opcodes)], dtype=_ENTIER).tobytes(), digest_size=8)
+    calcul.update(np.ascontiguousarray(opcodes, dtype=np.int8).tobytes())
+    calcul.update(np.ascontiguousarray(constantes[opcodes <= CONSTANTE_ENTIERE], dtype=_FLOTTANT).tobytes())
+    return int.from_bytes(calcul.digest(), "little")
+
+
+def encoder_lot(individus, table):
+    """
+    Encode un lot d'arbres (ou de programmes) en une seule suite d'octets.
+    :param individus: Individus à encoder.
+    :param table: Table d'opcodes commune (l'encodeur et le décodeur doivent utiliser la même).
+    :return: Octets du lot.
+    """
+    programmes = _programmes(individus, table)
+    longueurs = np.array([len(programme.opcodes) for programme in programmes], dtype=_ENTIER)
+    if programmes:
+        opcodes = np.concatenate([programme.opcodes for programme in programmes]).astype(np.int8, copy=False)
+        constantes = np.concatenate([programme.constantes for programme in programmes])
+    else:
+        opcodes, constantes = np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64)
+    return b"".join((
+        np.array([len(programmes)], dtype=_ENTIER).tobytes(),
+        longueurs.tobytes(),
+        opcodes.tobytes(),
+        constantes[opcodes <= CONSTANTE_ENTIERE].astype(_FLOTTANT, copy=False).tobytes(),
+    ))
+
+
+def _lire_lot(donnees):
+    # Découpe un lot en (longueurs, opcodes concaténés, constantes dépliées)
+    try:
+        n = int(np.frombuffer(donnees, dtype=_ENTIER, count=1)[0])
+        longueurs = np.frombuffer(donnees, dtype=_ENTIER, count=n, offset=_ENTIER.itemsize).astype(np.int64)
+        debut = _ENTIER.itemsize * (n + 1)
+        total = int(longueurs.sum())
+        opcodes = np.frombuffer(donnees, dtype=np.int8, count=total, offset=debut)
+        masque = opcodes <= CONSTANTE_ENTIERE
+        nb_constantes = int(np.count_nonzero(masque))
+        if len(donnees) != debut + total + _FLOTTANT.itemsize * nb_constantes:
+            raise ValueError
+        constantes = np.zeros(total, dtype=np.float64)
+        constantes[masque] = np.frombuffer(donnees, dtype=_FLOTTANT, count=nb_constantes, offset=debut + total)
+    except ValueError:
+        raise ValueError("Lot d'individus tronqué ou invalide.") from None
+    return longueurs, opcodes, constantes
+
+
+def decoder_lot(donnees):
+    """
+    Relit les programmes d'un lot produit par encoder_lot.
+    :param donnees: Octets du lot (bytes, bytearray ou tableau uint8).
+    :return: Liste de couples (opcodes, constantes), un par individu, dans l'ordre du lot.
+    """
+    longueurs, opcodes, constantes = _lire_lot(donnees)
+    opcodes = opcodes.copy()
+    fins = np.cumsum(longueurs)
+    # Les individus sont des vues sur deux tableaux communs : les programmes ne modifient
+    # jamais leurs tableaux en place
+    return [(opcodes[debut:fin], constantes[debut:fin])
+            for debut, fin in zip((fins - longueurs).tolist(), fins.tolist())]
+
+
+def decoder_individus(donnees, profondeur_max, term_set, func_set, table, representation="programme"):
+    """
+    Reconstruit les individus d'un lot.
+    :param donnees: Octets du lot.
+    :param profondeur_max: Profondeur maximale des individus.
+    :param term_set: Terminaux des individus.
+    :param func_set: Fonctions des individus.
+    :param table: Table d'opcodes utilisée à l'encodage.
+    :param representation: "programme" pour des Programme, "arbre" pour des Arbre.
+    :return: Liste d'individus.
+    """
+    individus = []
+    for opcodes, constantes in decoder_lot(donnees):
+        programme = Programme(profondeur_max, term_set, func_set, table=table, opcodes=opcodes, constantes=constantes)
+        individus.append(programme if representation == "programme" else programme.vers_arbre())
+    return individus
+
+
+def empreintes_lot(donnees):
+    """
+    Empreintes stables des individus d'un lot, sans reconstruire les individus
+    (déduplication d'individus reçus d'un autre processus ou relus sur disque).
+    :param donnees: Octets du lot.
+    :return: Tableau uint64 des empreintes, dans l'ordre du lot.
+    """
+    longueurs, opcodes, constantes = _lire_lot(donnees)
+    fins = np.cumsum(longueurs)
+    return np.array([empreinte(opcodes[debut:fin], constantes[debut:fin])
+                     for debut, fin in zip((fins - longueurs).tolist(), fins.tolist())], dtype=np.uint64)
@@ -0,0 +1,129 @@
+import numpy as np
+from model.noeud import NoeudInterne
+
+"""Table des nœuds d'un arbre, en ordre préfixe.
+
+Pour chaque nœud, la table garde son parent, sa position parmi les enfants de ce
+parent, sa profondeur, la taille et la hauteur de son sous-arbre. Le sous-arbre
+d'un nœud i occupe les indices [i, i + tailles[i]) : une greffe se fait donc par
+raccordement de tranches, comme pour Programme, et seuls les ancêtres du point de
+greffe sont mis à jour."""
+
+
+class TableNoeuds:
+    """Index préfixe des nœuds d'un arbre persistant."""
+
+    def __init__(self, noeuds, parents, emplacements, profondeurs, tailles, hauteurs):
+        """
+        :param noeuds: Liste des nœuds en ordre préfixe (le premier est la racine).
+        :param parents: Indice du parent de chaque nœud (-1 pour la racine).
+        :param emplacements: Position de chaque nœud parmi les enfants de son parent.
+        :param profondeurs: Profondeur de chaque nœud (0 pour la racine).
+        :param tailles: Nombre de nœuds du sous-arbre de chaque nœud.
+        :param hauteurs: Hauteur du sous-arbre de chaque nœud (0 pour une feuille).
+        """
+        self.noeuds = noeuds
+        self.parents = parents
+        self.emplacements = emplacements
+        self.profondeurs = profondeurs
+        self.tailles = tailles
+        self.hauteurs = hauteurs
+        self.internes = np.flatnonzero(hauteurs > 0)
+        self.externes = np.flatnonzero(hauteurs == 0)
+
+    @classmethod
+    def construire(cls, racine):
+        """
+        Construit la table d'un arbre par un parcours préfixe itératif.
+        :param racine: Racine de l'arbre.
+        """
+        noeuds, parents, emplacements, profondeurs = [], [], [], []
+        pile = [(racine, -1, 0, 0)]
+        while pile:
+            noeud, parent, emplacement, profondeur = pile.pop()
+            indice = len(noeuds)
+            noeuds.append(noeud)
+            parents.append(parent)
+            emplacements.append(emplacement)
+            profondeurs.append(profondeur)
+            if isinstance(noeud, NoeudInterne):
+                pile.extend((enfant, indice, k, profondeur + 1)
+                            for k, enfant in reversed(list(enumerate(noeud.enfants))))
+        parents = np.array(parents, dtype=np.int64)
+        # Tailles et hauteurs se remontent en ordre préfixe inverse (les enfants avant le parent)
+        tailles = np.ones(len(noeuds), dtype=np.int64)
+        hauteurs = np.zeros(len(noeuds), dtype=np.int64)
+        for i in range(len(noeuds) - 1, 0, -1):
+            parent = parents[i]
+            tailles[parent] += tailles[i]
+            hauteurs[parent] = max(hauteurs[parent], hauteurs[i] + 1)
+        return cls(noeuds, parents, np.array(emplacements, dtype=np.int64),
+                   np.array(profondeurs, dtype=np.int64), tailles, hauteurs)
+
+    def __len__(self):
+        return len(self.noeuds)
+
+    def sous_table(self, i):
+        """
+        Renvoie la table du sous-arbre enraciné en i (tranches de cette table).
+        :param i: Indice préfixe de la racine du sous-arbre.
+        """
+        fin = i + self.tailles[i]
+        parents = self.parents[i:fin] - i
+        parents[0] = -1
+        emplacements = self.emplacements[i:fin].copy()
+        emplacements[0] = 0
+        return TableNoeuds(self.noeuds[i:fin], parents, emplacements,
+                           self.profondeurs[i:fin] - self.profondeurs[i],
+                           self.tailles[i:fin], self.hauteurs[i:fin])
+
+    def greffer(self, i, greffon):
+        """
+        Renvoie la table de l'arbre obtenu en remplaçant le sous-arbre enraciné en i.
+        Les ancêtres de i sont recréés (copie de chemin), les autres nœuds sont partagés ;
+        cette table n'est pas modifiée.
+        :param i: Indice préfixe du sous-arbre à remplacer.
+        :param greffon: Table du sous-arbre à insérer.
+        :return: Nouvelle table (sa racine est noeuds[0]).
+        """
+        fin = i + self.tailles[i]
+        delta = len(greffon) - self.tailles[i]
+        ancetres = []
+        a = self.parents[i]
+        while a >= 0:
+            ancetres.append(int(a))
+            a = self.parents[a]
+
+        parents_suite = self.parents[fin:].copy()
+        parents_suite[parents_suite >= fin] += delta
+        parents_greffon = greffon.parents + i
+        parents_greffon[0] = self.parents[i]
+        emplacements_greffon = greffon.emplacements.copy()
+        emplacements_greffon[0] = self.emplacements[i]
+
+        noeuds = self.noeuds[:i] + list(greffon.noeuds) + self.noeuds[fin:]
+        tailles = np.concatenate((self.tailles[:i], greffon.tailles, self.tailles[fin:]))
+        hauteurs = np.concatenate((self.hauteurs[:i], greffon.hauteurs, self.hauteurs[fin:]))
+        tailles[ancetres] += delta
+
+        # Copie de chemin, du point de greffe vers la racine
+        enfant, sous_arbre = i, greffon.noeuds[0]
+        for a in ancetres:
+            sous_arbre = noeuds[a].remplacer_enfant(int(self.emplacements[enfant]), sous_arbre)
+            noeuds[a] = sous_arbre
+            # Les enfants de a se suivent : le premier est en a + 1, le suivant après son sous-arbre
+            hauteur, k = 0, a + 1
+            for _ in sous_arbre.enfants:
+                hauteur = max(hauteur, hauteurs[k] + 1)
+                k += tailles[k]
+            hauteurs[a] = hauteur
+            enfant = a
+
+        return TableNoeuds(
+            noeuds,
+            np.concatenate((self.parents[:i], parents_greffon, parents_suite)),
+            np.concatenate((self.emplacements[:i], emplacements_greffon, self.emplacements[fin:])),
+            np.concatenate((self.profondeurs[:i], greffon.profondeurs + self.profondeurs[i], self.profondeurs[fin:])),
+            tailles,
+            hauteurs,
+        )
@@ -1,11 +1,43 @@
+import weakref
+import numpy as np
+
+
 class Terminal:
-    def __init__(self, valeur):
-        self.valeur = valeur
+    """
+    Terminal immuable et partagé (poids mouche) : il n'existe qu'un objet par nom de
+    variable et par constante distincte, que tous les arbres peuvent référencer.
+    """
+
+    __slots__ = ("valeur", "__weakref__")
+
+    # Terminaux vivants, indexés par (type, repr) pour distinguer 1 de 1.0 et -0.0 de 0.0
+    _instances = weakref.WeakValueDictionary()
+
+    def __new__(cls, valeur):
+        cle = (type(valeur).__name__, repr(valeur))
+        terminal = cls._instances.get(cle)
+        if terminal is None:
+            terminal = super().__new__(cls)
+            object.__setattr__(terminal, "valeur", valeur)
+            cls._instances[cle] = terminal
+        return terminal
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("Un Terminal est immuable : créer un nouveau Terminal(valeur).")
+
+    def __reduce__(self):
+        # Le terminal est réinterné à la désérialisation
+        return Terminal, (self.valeur,)
 
     def evaluer(self, variables):
-        if isinstance(self.valeur, (int, float)):  #Constante
-            return self.valeur
+        if isinstance(self.valeur, (int, float)):  #Constante (flottant NumPy, comme en vectoriel)
+            return np.float64(self.valeur)
         return variables.get(self.valeur)
 
+    def evaluer_vect(self, colonnes):
+        if isinstance(self.valeur, (int, float)):  #Constante
+            return np.float64(self.valeur)
+        return colonnes[self.valeur]
+
     def __repr__(self):
         return str(self.valeur)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import numpy as np
+
+"""Noyaux protégés des opérateurs, valables pour des scalaires comme pour des tableaux.
+
+Aucun noyau ne lève d'exception : une erreur de domaine reçoit une valeur définie
+(division par zéro et logarithme d'un nombre négatif ou nul valent 1, une base
+négative est prise en valeur absolue sous un exposant non entier) et un
+débordement donne inf ou NaN. Ces valeurs non finies forment le masque
+d'invalidité d'un individu, converti en pénalité lors de la réduction de la fitness.
+Les noyaux s'appellent sous np.errstate(all="ignore") pour ne pas émettre d'avertissements."""
+
+
+def division(a, b):
+    """a / b, ou 1 là où b est nul."""
+    return np.where(b != 0, a / np.where(b != 0, b, 1), 1.0)
+
+
+def puissance(a, b):
+    """a ** b ; une base négative est prise en valeur absolue sauf sous un exposant entier positif."""
+    base = np.where((a >= 0) | ((np.floor(b) == b) & (b >= 0)), a, np.abs(a))
+    return np.power(np.asarray(base, dtype=float), b)
+
+
+def logarithme(x):
+    """log(x), ou 1 là où x <= 0."""
+    return np.where(x > 0, np.log(np.where(x > 0, x, 1)), 1.0)
+
+
+def exponentielle(x):
+    """exp(x) ; un débordement donne inf (invalide) au lieu d'une OverflowError."""
+    return np.exp(x)
+
+
+def borner(valeurs, borne):
+    """
+    Ramène les valeurs dans [-borne, borne] (saturation) ; NaN reste invalide.
+    :param valeurs: Sorties d'un opérateur.
+    :param borne: Magnitude maximale, ou None pour ne pas borner.
+    """
+    if borne is None:
+        return valeurs
+    return np.clip(valeurs, -borne, borne)
+
+
+def en_flottants(variables):
+    """
+    Convertit les valeurs d'un point en float64 : l'évaluation reste en arithmétique
+    flottante bornée, sans entiers Python de précision arbitraire.
+    :param variables: Dictionnaire associant des variables à leurs valeurs.
+    """
+    return {nom: np.float64(valeur) for nom, valeur in variables.items()}
+
+
+def masque_invalide(valeurs):
+    """
+    Renvoie le masque des valeurs non finies (NaN ou infinies).
+    :param valeurs: Tableau de sorties (ou d'erreurs).
+    """
+    return ~np.isfinite(valeurs)
+
+
+def erreur_quadratique_moyenne(valeurs, valeurs_cible, penalite=np.inf):
+    """
+    Erreur quadratique moyenne en une seule réduction ; un individu dont une erreur n'est pas
+    finie (sortie ou cible invalide, débordement) reçoit la pénalité.
+    :param valeurs: Sorties, de forme [points] ou [individus, points] (un scalaire est diffusé).
+    :param valeurs_cible: Valeurs de la fonction cible, de forme [points].
+    :param penalite: Fitness attribuée aux individus invalides.
+    :return: Fitness (float) ou tableau des fitness par individu.
+    """
+    valeurs_cible = np.asarray(valeurs_cible, dtype=float)
+    valeurs = np.asarray(valeurs, dtype=float)
+    forme = np.broadcast_shapes(valeurs.shape, valeurs_cible.shape)
+    with np.errstate(all="ignore"):
+        erreurs = np.square(np.broadcast_to(valeurs, forme) - valeurs_cible)
+    invalides = masque_invalide(erreurs).any(axis=-1)
+    fitness = np.where(invalides, penalite, erreurs.mean(axis=-1))
+    return float(fitness) if np.ndim(fitness) == 0 else fitness
+
+
+def etapes_course(nombre_points, nb_blocs):
+    """
+    Découpe les points en étapes d'une évaluation en course : nb_blocs blocs entrelacés
+    (points k, k + nb_blocs, ...) couvrant chacun tout le domaine ; la première étape
+    contient un bloc, chaque étape suivante autant de blocs que toutes les précédentes.
+    :param nombre_points: Nombre de points.
+    :param nb_blocs: Nombre de blocs.
+    :return: Liste des tableaux d'indices des étapes.
+    """
+    nb_blocs = max(1, min(nb_blocs, nombre_points))
+    ordre = np.concatenate([np.arange(k, nombre_points, nb_blocs) for k in range(nb_blocs)])
+    fins = np.cumsum([len(range(k, nombre_points, nb_blocs)) for k in range(nb_blocs)])
+    arrets = sorted({min(2 ** j, nb_blocs) for j in range(nb_blocs.bit_length() + 1)})
+    bornes = [0] + [int(fins[arret - 1]) for arret in arrets]
+    return [ordre[debut:fin] for debut, fin in zip(bornes[:-1], bornes[1:])]
+
+
+def course_erreur_quadratique(evaluer_bloc, valeurs_cible, seuil, nb_blocs=16, penalite=np.inf):
+    """
+    Erreur quadratique moyenne accumulée étape par étape (course, voir etapes_course) :
+    l'évaluation s'arrête dès que la somme partielle prouve que la fitness ne peut pas
+    passer sous le seuil. Une évaluation menée à son terme donne exactement
+    erreur_quadratique_moyenne.
+    :param evaluer_bloc: Fonction renvoyant les sorties de l'individu sur un tableau d'indices de points.
+    :param valeurs_cible: Valeurs de la fonction cible, de forme [points].
+    :param seuil: Fitness à battre ; l'évaluation est interrompue dès que la borne inférieure l'atteint.
+    :param nb_blocs: Nombre de blocs de points.
+    :param penalite: Fitness attribuée aux individus invalides.
+    :return: Couple (fitness ou borne inférieure de la fitness, interrompue).
+    """
+    valeurs_cible = np.asarray(valeurs_cible, dtype=float)
+    nombre_points = len(valeurs_cible)
+    etapes = etapes_course(nombre_points, nb_blocs)
+    valeurs = np.empty(nombre_points)
+    somme = 0.0
+    for k, indices in enumerate(etapes):
+        cible = valeurs_cible[indices]
+        sorties = np.broadcast_to(np.asarray(evaluer_bloc(indices), dtype=float), cible.shape)
+        with np.errstate(all="ignore"):
+            erreurs = np.square(sorties - cible)
+        if masque_invalide(erreurs).any():
+            # Individu invalide : la pénalité est sa fitness exacte
+            return float(penalite), False
+        valeurs[indices] = sorties
+        somme += float(erreurs.sum())
+        if k < len(etapes) - 1 and somme / nombre_points >= seuil:
+            return somme / nombre_points, True
+    return erreur_quadratique_moyenne(valeurs, valeurs_cible, penalite), False
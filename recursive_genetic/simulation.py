@@ -0,0 +1,174 @@
+import random
+import numpy as np
+from model.population import Population
+from model.programme import TableOpcodes
+from model.serialisation import encoder_lot, decoder_individus
+from model.reprise import PointReprise
+from model.terminal import Terminal
+from fonctions_base import FONCTIONS_BASE
+from cible import compiler_cible
+from cache_disque import CacheResultats
+from cache_resultats import DOSSIER_DEFAUT, cle_resultat
+
+"""Exécution d'une simulation sans interface graphique.
+
+Ce module ne dépend ni de PyQt5 ni de matplotlib : il lit un fichier de
+configuration, lance l'évolution et renvoie le résultat. main.py (interface)
+et lancer_simulation.py (ligne de commande) s'appuient dessus."""
+
+
+def lire_configuration(config_file):
+    """
+    Lit et convertit les paramètres d'un fichier de configuration.
+    :param config_file: Chemin du fichier contenant les paramètres de la simulation.
+    :return: Dictionnaire des paramètres typés (les fonctions actives sont dans "fonctions").
+    :raises KeyError: Si un paramètre manque.
+    :raises ValueError: Si une valeur ne peut pas être convertie.
+    """
+    params = {}
+    with open(config_file, "r") as f:
+        for line in f:
+            if line.strip():
+                key, value = line.strip().split(" = ")
+                params[key] = value
+
+    return {
+        "fonction_cible": params["fonction_cible"],
+        "intervalle_min": float(params["intervalle_min"]),
+        "intervalle_max": float(params["intervalle_max"]),
+        "nombre_points": int(params["nombre_points"]),
+        "taille_population": int(params["taille_population"]),
+        "profondeur_max": int(params["profondeur_max"]),
+        "proba_crossover": float(params["proba_crossover"]),
+        "proba_mutation": float(params["proba_mutation"]),
+        "proba_mutation_point": float(params["proba_mutation_point"]),
+        "generations_max": int(params["generations_max"]),
+        "fitness_cible": float(params["fitness_cible"]),
+        "fonctions": [key for key, val in params.items() if val == "True"],
+        # Garde-fous numériques optionnels (absents des fichiers de l'interface)
+        "borne_magnitude": float(params["borne_magnitude"]) if "borne_magnitude" in params else None,
+        "budget_operations": int(params["budget_operations"]) if "budget_operations" in params else None,
+        # Fitness sur un sous-échantillon des points (voir Population)
+        "echantillonnage": params.get("echantillonnage"),
+        "taille_echantillon": int(params["taille_echantillon"]) if "taille_echantillon" in params else None,
+        "periode_echantillon": int(params.get("periode_echantillon", 1)),
+        # Évaluation en course des descendants (0 : évaluation complète)
+        "nb_blocs_course": int(params.get("nb_blocs_course", 0)),
+    }
+
+
+def creer_fonction_cible(expression):
+    """
+    Construit la fonction cible à partir de son expression en x.
+    L'expression est validée puis compilée une fois (voir cible.py) ; elle n'est jamais passée à eval telle quelle.
+    :param expression: Expression Python, par exemple "x**3+4".
+    :raises ValueError: Si l'expression utilise un élément non autorisé.
+    """
+    return compiler_cible(expression)
+
+
+def executer(config_file, afficher_stats=False, graine=None, cache_resultats=None,
+             reprise=None, intervalle_reprise=10, delai_reprise=None):
+    """
+    Lance une simulation complète à partir d'un fichier de configuration.
+    :param config_file: Chemin du fichier contenant les paramètres de la simulation.
+    :param afficher_stats: Si True, affiche (et trace) les statistiques à chaque génération.
+    :param graine: Graine du run (générateurs random et NumPy), None pour un run non reproductible.
+    :param cache_resultats: Cache disque des résultats (voir cache_disque.py), None pour le cache
+                            par défaut, False pour le désactiver. Seuls les runs avec une graine y sont
+                            lus et écrits : sans graine, le résultat n'est pas reproductible.
+    :param reprise: Fichier du point de reprise (None : pas de sauvegarde). S'il existe, l'évolution
+                    repart de l'état qu'il contient et donne le même résultat qu'un run ininterrompu.
+    :param intervalle_reprise: Nombre de générations entre deux sauvegardes (None : pas de critère de génération).
+    :param delai_reprise: Durée en secondes entre deux sauvegardes (None : pas de critère de durée).
+    :return: Dictionnaire contenant le meilleur individu, sa fitness, le nombre de générations,
+             l'historique des générations, les valeurs cibles, les statistiques du cache,
+             la fonction cible et les paramètres lus.
+    """
+    if graine is not None:
+        random.seed(graine)
+    parametres = lire_configuration(config_file)
+    fonction_cible = creer_fonction_cible(parametres["fonction_cible"])
+
+    # Créer les points d'échantillonnage
+    points = [{"x": x} for x in np.linspace(parametres["intervalle_min"], parametres["intervalle_max"],
+                                           parametres["nombre_points"])]
+
+    # Configurer les terminaux et les fonctions
+    term_set = [Terminal("x")] + [Terminal(i) for i in range(-2, 2)]
+    func_set = [f for f in FONCTIONS_BASE if f.nom in parametres["fonctions"]]
+    table = TableOpcodes(term_set, func_set)
+
+    # Résultat déjà calculé pour ces paramètres, cette graine et ce code
+    if cache_resultats is None:
+        cache_resultats = CacheResultats(DOSSIER_DEFAUT)
+    cle = cle_resultat(parametres, graine) if cache_resultats and graine is not None else None
+    entree = cache_resultats.obtenir(cle) if cle is not None else None
+    if entree is not None:
+        meta = entree["meta"]
+        meilleur_arbre, = decoder_individus(entree["meilleur"], parametres["profondeur_max"], term_set, func_set,
+                                            table, representation="arbre")
+        meilleur_arbre.fitness_score = meta["fitness"]
+        return {
+            "meilleur": meilleur_arbre,
+            "fitness": meta["fitness"],
+            "generations": meta["generations"],
+            "historique": [(int(ligne[0]),) + tuple(ligne[1:]) for ligne in entree["historique"].tolist()],
+            "valeurs_cible": entree["valeurs_cible"],
+            "cache": meta["cache"],
+            "fonction_cible": fonction_cible,
+            "parametres": parametres,
+        }
+
+    # Créer et générer la population
+    population = Population(
+        taille=parametres["taille_population"],
+        profondeur_max=parametres["profondeur_max"],
+        term_set=term_set,
+        func_set=func_set,
+        fonction_cible=fonction_cible,
+        points=points,
+        proba_crossover=parametres["proba_crossover"],
+        proba_mutation=parametres["proba_mutation"],
+        proba_mutation_point=parametres["proba_mutation_point"],
+        sorties_incrementales=True,
+        borne_magnitude=parametres["borne_magnitude"],
+        budget_operations=parametres["budget_operations"],
+        echantillonnage=parametres["echantillonnage"],
+        taille_echantillon=parametres["taille_echantillon"],
+        periode_echantillon=parametres["periode_echantillon"],
+        nb_blocs_course=parametres["nb_blocs_course"],
+        graine=graine,
+    )
+    point_reprise = None
+    if reprise is not None:
+        point_reprise = PointReprise(reprise, intervalle_reprise, delai_reprise,
+                                     signature=cle_resultat(parametres, graine))
+    # Une reprise remplace la population initiale par l'état sauvegardé
+    if point_reprise is None or not point_reprise.existe():
+        population.generer_population()
+
+    # Lancer l'évolution
+    meilleur_arbre = population.evoluer(generations_max=parametres["generations_max"],
+                                        fitness_cible=parametres["fitness_cible"],
+                                        afficher_stats=afficher_stats, reprise=point_reprise)
+
+    resultat = {
+        "meilleur": meilleur_arbre,
+        "fitness": population.fitness_complete(meilleur_arbre),
+        "generations": population.generations,
+        "historique": population.historique,
+        "valeurs_cible": population.jeu_complet[2],
+        "cache": population.cache.statistiques(),
+        "fonction_cible": fonction_cible,
+        "parametres": parametres,
+    }
+    if cle is not None:
+        cache_resultats.enregistrer(
+            cle,
+            {"fitness": resultat["fitness"], "generations": resultat["generations"], "cache": resultat["cache"]},
+            meilleur=np.frombuffer(encoder_lot([meilleur_arbre], table), dtype=np.uint8),
+            historique=np.array(population.historique, dtype=np.float64).reshape(-1, 5),
+            valeurs_cible=resultat["valeurs_cible"],
+        )
+    return resultat
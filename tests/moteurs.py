@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+
+"""Outils communs aux tests : configurations et exécution d'un script dans un moteur.
+
+Les deux moteurs ont des modules de même nom (simulation, ...) et ne peuvent pas être
+importés dans le même processus : chaque scénario est exécuté dans son propre processus,
+depuis le dossier du moteur, et renvoie son résultat en JSON sur la dernière ligne de
+sa sortie."""
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOTEURS = {"recursif": "recursive_genetic", "iteratif": "not_recursive_genetic"}
+
+CONFIG_RECURSIF = """fonction_cible = x**3+4
+intervalle_min = -5.0
+intervalle_max = 5.0
+nombre_points = 40
+taille_population = 60
+profondeur_max = 4
+proba_crossover = 0.5
+proba_mutation = 0.3
+proba_mutation_point = 0.2
+generations_max = 25
+fitness_cible = 0
++ = True
+- = True
+* = True
+/ = True
+^ = False
+cos = False
+sin = False
+exp = False
+log = False
+abs = False
+echantillonnage = aleatoire
+taille_echantillon = 20
+"""
+
+CONFIG_ITERATIF = """fonction_cible = np.cos(x+4)
+intervalle_min = 2
+intervalle_max = 5.0
+nombre_points = 40
+taille_population = 60
+profondeur_max = 4
+proba_crossover = 0.5
+proba_mutation = 0.3
+proba_mutation_point = 0.2
+generations_max = 20
+fitness_cible = 0
++ = True
+- = True
+* = True
+/ = True
+^ = False
+cos = True
+sin = True
+exp = False
+log = False
+abs = False
+"""
+
+
+def ecrire_config(dossier, contenu):
+    """
+    Écrit un fichier de configuration dans un dossier temporaire.
+    :param dossier: Dossier du fichier.
+    :param contenu: Lignes "paramètre = valeur" de la configuration.
+    :return: Chemin du fichier.
+    """
+    chemin = os.path.join(dossier, "config_simulation.txt")
+    with open(chemin, "w") as fichier:
+        fichier.write(contenu)
+    return chemin
+
+
+def lancer(moteur, script, *arguments, entree=None, graine_hash="0"):
+    """
+    Exécute un script dans le dossier d'un moteur.
+    :param moteur: "recursif" ou "iteratif".
+    :param script: Code Python du script.
+    :param arguments: Arguments du script (sys.argv[1:]).
+    :param entree: Texte envoyé sur l'entrée standard du script.
+    :param graine_hash: PYTHONHASHSEED du processus (hash() des chaînes en dépend).
+    :return: Processus terminé (subprocess.CompletedProcess).
+    """
+    dossier = os.path.join(RACINE, MOTEURS[moteur])
+    environnement = dict(os.environ, PYTHONPATH=os.pathsep.join([dossier, RACINE]), PYTHONHASHSEED=graine_hash)
+    return subprocess.run([sys.executable, "-c", script, *arguments], cwd=dossier, env=environnement,
+                          input=entree, capture_output=True, text=True, timeout=600)
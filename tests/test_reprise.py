@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+from moteurs import CONFIG_ITERATIF, CONFIG_RECURSIF, ecrire_config, lancer
+
+"""Un run interrompu puis repris depuis son point de reprise donne exactement le
+même résultat qu'un run ininterrompu, dans les deux moteurs.
+
+Lancement : python -m pytest tests (ou python -m unittest discover tests)."""
+
+# Code de sortie d'un run interrompu volontairement (arrêt brutal, sans sauvegarde finale)
+INTERRUPTION = 3
+
+# Run seedé, avec un point de reprise si argv[2] n'est pas vide ; avec argv[3] = n > 0, le
+# processus s'arrête brutalement au n-ième crossover (recursif) ou à la n-ième évaluation (iteratif)
+RUN_RECURSIF = """
+import json, os, sys
+import simulation
+from model.population import Population
+config, reprise, arret = sys.argv[1], sys.argv[2] or None, int(sys.argv[3])
+if arret:
+    crossover, appels = Population.effectuer_crossover, [0]
+    def interrompre(self):
+        appels[0] += 1
+        if appels[0] == arret:
+            os._exit(%d)
+        return crossover(self)
+    Population.effectuer_crossover = interrompre
+r = simulation.executer(config, graine=7, cache_resultats=False, reprise=reprise, intervalle_reprise=4)
+print(json.dumps({"meilleur": repr(r["meilleur"]), "fitness": float(r["fitness"]),
+                  "historique": [list(map(float, ligne)) for ligne in r["historique"]]}))
+""" % INTERRUPTION
+
+RUN_ITERATIF = """
+import json, os, sys
+import simulation
+from popavecclasses import Pop
+config, reprise, arret = sys.argv[1], sys.argv[2] or None, int(sys.argv[3])
+if arret:
+    evaluer, appels = Pop.evaluate, [0]
+    def interrompre(self, *args, **kwargs):
+        if self.name == "population":
+            appels[0] += 1
+            if appels[0] == arret:
+                os._exit(%d)
+        return evaluer(self, *args, **kwargs)
+    Pop.evaluate = interrompre
+r = simulation.executer(config, graine=11, cache_resultats=False, reprise=reprise, intervalle_reprise=3)
+print(json.dumps({"meilleur": repr(r["meilleur"]), "fitness": float(r["fitness"]),
+                  "historique": [list(map(float, ligne)) for ligne in r["historique"]]}))
+""" % INTERRUPTION
+
+
+class TestReprise(unittest.TestCase):
+
+    def resultat(self, processus):
+        self.assertEqual(processus.returncode, 0, processus.stderr)
+        return json.loads(processus.stdout.splitlines()[-1])
+
+    def verifier_reprise(self, moteur, script, config, arret):
+        with tempfile.TemporaryDirectory() as dossier:
+            fichier_config = ecrire_config(dossier, config)
+            point = os.path.join(dossier, "reprise.npz")
+            complet = self.resultat(lancer(moteur, script, fichier_config, "", "0"))
+            interrompu = lancer(moteur, script, fichier_config, point, str(arret))
+            self.assertEqual(interrompu.returncode, INTERRUPTION, interrompu.stderr)
+            self.assertTrue(os.path.exists(point))
+            repris = self.resultat(lancer(moteur, script, fichier_config, point, "0"))
+        self.assertEqual(repris["historique"], complet["historique"])
+        self.assertEqual(repris["meilleur"], complet["meilleur"])
+        self.assertEqual(repris["fitness"], complet["fitness"])
+
+    def test_recursif(self):
+        self.verifier_reprise("recursif", RUN_RECURSIF, CONFIG_RECURSIF, 10)
+
+    def test_iteratif(self):
+        self.verifier_reprise("iteratif", RUN_ITERATIF, CONFIG_ITERATIF, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
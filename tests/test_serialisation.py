@@ -0,0 +1,97 @@
+import json
+import tempfile
+import unittest
+from moteurs import CONFIG_ITERATIF, ecrire_config, lancer
+
+"""Format binaire des individus : un lot encodé puis décodé redonne les mêmes individus,
+et les empreintes d'un lot sont les mêmes dans un autre processus.
+
+Lancement : python -m pytest tests (ou python -m unittest discover tests)."""
+
+# Lot d'individus aléatoires : vérifie l'aller-retour encodage/décodage dans le processus
+# et renvoie le lot (en hexadécimal) avec ses empreintes
+LOT_RECURSIF = """
+import json, random
+import numpy as np
+from model.arbre import Arbre
+from model.programme import Programme, TableOpcodes
+from model.terminal import Terminal
+from fonctions_base import FONCTIONS_BASE
+from model.serialisation import encoder_lot, decoder_lot, decoder_individus, empreintes_lot
+random.seed(3)
+term_set = [Terminal("x")] + [Terminal(i) for i in range(-2, 2)] + [Terminal(1.5)]
+func_set = list(FONCTIONS_BASE)
+table = TableOpcodes(term_set, func_set)
+arbres = []
+for i in range(60):
+    arbre = Arbre(5, term_set, func_set)
+    (arbre.generer_grow if i % 2 else arbre.generer_full)()
+    arbres.append(arbre)
+programmes = [Programme.depuis_arbre(arbre, table) for arbre in arbres]
+lot = encoder_lot(arbres, table)
+for programme, (opcodes, constantes) in zip(programmes, decoder_lot(lot)):
+    assert np.array_equal(programme.opcodes, opcodes) and np.array_equal(programme.constantes, constantes)
+relus = decoder_individus(lot, 5, term_set, func_set, table, representation="arbre")
+assert [repr(arbre) for arbre in relus] == [repr(arbre) for arbre in arbres]
+assert encoder_lot(relus, table) == lot
+assert empreintes_lot(lot).tolist() == [programme.empreinte() for programme in programmes]
+print(json.dumps({"lot": lot.hex(), "empreintes": empreintes_lot(lot).tolist()}))
+"""
+
+LOT_ITERATIF = """
+import json, sys
+import numpy as np
+import simulation
+from popavecclasses import Pop
+from serialization import encode_batch, decode_batch, batch_hashes
+context = simulation.configurer(sys.argv[1], 5)
+population = Pop("lot", context, 5)
+population.generate(60, context.max_depth, context.ratio_full_trees)
+arbres = list(population.content)
+lot = encode_batch(arbres)
+relus = decode_batch(lot, context)
+x = np.linspace(-3, 3, 25)
+for arbre, relu in zip(arbres, relus):
+    assert repr(relu) == repr(arbre) and relu.depth == arbre.depth
+    assert np.array_equal(relu.evaluate({"x": x}), arbre.evaluate({"x": x}), equal_nan=True)
+assert encode_batch(relus) == lot
+assert batch_hashes(lot).tolist() == [arbre.structural_hash() for arbre in arbres]
+print(json.dumps({"lot": lot.hex(), "empreintes": batch_hashes(lot).tolist()}))
+"""
+
+# Empreintes d'un lot lu sur l'entrée standard
+EMPREINTES_RECURSIF = """
+import json, sys
+from model.serialisation import empreintes_lot
+print(json.dumps(empreintes_lot(bytes.fromhex(sys.stdin.read())).tolist()))
+"""
+
+EMPREINTES_ITERATIF = """
+import json, sys
+from serialization import batch_hashes
+print(json.dumps(batch_hashes(bytes.fromhex(sys.stdin.read())).tolist()))
+"""
+
+
+class TestSerialisation(unittest.TestCase):
+
+    def verifier_lot(self, moteur, script_lot, script_empreintes, *arguments):
+        ecrit = lancer(moteur, script_lot, *arguments, graine_hash="1")
+        self.assertEqual(ecrit.returncode, 0, ecrit.stderr)
+        lot = json.loads(ecrit.stdout.splitlines()[-1])
+        # Autre processus, autre graine de hash : les empreintes ne dépendent pas de hash()
+        relu = lancer(moteur, script_empreintes, entree=lot["lot"], graine_hash="2")
+        self.assertEqual(relu.returncode, 0, relu.stderr)
+        self.assertEqual(json.loads(relu.stdout.splitlines()[-1]), lot["empreintes"])
+        self.assertGreater(len(set(lot["empreintes"])), 1)
+
+    def test_recursif(self):
+        self.verifier_lot("recursif", LOT_RECURSIF, EMPREINTES_RECURSIF)
+
+    def test_iteratif(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            self.verifier_lot("iteratif", LOT_ITERATIF, EMPREINTES_ITERATIF, ecrire_config(dossier, CONFIG_ITERATIF))
+
+
+if __name__ == "__main__":
+    unittest.main()